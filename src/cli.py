@@ -0,0 +1,350 @@
+import argparse
+import multiprocessing
+import os
+import sys
+
+from core.config_manager import ConfigManager
+from core.distributed import ShardManifest, run_worker
+from core.exporter import ExportOptions, BatchExporter
+from core.export_job import ExportJob
+from core.file_writer import WriteBehindWriter
+from core.pipeline import ProcessExporter
+from core.profiling import MemoryProfiler
+from core.benchmark import EncoderBenchmark, sample_image
+from core.golden import DEFAULT_MAX_PIXEL_DIFF, DEFAULT_TOLERANCE, GoldenHarness
+from core.image_processor import ImageProcessor, RESIZE_MODES, OUTPUT_FORMATS
+
+# Extensions picked up when a folder is given as input (same as the import dialog)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+
+def collect_images(inputs):
+    """Expands files and folders into a list of image paths, keeping order and dropping duplicates."""
+    paths = []
+    seen = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            candidates = [os.path.join(entry, name) for name in sorted(os.listdir(entry))]
+            candidates = [p for p in candidates if p.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            candidates = [entry]
+        for path in candidates:
+            key = os.path.normcase(os.path.abspath(path))
+            if key not in seen:
+                seen.add(key)
+                paths.append(path)
+    return paths
+
+
+def parse_resize(value):
+    """Parses a resize spec like 'long_edge:2048' or 'percent:50' into (mode, value)."""
+    if not value or value == 'none':
+        return 'none', None
+    mode, sep, amount = value.partition(':')
+    if not sep or mode not in RESIZE_MODES:
+        raise argparse.ArgumentTypeError(
+            f"invalid resize '{value}' (expected MODE:VALUE with MODE one of {', '.join(RESIZE_MODES[1:])})")
+    try:
+        amount = float(amount)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid resize value '{amount}'")
+    if amount <= 0:
+        raise argparse.ArgumentTypeError("resize value must be positive")
+    return mode, amount
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='photo-watermark', description="Photo Watermark 2.0 command line tools.")
+    subparsers = parser.add_subparsers(dest='command')
+
+    export = subparsers.add_parser('export', help="Watermark and export images with a saved template.")
+    add_export_arguments(export)
+    export.add_argument('-j', '--workers', type=int, default=1,
+                        help="Worker processes (0 = one per CPU); frames move between them via shared memory")
+    export.add_argument('--memory-budget', type=int, metavar='MB',
+                        help="Memory for images exported at once with -j (default: half the RAM); huge images wait for room")
+    export.add_argument('--io-threads', type=int, default=2,
+                        help="Background threads writing encoded files (0 = write inline); single-process only")
+    export.add_argument('--prefetch', type=int, default=128, metavar='MB',
+                        help="Read upcoming source files ahead, up to this many MB (0 = off); helps on network storage")
+    export.add_argument('--fsync', action='store_true', help="Flush every output file to disk before counting it as done")
+    export.add_argument('--profile-memory', action='store_true',
+                        help="Report RSS, allocation peaks and top allocation sites per export stage (single-process)")
+    export.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted export into the same folder, skipping finished images")
+    export.add_argument('--retries', type=int, default=2,
+                        help="Retries (with backoff) for images failing with transient I/O errors")
+    export.set_defaults(func=run_export)
+
+    dist = subparsers.add_parser('dist', help="Run one export across several processes or machines sharing a folder.")
+    dist_commands = dist.add_subparsers(dest='dist_command')
+    dist_init = dist_commands.add_parser('init', help="Split an export into shards in a shared job folder.")
+    dist_init.add_argument('job_dir', help="Job folder on storage every worker can reach")
+    add_export_arguments(dist_init)
+    dist_init.add_argument('--shard-size', type=int, default=500, help="Images per shard")
+    dist_init.set_defaults(func=run_dist_init)
+    dist_work = dist_commands.add_parser('work', help="Claim and export shards of a job until none are left.")
+    dist_work.add_argument('job_dir')
+    dist_work.add_argument('-j', '--workers', type=int, default=1, help="Worker processes on this machine (0 = one per CPU)")
+    dist_work.add_argument('--lease', type=float, default=300, metavar='SECONDS',
+                           help="Lease length; shards of a worker silent for longer are taken over")
+    dist_work.add_argument('--poll', type=float, default=5, metavar='SECONDS',
+                           help="Wait between checks for expired leases once all shards are claimed")
+    dist_work.add_argument('--no-wait', action='store_true', help="Exit once no shard is free instead of waiting to take over")
+    dist_work.add_argument('--prefetch', type=int, default=128, metavar='MB', help="Read-ahead per worker (0 = off)")
+    dist_work.set_defaults(func=run_dist_work)
+    dist_status = dist_commands.add_parser('status', help="Show shard progress and failures of a job.")
+    dist_status.add_argument('job_dir')
+    dist_status.set_defaults(func=run_dist_status)
+
+    benchmark = subparsers.add_parser('benchmark', help="Compare encode time and output size of formats and encoder settings.")
+    benchmark.add_argument('inputs', nargs='*', help="Sample images or folders (default: a synthetic photo)")
+    benchmark.add_argument('--quality', type=int, default=90, help="JPEG/WebP quality (1-100)")
+    benchmark.add_argument('--repeat', type=int, default=3, help="Runs per image; the fastest counts")
+    benchmark.add_argument('--resize', type=parse_resize, default=('none', None), metavar='MODE:VALUE',
+                           help="Resize samples before encoding, as for export")
+    benchmark.set_defaults(func=run_benchmark)
+
+    golden = subparsers.add_parser('golden', help="Check watermark rendering against golden images, with timings.")
+    golden.add_argument('golden_dir', nargs='?', default='golden', help="Folder holding the golden images")
+    golden.add_argument('--update', action='store_true', help="Store the current outputs and timings as the new goldens")
+    golden.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, metavar='DB',
+                        help="Minimum PSNR against the golden image")
+    golden.add_argument('--max-pixel-diff', type=int, default=DEFAULT_MAX_PIXEL_DIFF, metavar='N',
+                        help="Largest per-channel difference allowed in any pixel (0-255)")
+    golden.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the fastest counts")
+    golden.add_argument('--max-slowdown', type=float, metavar='X',
+                        help="Also fail when the corpus takes more than X times the baseline time")
+    golden.add_argument('-k', '--filter', metavar='TEXT', help="Only run cases whose name contains TEXT")
+    golden.add_argument('--diff-dir', help="Write failing outputs and amplified differences here")
+    golden.set_defaults(func=run_golden)
+    return parser
+
+
+def add_export_arguments(parser):
+    """Adds the inputs, template and output options shared by 'export' and 'dist init'."""
+    parser.add_argument('inputs', nargs='+', help="Image files or folders")
+    parser.add_argument('-o', '--output', required=True, help="Output folder (must differ from the source folders)")
+    parser.add_argument('-t', '--template', help="Template name (default: the selected template)")
+    parser.add_argument('--config', default='config.json', help="Config file holding the templates")
+    parser.add_argument('--format', default='JPEG', choices=list(OUTPUT_FORMATS), type=str.upper)
+    parser.add_argument('--quality', type=int, default=95, help="JPEG/WebP quality (1-100)")
+    parser.add_argument('--naming', default='original', choices=['original', 'prefix', 'suffix'])
+    parser.add_argument('--prefix', default='wm_')
+    parser.add_argument('--suffix', default='_watermarked')
+    parser.add_argument('--resize', type=parse_resize, default=('none', None), metavar='MODE:VALUE',
+                        help="Output size: long_edge:PX, width:PX, height:PX or percent:N (never enlarges)")
+    parser.add_argument('-p', '--profile', action='append', default=[], metavar='NAME',
+                        help="Export profile to render (repeatable); overrides the format/size/naming options")
+    encoder = parser.add_argument_group("encoder settings (defaults favor speed)")
+    encoder.add_argument('--jpeg-optimize', action='store_true', default=None, help="Optimize JPEG Huffman tables")
+    encoder.add_argument('--progressive', action='store_true', default=None, help="Write progressive JPEG")
+    encoder.add_argument('--subsampling', choices=['4:4:4', '4:2:2', '4:2:0'], help="JPEG chroma subsampling")
+    encoder.add_argument('--png-compress-level', type=int, choices=range(10), metavar='0-9', help="PNG zlib level")
+    encoder.add_argument('--webp-method', type=int, choices=range(7), metavar='0-6', help="WebP effort")
+    encoder.add_argument('--lossless', action='store_true', default=None, help="Lossless WebP")
+
+
+def encoder_settings_from_args(args):
+    """Collects the encoder flags that were given into per-format overrides."""
+    flags = {
+        'JPEG': {'optimize': args.jpeg_optimize, 'progressive': args.progressive, 'subsampling': args.subsampling},
+        'PNG': {'compress_level': args.png_compress_level},
+        'WEBP': {'method': args.webp_method, 'lossless': args.lossless},
+    }
+    encoder = {}
+    for fmt, values in flags.items():
+        values = {k: v for k, v in values.items() if v is not None}
+        if values:
+            encoder[fmt] = values
+    return encoder
+
+
+def prepare_export(args):
+    """
+    Resolves the template, images, output folder and renditions of an export
+    command; returns (settings, paths, output_dir, options), or None after
+    printing the error.
+    """
+    config_manager = ConfigManager(args.config)
+    name = args.template or config_manager.get_selected_template_name()
+    settings = config_manager.get_template(name) if name else None
+    if settings is None:
+        print(f"Error: template not found: {name}", file=sys.stderr)
+        return None
+
+    paths = collect_images(args.inputs)
+    if not paths:
+        print("Error: no images to export.", file=sys.stderr)
+        return None
+    output_dir = os.path.abspath(args.output)
+    source_dirs = {os.path.normcase(os.path.abspath(os.path.dirname(p))) for p in paths}
+    if os.path.normcase(output_dir) in source_dirs:
+        print("Error: exporting to a source folder is not allowed.", file=sys.stderr)
+        return None
+
+    if args.profile:
+        options = []
+        for profile_name in args.profile:
+            profile = config_manager.get_export_profile(profile_name)
+            if profile is None:
+                print(f"Error: export profile not found: {profile_name}", file=sys.stderr)
+                return None
+            options.append(ExportOptions.from_dict(profile, name=profile_name))
+    else:
+        resize_mode, resize_value = args.resize
+        options = ExportOptions(fmt=args.format, quality=args.quality, naming_rule=args.naming,
+                                prefix=args.prefix, suffix=args.suffix,
+                                resize_mode=resize_mode, resize_value=resize_value,
+                                encoder=encoder_settings_from_args(args))
+    return settings, paths, output_dir, options
+
+
+def run_export(args):
+    prepared = prepare_export(args)
+    if prepared is None:
+        return 2
+    settings, paths, output_dir, options = prepared
+    os.makedirs(output_dir, exist_ok=True)
+
+    def progress(done, total, path):
+        print(f"[{done}/{total}] {path}")
+
+    writer = None
+    profiler = MemoryProfiler(enabled=args.profile_memory)
+    if args.profile_memory and args.workers != 1:
+        print("Memory profiling runs the export in a single process.", file=sys.stderr)
+    if args.workers == 1 or args.profile_memory:
+        if args.io_threads > 0:
+            writer = WriteBehindWriter(args.io_threads, fsync=args.fsync)
+        exporter = BatchExporter(ImageProcessor(), options, writer=writer, fsync=args.fsync,
+                                 prefetch_bytes=args.prefetch * 1024 * 1024, profiler=profiler)
+    else:
+        exporter = ProcessExporter(ImageProcessor(), options, workers=args.workers or None, fsync=args.fsync,
+                                   prefetch_bytes=args.prefetch * 1024 * 1024,
+                                   memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget else None)
+    job = ExportJob(exporter, output_dir, retries=max(0, args.retries))
+    try:
+        written, failures, skipped, report_path = job.run(paths, settings, resume=args.resume, progress=progress)
+    finally:
+        if writer is not None:
+            writer.close()
+    profiler.report()
+    if skipped:
+        print(f"Skipped {skipped} photo(s) finished by an earlier run.")
+    print(f"Exported {len(paths) - len(failures) - skipped} photo(s) ({len(written)} file(s)) to {output_dir}.")
+    if failures:
+        print(f"{len(failures)} photo(s) failed; see {report_path}.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_dist_init(args):
+    prepared = prepare_export(args)
+    if prepared is None:
+        return 2
+    settings, paths, output_dir, options = prepared
+    profiles = options if isinstance(options, list) else [options]
+    # Workers on other machines resolve these paths themselves, so store them absolute
+    paths = [os.path.abspath(path) for path in paths]
+    try:
+        job = ShardManifest.create(args.job_dir, paths, output_dir, settings, profiles, shard_size=args.shard_size)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    print(f"Created job {args.job_dir}: {len(paths)} photo(s) in {job.shard_count} shard(s).")
+    return 0
+
+
+def run_dist_work(args):
+    try:
+        ShardManifest(args.job_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot open job {args.job_dir}: {e}", file=sys.stderr)
+        return 2
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    worker_args = (args.job_dir, None, args.lease, args.poll, args.prefetch * 1024 * 1024, not args.no_wait)
+    if workers == 1:
+        completed = run_worker(*worker_args)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            completed = sum(pool.starmap(run_worker, [worker_args] * workers))
+    print(f"Completed {completed} shard(s).")
+    return run_dist_status(args)
+
+
+def run_dist_status(args):
+    try:
+        job = ShardManifest(args.job_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot open job {args.job_dir}: {e}", file=sys.stderr)
+        return 2
+    counts, failures = job.status()
+    print(f"Shards: {job.shard_count} (done {counts['done']}, leased {counts['leased']}, "
+          f"expired {counts['expired']}, open {counts['open']})")
+    for path, reason in failures:
+        print(f"Failed: {path}\t{reason}", file=sys.stderr)
+    if failures:
+        return 1
+    return 0 if counts['done'] == job.shard_count else 3
+
+
+def run_benchmark(args):
+    processor = ImageProcessor()
+    resize_mode, resize_value = args.resize
+    images = []
+    for path in collect_images(args.inputs):
+        try:
+            img, _source_size = processor.load_image_for_output(path, resize_mode, resize_value)
+            images.append(img)
+        except Exception as e:
+            print(f"Error loading {path}: {e}", file=sys.stderr)
+    if not images:
+        if args.inputs:
+            print("Error: no readable images.", file=sys.stderr)
+            return 2
+        images = [sample_image()]
+    megapixels = sum(img.width * img.height for img in images) / 1000000.0
+    print(f"Encoding {len(images)} image(s), {megapixels:.1f} MP, quality {args.quality}, best of {args.repeat}:")
+    results = EncoderBenchmark(processor, quality=args.quality, repeat=args.repeat).run(images)
+    print(EncoderBenchmark.format_report(results))
+    return 0
+
+
+def run_golden(args):
+    harness = GoldenHarness(args.golden_dir, tolerance=args.tolerance, max_pixel_diff=args.max_pixel_diff,
+                            repeat=args.repeat)
+    results, _manifest = harness.run(update=args.update, name_filter=args.filter, diff_dir=args.diff_dir)
+    print(GoldenHarness.format_report(results, args.max_slowdown))
+    if args.update:
+        print(f"Stored {len(results)} golden image(s) in {args.golden_dir}.")
+        return 0
+    failed = [r for r in results if r.status == 'fail']
+    missing = [r for r in results if r.status == 'new']
+    if missing:
+        print(f"{len(missing)} case(s) have no golden image; run with --update to create them.", file=sys.stderr)
+    if failed:
+        print(f"{len(failed)} case(s) differ from their golden image: {', '.join(r.case.name for r in failed)}",
+              file=sys.stderr)
+        return 1
+    timed = [r for r in results if r.baseline_ms]
+    if args.max_slowdown and timed:
+        slowdown = sum(r.ms for r in timed) / sum(r.baseline_ms for r in timed)
+        if slowdown > args.max_slowdown:
+            print(f"Rendering is {slowdown:.2f}x the baseline time (limit {args.max_slowdown:.2f}x).", file=sys.stderr)
+            return 1
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
\ No newline at end of file
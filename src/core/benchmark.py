@@ -0,0 +1,95 @@
+from collections import namedtuple
+import io
+import time
+
+from PIL import Image, ImageFilter
+
+from core.image_processor import OUTPUT_FORMATS
+
+# (format, encoder settings) pairs compared by default; {} means the throughput defaults
+DEFAULT_BENCHMARK_CASES = [
+    ('JPEG', {}),
+    ('JPEG', {'optimize': True}),
+    ('JPEG', {'progressive': True}),
+    ('JPEG', {'subsampling': '4:4:4'}),
+    ('PNG', {}),
+    ('PNG', {'compress_level': 6}),
+    ('WEBP', {'method': 0}),
+    ('WEBP', {}),
+    ('WEBP', {'method': 4}),
+    ('WEBP', {'method': 6}),
+    ('WEBP', {'lossless': True, 'method': 0}),
+]
+
+
+class EncodeResult(namedtuple('EncodeResult', ['format', 'settings', 'seconds', 'bytes', 'megapixels'])):
+    """Total encode time and output size of one encoder configuration over the sample images."""
+
+    __slots__ = ()
+
+    @property
+    def ms_per_mp(self):
+        return self.seconds * 1000.0 / self.megapixels if self.megapixels else 0.0
+
+    @property
+    def kb_per_mp(self):
+        return self.bytes / 1024.0 / self.megapixels if self.megapixels else 0.0
+
+    @property
+    def label(self):
+        options = ", ".join(f"{k}={v}" for k, v in sorted(self.settings.items()))
+        return f"{self.format} ({options or 'defaults'})"
+
+
+def sample_image(size=(2400, 1600)):
+    """A synthetic photo-like image (smooth gradients plus fine grain) for benchmarking without inputs."""
+    gradient = Image.linear_gradient('L').resize(size)
+    bands = [gradient, gradient.rotate(90).resize(size), Image.effect_noise(size, 20)]
+    return Image.merge('RGB', bands).filter(ImageFilter.GaussianBlur(2))
+
+
+class EncoderBenchmark:
+    """
+    Measures the encode time versus output size tradeoff of output formats
+    and encoder settings, encoding into memory so disk speed does not skew it.
+    """
+
+    def __init__(self, image_processor, quality=90, repeat=3):
+        self.image_processor = image_processor
+        self.quality = quality
+        self.repeat = max(1, int(repeat))
+
+    def run(self, images, cases=None):
+        """Returns an EncodeResult per case; each image's time is the best of `repeat` runs."""
+        cases = [case for case in (cases or DEFAULT_BENCHMARK_CASES) if case[0] in OUTPUT_FORMATS]
+        megapixels = sum(img.width * img.height for img in images) / 1000000.0
+        results = []
+        for fmt, settings in cases:
+            total_seconds = 0.0
+            total_bytes = 0
+            for img in images:
+                best = None
+                for _ in range(self.repeat):
+                    buf = io.BytesIO()
+                    start = time.perf_counter()
+                    self.image_processor.encode_image(img, buf, fmt, self.quality, settings)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                total_seconds += best
+                total_bytes += buf.tell()
+            results.append(EncodeResult(fmt, dict(settings), total_seconds, total_bytes, megapixels))
+        return results
+
+    @staticmethod
+    def format_report(results):
+        """Returns the results as a text table, with time and size relative to the first row."""
+        if not results:
+            return "No encoder cases to run."
+        base = results[0]
+        width = max(len(r.label) for r in results)
+        lines = [f"{'Encoder':<{width}}  {'ms/MP':>8}  {'KB/MP':>8}  {'time':>6}  {'size':>6}"]
+        for r in results:
+            rel_time = r.seconds / base.seconds if base.seconds else 0.0
+            rel_size = r.bytes / float(base.bytes) if base.bytes else 0.0
+            lines.append(f"{r.label:<{width}}  {r.ms_per_mp:>8.1f}  {r.kb_per_mp:>8.0f}  {rel_time:>5.2f}x  {rel_size:>5.2f}x")
+        return "\n".join(lines)
\ No newline at end of file
@@ -1,4 +1,7 @@
 import json
+import os
+
+from core.template_store import TemplateStore
 
 class ConfigManager:
     """Manages application configuration and watermark templates."""
@@ -6,6 +9,9 @@ class ConfigManager:
     def __init__(self, config_file='config.json'):
         self.config_file = config_file
         self.config = self.load_config()
+        # Templates are kept in their own journal file (see TemplateStore)
+        self.templates = TemplateStore(self._journal_path())
+        self._migrate_templates()
 
     def load_config(self):
         """Loads the application configuration."""
@@ -60,10 +66,8 @@ class ConfigManager:
     # ------------------------------
     def ensure_default_template(self):
         """Ensure the default template and structure exist in the config."""
-        cfg = self.config
-        templates = cfg.setdefault('templates', {})
-        if 'Default' not in templates:
-            templates['Default'] = {
+        if 'Default' not in self.templates:
+            self.templates.put('Default', {
                 'text': 'Your Watermark',
                 'font_size': 40,           # fallback value when no image is selected
                 'font_size_auto': True,    # default template uses auto font sizing
@@ -72,21 +76,49 @@ class ConfigManager:
                 'position_mode': 'relative',
                 'offset_x': 0.5,           # relative fraction across available area (0..1)
                 'offset_y': 0.5            # relative fraction across available area (0..1)
-            }
-        cfg.setdefault('selected_template', 'Default')
+            })
+        # Only write when something was added (startup would otherwise rewrite the file every launch)
+        if 'selected_template' not in self.config:
+            self.config['selected_template'] = 'Default'
+            self.save_config()
+
+    def _journal_path(self):
+        """Templates live next to the config file, e.g. config.json -> config.templates.jsonl."""
+        return os.path.splitext(self.config_file)[0] + '.templates.jsonl'
+
+    def _migrate_templates(self):
+        """Moves templates stored inline in config.json (older versions) into the template journal."""
+        legacy = self.config.get('templates')
+        if legacy is None:
+            return
+        missing = {name: settings for name, settings in legacy.items() if name not in self.templates}
+        try:
+            if missing:
+                self.templates.put_many(missing)
+        except Exception as e:
+            print(f"Error migrating templates to {self.templates.path}: {e}")
+            return
+        del self.config['templates']
         self.save_config()
 
+    def _normalize_template(self, settings):
+        """Stores logo paths as absolute paths so image templates work from any working directory."""
+        settings = dict(settings)
+        if settings.get('image_path'):
+            settings['image_path'] = os.path.abspath(settings['image_path'])
+        return settings
+
     def list_templates(self):
         """Return a list of template names, with 'Default' first."""
-        names = list(self.config.get('templates', {}).keys())
-        if 'Default' in names:
+        names = self.templates.names()
+        if 'Default' in self.templates:
             names.remove('Default')
-            return ['Default'] + sorted(names)
-        return sorted(names)
+            return ['Default'] + names
+        return names
 
     def get_template(self, name):
         """Get a template by name, or None if missing."""
-        return self.config.get('templates', {}).get(name)
+        return self.templates.get(name)
 
     def add_template(self, name, settings):
         """Add a new template. 'Default' cannot be added or modified here."""
@@ -94,44 +126,106 @@ class ConfigManager:
             raise ValueError("Template name cannot be empty")
         if name == 'Default':
             raise ValueError("Default template cannot be modified")
-        templates = self.config.setdefault('templates', {})
-        if name in templates:
+        if name in self.templates:
             raise ValueError("A template with this name already exists")
-        templates[name] = settings
-        self.save_config()
+        self.templates.put(name, self._normalize_template(settings))
 
     def update_template(self, name, settings):
         """Update an existing template. 'Default' cannot be modified."""
         if name == 'Default':
             raise ValueError("Default template cannot be modified")
-        templates = self.config.setdefault('templates', {})
-        if name not in templates:
+        if name not in self.templates:
             raise ValueError("Template does not exist")
-        templates[name] = settings
-        self.save_config()
+        self.templates.put(name, self._normalize_template(settings))
+
+    def rename_template(self, old_name, new_name, settings=None):
+        """Rename a template (optionally replacing its settings). 'Default' cannot be renamed."""
+        if not new_name:
+            raise ValueError("Template name cannot be empty")
+        if 'Default' in (old_name, new_name):
+            raise ValueError("Default template cannot be modified")
+        if old_name not in self.templates:
+            raise ValueError("Template does not exist")
+        if new_name in self.templates:
+            raise ValueError("A template with this name already exists")
+        self.templates.rename(old_name, new_name)
+        if settings is not None:
+            self.templates.put(new_name, self._normalize_template(settings))
+        if self.config.get('selected_template') == old_name:
+            self.config['selected_template'] = new_name
+            self.save_config()
 
     def delete_template(self, name):
         """Delete a template by name. 'Default' cannot be deleted."""
         if name == 'Default':
             raise ValueError("Default template cannot be deleted")
-        templates = self.config.setdefault('templates', {})
-        if name in templates:
-            del templates[name]
-            # If the deleted template was selected, fall back to Default
-            if self.config.get('selected_template') == name:
-                self.config['selected_template'] = 'Default'
-            self.save_config()
-        else:
+        if name not in self.templates:
             raise ValueError("Template does not exist")
+        self.templates.delete(name)
+        # If the deleted template was selected, fall back to Default
+        if self.config.get('selected_template') == name:
+            self.config['selected_template'] = 'Default'
+            self.save_config()
 
     def set_selected_template(self, name):
         """Set the currently selected template if it exists, otherwise default."""
-        if name in self.config.get('templates', {}):
+        if name not in self.templates:
+            name = 'Default'
+        if self.config.get('selected_template') != name:
             self.config['selected_template'] = name
-        else:
-            self.config['selected_template'] = 'Default'
-        self.save_config()
+            self.save_config()
 
     def get_selected_template_name(self):
         """Get the name of the selected template (default if not set)."""
-        return self.config.get('selected_template', 'Default')
\ No newline at end of file
+        return self.config.get('selected_template', 'Default')
+
+    # ------------------------------
+    # Export profiles
+    # ------------------------------
+    def list_export_profiles(self):
+        """Return the names of the saved export profiles, sorted."""
+        return sorted(self.config.get('export_profiles', {}).keys())
+
+    def get_export_profile(self, name):
+        """Get an export profile by name, or None if missing."""
+        return self.config.get('export_profiles', {}).get(name)
+
+    def add_export_profile(self, name, profile):
+        """Add a new export profile."""
+        if not name:
+            raise ValueError("Profile name cannot be empty")
+        profiles = self.config.setdefault('export_profiles', {})
+        if name in profiles:
+            raise ValueError("A profile with this name already exists")
+        profiles[name] = dict(profile)
+        self.save_config()
+
+    def update_export_profile(self, name, profile):
+        """Update an existing export profile."""
+        profiles = self.config.setdefault('export_profiles', {})
+        if name not in profiles:
+            raise ValueError("Profile does not exist")
+        profiles[name] = dict(profile)
+        self.save_config()
+
+    def delete_export_profile(self, name):
+        """Delete an export profile by name, and drop it from the selection."""
+        profiles = self.config.setdefault('export_profiles', {})
+        if name not in profiles:
+            raise ValueError("Profile does not exist")
+        del profiles[name]
+        selected = self.config.get('selected_export_profiles', [])
+        if name in selected:
+            self.config['selected_export_profiles'] = [n for n in selected if n != name]
+        self.save_config()
+
+    def set_selected_export_profiles(self, names):
+        """Set the profiles used by "Export All"; unknown names are ignored."""
+        profiles = self.config.get('export_profiles', {})
+        self.config['selected_export_profiles'] = [n for n in names if n in profiles]
+        self.save_config()
+
+    def get_selected_export_profiles(self):
+        """Get the names of the profiles used by "Export All" (empty = use the export settings panel)."""
+        profiles = self.config.get('export_profiles', {})
+        return [n for n in self.config.get('selected_export_profiles', []) if n in profiles]
\ No newline at end of file
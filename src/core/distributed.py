@@ -0,0 +1,285 @@
+import json
+import os
+import socket
+import time
+
+from core.exporter import BatchExporter, ExportOptions
+from core.file_writer import atomic_write
+from core.image_processor import ImageProcessor
+
+# Layout of a job directory on the shared filesystem:
+#   manifest.json            job settings, export profiles and shard count
+#   shards/NNNNNN.json       the images of one shard
+#   leases/NNNNNN.G.lease    claim on a shard; G is the lease generation
+#   done/NNNNNN.json         completion record of a shard
+MANIFEST_FILENAME = 'manifest.json'
+
+# How long an unreadable lease (its holder died between creating and writing
+# it) blocks the shard, counted from the file's modification time
+UNREADABLE_LEASE_SECONDS = 60
+
+
+def shard_name(index):
+    return f"{index:06d}"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardManifest:
+    """
+    A batch export split into shards, stored in a job directory that every
+    worker (process or machine) can reach.
+
+    Workers claim shards through lease files created with O_CREAT | O_EXCL,
+    which at most one of them can win. A lease carries an expiry that its
+    holder renews while it works; once a lease has expired, any worker may
+    steal the shard by creating the lease of the next generation, again with
+    O_EXCL, so exactly one stealer wins and the old holder notices that it
+    was superseded. Output files are committed atomically, so a shard that is
+    exported twice after a steal just rewrites identical files.
+    """
+
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+        with open(os.path.join(job_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.shard_count = self.manifest['shards']
+        self.output_dir = self.manifest['output_dir']
+        self.settings = self.manifest['settings']
+        self.profiles = [ExportOptions.from_dict(data, name=data.get('name'))
+                         for data in self.manifest['profiles']]
+
+    @classmethod
+    def create(cls, job_dir, paths, output_dir, settings, profiles, shard_size=500, states=None):
+        """Writes the manifest and shard files of a new job (coordinator side) and returns it."""
+        if os.path.exists(os.path.join(job_dir, MANIFEST_FILENAME)):
+            raise ValueError(f"A job already exists in {job_dir}")
+        states = states or {}
+        shard_size = max(1, int(shard_size))
+        for sub in ('shards', 'leases', 'done'):
+            os.makedirs(os.path.join(job_dir, sub), exist_ok=True)
+        shards = [paths[i:i + shard_size] for i in range(0, len(paths), shard_size)]
+        for index, shard in enumerate(shards):
+            shard_states = {path: states[path] for path in shard if path in states}
+            data = json.dumps({'paths': shard, 'states': shard_states})
+            atomic_write(cls._path(job_dir, 'shards', shard_name(index) + '.json'), data.encode('utf-8'))
+        manifest = {
+            'created': time.time(),
+            'output_dir': output_dir,
+            'settings': settings,
+            'profiles': [dict(profile.to_dict(), name=profile.name) for profile in profiles],
+            'images': len(paths),
+            'shard_size': shard_size,
+            'shards': len(shards),
+        }
+        # The manifest goes last: workers only start on a job once it exists
+        atomic_write(os.path.join(job_dir, MANIFEST_FILENAME),
+                     json.dumps(manifest, indent=2).encode('utf-8'), fsync=True)
+        return cls(job_dir)
+
+    @staticmethod
+    def _path(job_dir, sub, name):
+        return os.path.join(job_dir, sub, name)
+
+    def load_shard(self, index):
+        with open(self._path(self.job_dir, 'shards', shard_name(index) + '.json'), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data['paths'], data.get('states', {})
+
+    def is_done(self, index):
+        return os.path.exists(self._path(self.job_dir, 'done', shard_name(index) + '.json'))
+
+    def mark_done(self, index, worker_id, written, failures):
+        record = {'worker': worker_id, 'finished': time.time(), 'written': written,
+                  'failures': [[path, reason] for path, reason in failures]}
+        atomic_write(self._path(self.job_dir, 'done', shard_name(index) + '.json'),
+                     json.dumps(record).encode('utf-8'), fsync=True)
+
+    def read_done(self, index):
+        try:
+            with open(self._path(self.job_dir, 'done', shard_name(index) + '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lease_generations(self):
+        """
+        Returns {shard index: newest lease generation} from a single listing of
+        the leases directory; pass it to current_lease() and try_claim() when
+        going over many shards, so a pass costs one listing, not one per shard.
+        """
+        generations = {}
+        for name in os.listdir(os.path.join(self.job_dir, 'leases')):
+            parts = name.split('.')
+            if len(parts) != 3 or parts[2] != 'lease':
+                continue
+            try:
+                index, generation = int(parts[0]), int(parts[1])
+            except ValueError:
+                continue
+            if generation > generations.get(index, 0):
+                generations[index] = generation
+        return generations
+
+    def current_lease(self, index, generations=None):
+        """Returns (generation, lease record) of the newest lease on a shard, or (0, None) if it was never claimed."""
+        if generations is None:
+            generations = self.lease_generations()
+        generation = generations.get(index, 0)
+        if not generation:
+            return 0, None
+        lease_path = self._lease_path(index, generation)
+        try:
+            with open(lease_path, 'r', encoding='utf-8') as f:
+                return generation, json.load(f)
+        except (OSError, ValueError):
+            # Being written right now, or left empty by a crash: a claim for a short while only
+            try:
+                expires = os.path.getmtime(lease_path) + UNREADABLE_LEASE_SECONDS
+            except OSError:
+                expires = time.time() + UNREADABLE_LEASE_SECONDS
+            return generation, {'worker': None, 'expires': expires}
+
+    def _lease_path(self, index, generation):
+        return self._path(self.job_dir, 'leases', f"{shard_name(index)}.{generation}.lease")
+
+    def try_claim(self, index, worker_id, lease_seconds, generations=None):
+        """
+        Claims a shard that is unclaimed or whose lease expired. Returns the
+        lease generation held, or None if the shard is done or someone else
+        holds it.
+        """
+        if self.is_done(index):
+            return None
+        generation, lease = self.current_lease(index, generations)
+        if lease is not None and lease.get('expires', 0) > time.time():
+            return None
+        generation += 1
+        try:
+            fd = os.open(self._lease_path(index, generation), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._lease_record(worker_id, lease_seconds), f)
+        return generation
+
+    def holds(self, index, generation):
+        """True while no newer lease generation exists (a steal always creates the next one)."""
+        return not os.path.exists(self._lease_path(index, generation + 1))
+
+    def renew(self, index, generation, worker_id, lease_seconds):
+        """Extends a held lease; returns False if it was stolen meanwhile."""
+        if not self.holds(index, generation):
+            return False
+        atomic_write(self._lease_path(index, generation),
+                     json.dumps(self._lease_record(worker_id, lease_seconds)).encode('utf-8'))
+        return True
+
+    def release(self, index, generation):
+        """Drops a lease early (e.g. on shutdown) so the shard can be claimed again at once."""
+        if self.holds(index, generation):
+            atomic_write(self._lease_path(index, generation), json.dumps({'worker': None, 'expires': 0}).encode('utf-8'))
+
+    @staticmethod
+    def _lease_record(worker_id, lease_seconds):
+        now = time.time()
+        return {'worker': worker_id, 'host': socket.gethostname(), 'pid': os.getpid(),
+                'claimed': now, 'expires': now + lease_seconds}
+
+    def status(self):
+        """Returns counts of done, leased, expired and open shards, plus the failures recorded so far."""
+        counts = {'done': 0, 'leased': 0, 'expired': 0, 'open': 0}
+        failures = []
+        now = time.time()
+        generations = self.lease_generations()
+        for index in range(self.shard_count):
+            record = self.read_done(index)
+            if record is not None:
+                counts['done'] += 1
+                failures.extend(tuple(failure) for failure in record.get('failures', []))
+                continue
+            _generation, lease = self.current_lease(index, generations)
+            if lease is None:
+                counts['open'] += 1
+            elif lease.get('expires', 0) > now:
+                counts['leased'] += 1
+            else:
+                counts['expired'] += 1
+        return counts, failures
+
+
+class ShardWorker:
+    """
+    Claims shards of a ShardManifest one at a time and exports them with a
+    BatchExporter until no shard is left to claim. The lease is renewed
+    between images; a worker whose shard was stolen (because it stalled past
+    its lease) leaves the completion record to the new holder.
+    """
+
+    def __init__(self, job_dir, worker_id=None, lease_seconds=300, poll_interval=5.0, prefetch_bytes=0):
+        self.job = ShardManifest(job_dir)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.exporter = BatchExporter(ImageProcessor(), self.job.profiles, prefetch_bytes=prefetch_bytes)
+
+    def claim_next(self):
+        """Returns (shard index, lease generation) of a claimable shard, or None."""
+        generations = self.job.lease_generations()
+        for index in range(self.job.shard_count):
+            generation = self.job.try_claim(index, self.worker_id, self.lease_seconds, generations)
+            if generation is not None:
+                return index, generation
+        return None
+
+    def run(self, wait=True, progress=None):
+        """
+        Works until every shard is done. With wait=True a worker that finds
+        only leased shards keeps polling, to steal those whose holder dies.
+        Returns the number of shards this worker completed.
+        """
+        completed = 0
+        while True:
+            claim = self.claim_next()
+            if claim is None:
+                counts, _failures = self.job.status()
+                if counts['done'] == self.job.shard_count or not wait:
+                    return completed
+                time.sleep(self.poll_interval)
+                continue
+            if self.run_shard(*claim, progress=progress):
+                completed += 1
+
+    def run_shard(self, index, generation, progress=None):
+        paths, states = self.job.load_shard(index)
+        os.makedirs(self.job.output_dir, exist_ok=True)
+        renew_after = self.lease_seconds / 3.0
+        state = {'renewed': time.monotonic(), 'lost': False}
+
+        def keep_lease(done, total, path):
+            if progress is not None:
+                progress(index, done, total, path)
+            if time.monotonic() - state['renewed'] >= renew_after:
+                state['lost'] = not self.job.renew(index, generation, self.worker_id, self.lease_seconds)
+                state['renewed'] = time.monotonic()
+
+        try:
+            written, failures = self.exporter.export_all(paths, self.job.settings, self.job.output_dir,
+                                                         states, progress=keep_lease)
+        except BaseException:
+            # Interrupted (e.g. Ctrl+C): hand the shard back instead of letting it wait for the lease to expire
+            self.job.release(index, generation)
+            raise
+        if state['lost'] or not self.job.holds(index, generation):
+            print(f"Lease on shard {shard_name(index)} was taken over; leaving it to the new holder")
+            return False
+        self.job.mark_done(index, self.worker_id, written, failures)
+        return True
+
+
+def run_worker(job_dir, worker_id=None, lease_seconds=300, poll_interval=5.0, prefetch_bytes=0, wait=True):
+    """Entry point for a worker process; returns the number of shards it completed."""
+    worker = ShardWorker(job_dir, worker_id, lease_seconds, poll_interval, prefetch_bytes)
+    return worker.run(wait=wait)
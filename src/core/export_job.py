@@ -0,0 +1,270 @@
+from collections import namedtuple
+from concurrent.futures.process import BrokenProcessPool
+import errno
+import hashlib
+import json
+import os
+import time
+
+# Written into the output directory of a job
+CHECKPOINT_FILENAME = '.photo_watermark_export.jsonl'
+REPORT_FILENAME = 'export_report.txt'
+
+# OS errors worth retrying: busy/locked files (e.g. a virus scanner or sync
+# client holding the output), interrupted calls and flaky network shares.
+TRANSIENT_ERRNOS = {errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.EIO, errno.ETIMEDOUT, errno.EACCES}
+
+
+def is_transient_error(error):
+    """True for failures that may succeed on a retry (unreadable or corrupt images never do)."""
+    if isinstance(error, (MemoryError, BrokenProcessPool)):
+        return True
+    return isinstance(error, OSError) and error.errno in TRANSIENT_ERRNOS
+
+
+def error_message(error):
+    return str(error) or error.__class__.__name__
+
+
+def job_key(paths, profiles, default_settings):
+    """Identifies an export job by its images, renditions and default watermark settings."""
+    digest = hashlib.sha1()
+    header = {'profiles': [profile.to_dict() for profile in profiles], 'settings': default_settings}
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode('utf-8'))
+    for path in paths:
+        digest.update(path.encode('utf-8', 'surrogatepass'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def settings_key(settings):
+    """Digest of the watermark settings of one image, recorded with it in the checkpoint."""
+    data = json.dumps(settings, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+class ExportCheckpoint:
+    """
+    Durable progress journal of an export job, kept in its output directory.
+
+    The first line identifies the job; every finished image then appends one
+    line ({"done": path, "files": [...], "settings": key} or {"failed": path,
+    "error": ...}), flushed and synced to disk, so a crash or reboot loses at
+    most the images that were in flight. The settings key lets a resumed run
+    redo images whose own watermark settings changed since.
+    """
+
+    def __init__(self, output_dir, key, total, fsync=True):
+        self.path = os.path.join(output_dir, CHECKPOINT_FILENAME)
+        self.key = key
+        self.total = total
+        self.fsync = fsync
+        self.completed = {}  # source path -> (written files, settings key)
+        self.failed = {}     # source path -> error message
+        self._file = None
+
+    @classmethod
+    def create(cls, output_dir, key, total, fsync=True):
+        """Starts a new journal, replacing any earlier one in output_dir."""
+        checkpoint = cls(output_dir, key, total, fsync)
+        checkpoint._file = open(checkpoint.path, 'w', encoding='utf-8')
+        checkpoint._append({'job': key, 'total': total})
+        return checkpoint
+
+    @classmethod
+    def load(cls, output_dir, key, fsync=True):
+        """Reads the journal of the same job (see reopen()), or returns None if there is none."""
+        checkpoint = cls(output_dir, key, 0, fsync)
+        try:
+            with open(checkpoint.path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('job') != key:
+                    return None
+                checkpoint.total = header.get('total', 0)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of an interrupted run
+                    if 'done' in record:
+                        checkpoint.completed[record['done']] = (record.get('files', []), record.get('settings'))
+                        checkpoint.failed.pop(record['done'], None)
+                    elif 'failed' in record:
+                        checkpoint.failed[record['failed']] = record.get('error', '')
+        except (OSError, ValueError):
+            return None
+        return checkpoint
+
+    def reopen(self):
+        """Continues a loaded journal, appending to it."""
+        self._file = open(self.path, 'a', encoding='utf-8')
+        # Start on a fresh line in case the interrupted run left half a line behind
+        self._file.write('\n')
+
+    def is_done(self, path, key=None):
+        """
+        True if `path` was exported by an earlier run, with the settings
+        identified by `key` (see settings_key) if given, and its files are still there.
+        """
+        record = self.completed.get(path)
+        if record is None:
+            return False
+        files, done_key = record
+        if key is not None and done_key != key:
+            return False
+        return all(os.path.exists(f) for f in files)
+
+    def record_done(self, path, files, key=None):
+        self.completed[path] = (list(files), key)
+        self.failed.pop(path, None)
+        self._append({'done': path, 'files': list(files), 'settings': key})
+
+    def record_failed(self, path, message, attempts=1):
+        self.failed[path] = message
+        self._append({'failed': path, 'error': message, 'attempts': attempts})
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ExportResult(namedtuple('ExportResult', ['written', 'failures', 'skipped', 'report_path'])):
+    """Outcome of an ExportJob: written files, (path, reason) failures, images skipped as already done, report file."""
+
+    __slots__ = ()
+
+
+class ExportJob:
+    """
+    Runs a batch export (BatchExporter or ProcessExporter) as a resumable job.
+
+    Progress is recorded in an ExportCheckpoint in the output directory; with
+    resume=True images finished by an earlier, interrupted run of the same job
+    are skipped. Images failing with transient errors are retried in rounds
+    with exponential backoff, and a report listing every failure and its
+    reason is written next to the exported files.
+    """
+
+    def __init__(self, exporter, output_dir, retries=2, backoff=1.0, fsync=True):
+        self.exporter = exporter
+        self.output_dir = output_dir
+        self.retries = retries
+        self.backoff = backoff
+        self.fsync = fsync
+        self.report_path = None  # report of the last run, also set when run() raised
+
+    def key(self, paths, default_settings):
+        return job_key(paths, self.exporter.profiles, default_settings)
+
+    @staticmethod
+    def image_keys(paths, default_settings, states=None):
+        """Returns {path: settings_key} of the settings each image is exported with."""
+        states = states or {}
+        default_key = settings_key(default_settings)
+        keys = {}
+        for path in paths:
+            settings = states.get(path)
+            keys[path] = settings_key(settings) if settings else default_key
+        return keys
+
+    def resumable(self, paths, default_settings, states=None):
+        """Returns how many images an earlier run of this job finished, or 0 if there is nothing to resume."""
+        checkpoint = ExportCheckpoint.load(self.output_dir, self.key(paths, default_settings), fsync=False)
+        if checkpoint is None:
+            return 0
+        keys = self.image_keys(paths, default_settings, states)
+        done = sum(1 for path in paths if checkpoint.is_done(path, keys[path]))
+        return done if done < len(paths) else 0
+
+    def run(self, paths, default_settings, states=None, resume=False, progress=None):
+        self.report_path = None
+        key = self.key(paths, default_settings)
+        image_keys = self.image_keys(paths, default_settings, states)
+        checkpoint = ExportCheckpoint.load(self.output_dir, key, self.fsync) if resume else None
+        if checkpoint is None:
+            checkpoint = ExportCheckpoint.create(self.output_dir, key, len(paths), self.fsync)
+        else:
+            checkpoint.reopen()
+        todo = [path for path in paths if not checkpoint.is_done(path, image_keys[path])]
+        skipped = len(paths) - len(todo)
+        written = []
+        errors = {}
+        attempts = {}
+        finished = set()
+        retry = []
+        try:
+            for attempt in range(self.retries + 1):
+                retry = []
+                finished = set()
+
+                def on_result(path, files, error):
+                    finished.add(path)
+                    attempts[path] = attempts.get(path, 0) + 1
+                    if error is None:
+                        errors.pop(path, None)
+                        written.extend(files)
+                        checkpoint.record_done(path, files, image_keys[path])
+                        return
+                    errors[path] = error
+                    if attempt < self.retries and is_transient_error(error):
+                        retry.append(path)
+                    else:
+                        checkpoint.record_failed(path, error_message(error), attempts[path])
+
+                def report_progress(done, total, path):
+                    if progress is not None and attempt == 0:
+                        progress(skipped + done, len(paths), path)
+
+                self.exporter.export_all(todo, default_settings, self.output_dir, states,
+                                         progress=report_progress, on_result=on_result)
+                if not retry:
+                    break
+                delay = self.backoff * (2 ** attempt)
+                print(f"Retrying {len(retry)} photo(s) in {delay:.1f}s")
+                time.sleep(delay)
+                todo = retry
+        except BaseException as e:
+            # The batch itself broke (e.g. BrokenProcessPool, Ctrl+C): record every image
+            # that did not finish, so the checkpoint and report still tell the whole story
+            for path in retry + [path for path in todo if path not in finished]:
+                errors[path] = e
+                checkpoint.record_failed(path, error_message(e), max(1, attempts.get(path, 0)))
+            checkpoint.close()
+            failures = [(path, error_message(errors[path])) for path in paths if path in errors]
+            self.write_report(paths, written, failures, skipped, attempts)
+            raise
+        checkpoint.close()
+        failures = [(path, error_message(errors[path])) for path in paths if path in errors]
+        report_path = self.write_report(paths, written, failures, skipped, attempts)
+        return ExportResult(written, failures, skipped, report_path)
+
+    def write_report(self, paths, written, failures, skipped, attempts):
+        """Writes the job summary and every failure with its reason; returns the report path (or None)."""
+        report_path = os.path.join(self.output_dir, REPORT_FILENAME)
+        lines = [
+            f"Export report ({time.strftime('%Y-%m-%d %H:%M:%S')})",
+            f"Photos: {len(paths)}",
+            f"Exported: {len(paths) - len(failures) - skipped} ({len(written)} file(s))",
+            f"Skipped (done by an earlier run): {skipped}",
+            f"Failed: {len(failures)}",
+        ]
+        if failures:
+            lines.append("")
+            lines.append("Failures:")
+            for path, reason in failures:
+                lines.append(f"{path}\t{reason} (attempts: {attempts.get(path, 1)})")
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except Exception as e:
+            print(f"Error writing export report {report_path}: {e}")
+            return None
+        self.report_path = report_path
+        return report_path
\ No newline at end of file
@@ -0,0 +1,240 @@
+from collections import deque
+import os
+
+from core.file_writer import atomic_write
+from core.prefetch import Prefetcher
+from core.profiling import MemoryProfiler
+from core.watermark import Watermark
+
+# File extension written for each supported output format
+OUTPUT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+}
+
+
+def build_output_name(path, naming_rule='original', prefix='', suffix='', fmt='JPEG'):
+    """Returns the output filename for a source path under the given naming rule."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    output_ext = OUTPUT_EXTENSIONS.get((fmt or 'JPEG').upper(), '.jpg')
+    if naming_rule == 'prefix':
+        return f"{prefix}{name}{output_ext}"
+    if naming_rule == 'suffix':
+        return f"{name}{suffix}{output_ext}"
+    return f"{name}{output_ext}"
+
+
+class ExportOptions:
+    """
+    Output settings for one rendition of an export: naming, format, size and
+    subfolder. Named export profiles are stored as ExportOptions dicts.
+    """
+
+    def __init__(self, fmt='JPEG', quality=95, naming_rule='original', prefix='', suffix='',
+                 resize_mode='none', resize_value=None, subfolder='', name=None, encoder=None):
+        self.name = name
+        self.fmt = (fmt or 'JPEG').upper()
+        self.quality = int(quality)
+        self.naming_rule = naming_rule
+        self.prefix = prefix
+        self.suffix = suffix
+        # Resize modes: 'none', 'long_edge', 'width', 'height' (pixels) or 'percent'
+        self.resize_mode = resize_mode or 'none'
+        self.resize_value = resize_value
+        # Optional folder below the chosen output directory (e.g. "web")
+        self.subfolder = subfolder or ''
+        # Encoder overrides keyed by format, e.g. {'WEBP': {'method': 4}}; see DEFAULT_ENCODER_SETTINGS
+        self.encoder = dict(encoder or {})
+
+    @classmethod
+    def from_dict(cls, data, name=None):
+        return cls(
+            fmt=data.get('format', 'JPEG'),
+            quality=data.get('quality', 95),
+            naming_rule=data.get('naming_rule', 'original'),
+            prefix=data.get('prefix', ''),
+            suffix=data.get('suffix', ''),
+            resize_mode=data.get('resize_mode', 'none'),
+            resize_value=data.get('resize_value'),
+            subfolder=data.get('subfolder', ''),
+            name=name,
+            encoder=data.get('encoder')
+        )
+
+    def to_dict(self):
+        return {
+            'format': self.fmt,
+            'quality': self.quality,
+            'naming_rule': self.naming_rule,
+            'prefix': self.prefix,
+            'suffix': self.suffix,
+            'resize_mode': self.resize_mode,
+            'resize_value': self.resize_value,
+            'subfolder': self.subfolder,
+            'encoder': dict(self.encoder),
+        }
+
+    def output_name(self, path):
+        """Returns the output path of `path`, relative to the export directory."""
+        name = build_output_name(path, self.naming_rule, self.prefix, self.suffix, self.fmt)
+        return os.path.join(self.subfolder, name) if self.subfolder else name
+
+
+class BatchExporter:
+    """
+    Renders and writes watermarked copies of source images.
+
+    An export has one or more renditions (ExportOptions, e.g. the selected
+    export profiles). Each source is decoded once, directly at the largest
+    output size it needs (see ImageProcessor.load_image_for_outputs), and
+    watermarked once per distinct output size; renditions of the same size
+    share that image. The watermark is laid out against the output
+    dimensions, so a resized export looks like the preview scaled down
+    rather than a smaller photo with a full-size mark.
+
+    Files are encoded in memory and committed atomically (temporary file
+    plus rename), so a failed export never leaves a partial file behind.
+    With a WriteBehindWriter the commits run on its I/O threads while the
+    next image is being rendered. With `prefetch_bytes`, export_all reads
+    upcoming source files ahead on background threads (see Prefetcher).
+    A MemoryProfiler, if given, measures the decode, watermark and encode
+    stages of every image.
+    """
+
+    def __init__(self, image_processor, options=None, writer=None, fsync=False, prefetch_bytes=0, profiler=None):
+        self.image_processor = image_processor
+        if options is None:
+            options = ExportOptions()
+        self.profiles = list(options) if isinstance(options, (list, tuple)) else [options]
+        self.writer = writer
+        self.fsync = fsync
+        self.prefetch_bytes = prefetch_bytes
+        self.profiler = profiler or MemoryProfiler(enabled=False)
+        self._prefetcher = None
+
+    def output_size(self, profile, source_size):
+        return self.image_processor.compute_output_size(source_size, profile.resize_mode, profile.resize_value)
+
+    def decode(self, path):
+        """Decodes `path` once for every rendition; returns ({output_size: image}, source_size)."""
+        specs = [(profile.resize_mode, profile.resize_value) for profile in self.profiles]
+        data = self._prefetcher.take(path) if self._prefetcher is not None else None
+        return self.image_processor.load_image_for_outputs(path, specs, data)
+
+    def apply_watermark(self, images, settings, source_size):
+        """Watermarks each decoded output size; returns {output_size: watermarked image}."""
+        watermark = Watermark.from_settings(settings, source_size)
+        rendered = {}
+        for size, image in images.items():
+            scaled = watermark.scaled(size[0] / float(source_size[0]))
+            rendered[size] = self.image_processor.apply_watermark(image, scaled)
+        return rendered
+
+    def render(self, path, settings):
+        """Returns ({output_size: watermarked image}, source_size) covering every rendition."""
+        images, source_size = self.decode(path)
+        return self.apply_watermark(images, settings, source_size), source_size
+
+    def write(self, path, rendered, source_size, output_dir, commits=None):
+        """
+        Encodes every rendition of `path` from the watermarked images; returns the written paths.
+        With a writer, the files are committed in the background: their futures are added to
+        `commits` if given, otherwise write() waits for them.
+        """
+        flattened = {}
+        written = []
+        # Futures go straight into `commits`, so files already handed to the writer are
+        # still waited for when a later rendition fails to encode
+        futures = [] if commits is None else commits
+        try:
+            for profile in self.profiles:
+                size = self.output_size(profile, source_size)
+                image = rendered[size]
+                if profile.fmt == 'JPEG':
+                    # JPEG renditions of the same size share one flattened RGB copy
+                    if size not in flattened:
+                        flattened[size] = self.image_processor.flatten_alpha(image)
+                    image = flattened[size]
+                output_path = os.path.join(output_dir, profile.output_name(path))
+                if profile.subfolder:
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                data = self.image_processor.encode_to_bytes(image, profile.fmt, profile.quality,
+                                                            profile.encoder.get(profile.fmt))
+                if self.writer is None:
+                    atomic_write(output_path, data, self.fsync)
+                else:
+                    futures.append(self.writer.submit(output_path, data))
+                written.append(output_path)
+        finally:
+            if commits is None:
+                for future in futures:
+                    future.exception()  # wait, without masking an error raised above
+        if commits is None:
+            for future in futures:
+                future.result()
+        return written
+
+    def export_file(self, path, settings, output_dir, commits=None):
+        """Exports every rendition of one image into output_dir; returns the written paths, raises on failure."""
+        with self.profiler.stage("export: decode", path):
+            images, source_size = self.decode(path)
+        with self.profiler.stage("export: watermark", path):
+            rendered = self.apply_watermark(images, settings, source_size)
+        del images
+        with self.profiler.stage("export: encode", path):
+            return self.write(path, rendered, source_size, output_dir, commits)
+
+    def export_all(self, paths, default_settings, output_dir, states=None, progress=None, on_result=None):
+        """
+        Exports every path and returns (written_paths, failures), where failures
+        is a list of (source_path, error message).
+        `states` maps paths to per-image settings; other paths use `default_settings`.
+        `progress(done, total, path)` is called after each image, and
+        `on_result(path, written_paths, exception or None)` when it is finished.
+        """
+        states = states or {}
+        written = []
+        failures = []
+        total = len(paths)
+        in_flight = deque()  # (path, files, commit futures, error), in submission order
+        done_count = 0
+
+        def finish(path, files, commits, error):
+            nonlocal done_count
+            for future in commits:
+                try:
+                    future.result()
+                except Exception as e:
+                    error = error or e
+            if error is not None:
+                print(f"Error exporting {path}: {error}")
+                failures.append((path, str(error) or error.__class__.__name__))
+                files = []
+            written.extend(files)
+            done_count += 1
+            if on_result is not None:
+                on_result(path, files, error)
+            if progress is not None:
+                progress(done_count, total, path)
+
+        if self.prefetch_bytes:
+            self._prefetcher = Prefetcher(paths, self.prefetch_bytes)
+        try:
+            for path in paths:
+                commits = []
+                try:
+                    files = self.export_file(path, states.get(path) or default_settings, output_dir, commits)
+                    in_flight.append((path, files, commits, None))
+                except Exception as e:
+                    in_flight.append((path, [], commits, e))
+                # Report images whose files have been committed; the rest stay queued behind the writer
+                while in_flight and all(future.done() for future in in_flight[0][2]):
+                    finish(*in_flight.popleft())
+        finally:
+            if self._prefetcher is not None:
+                self._prefetcher.stop()
+                self._prefetcher = None
+        while in_flight:
+            finish(*in_flight.popleft())
+        return written, failures
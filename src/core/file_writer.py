@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import stat
+import tempfile
+import threading
+
+
+def _current_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Read once at import: os.umask() can only be queried by setting it, which
+# would race with the writer threads
+_UMASK = _current_umask()
+
+
+def atomic_write(path, data, fsync=False):
+    """
+    Writes `data` to a temporary file next to `path` and renames it into place,
+    so `path` is either the old file or the complete new one, never a partial
+    write. With fsync the data (and, on POSIX, the rename) is flushed to disk.
+    The file keeps the mode of the one it replaces; a new file gets the usual
+    0666 less umask rather than the owner-only mode of temporary files.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync and hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class WriteBehindWriter:
+    """
+    Write-behind I/O stage for encoded files.
+
+    Encoders hand over complete files as bytes; dedicated I/O threads commit
+    them with atomic_write while encoding continues. The queue is bounded by
+    `max_pending_bytes`: submit() only blocks when that much output is still
+    waiting for slow storage (e.g. a network share), which keeps memory in
+    check without tying encode throughput to write latency.
+    """
+
+    def __init__(self, threads=2, max_pending_bytes=256 * 1024 * 1024, fsync=False):
+        self.max_pending_bytes = max_pending_bytes
+        self.fsync = fsync
+        self._executor = ThreadPoolExecutor(max(1, threads), thread_name_prefix='pw-writer')
+        self._cond = threading.Condition()
+        self._pending_bytes = 0
+
+    def submit(self, path, data):
+        """Queues `data` to be written to `path`; returns a Future that raises if the write failed."""
+        size = len(data)
+        with self._cond:
+            # A file larger than the whole budget still goes through once the queue is empty
+            while self._pending_bytes and self._pending_bytes + size > self.max_pending_bytes:
+                self._cond.wait()
+            self._pending_bytes += size
+        try:
+            return self._executor.submit(self._write, path, data)
+        except Exception:
+            self._release(size)
+            raise
+
+    def _write(self, path, data):
+        try:
+            atomic_write(path, data, self.fsync)
+            return path
+        finally:
+            self._release(len(data))
+
+    def _release(self, size):
+        with self._cond:
+            self._pending_bytes -= size
+            self._cond.notify_all()
+
+    @property
+    def pending_bytes(self):
+        return self._pending_bytes
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,274 @@
+from collections import namedtuple
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from PIL import Image, ImageChops, ImageDraw, ImageStat
+import PIL
+
+from core.image_processor import ImageProcessor, OUTPUT_FORMATS
+from core.watermark import Watermark
+
+GOLDEN_MANIFEST = 'golden.json'
+
+# Default minimum PSNR (dB) between an output and its golden image. Identical
+# renders are infinite; a watermark shifted by a pixel or a changed encoder
+# setting drops well below this.
+DEFAULT_TOLERANCE = 45.0
+
+# Largest per-channel difference allowed in any pixel. A small watermark
+# moved by one pixel barely changes the PSNR of the whole frame but leaves
+# differences far above this; rounding changes in blending stay below it.
+DEFAULT_MAX_PIXEL_DIFF = 16
+
+ANCHORS = ('top-left', 'top-center', 'top-right', 'mid-left', 'mid-center', 'mid-right',
+           'bottom-left', 'bottom-center', 'bottom-right')
+
+LATIN_TEXT = "Photo Watermark 2.0"
+CJK_TEXT = "水印测试 © 2024"
+
+
+class GoldenCase(namedtuple('GoldenCase', ['name', 'settings', 'mode', 'size', 'scale', 'fmt'])):
+    """
+    One deterministic render: watermark `settings` on the synthetic source in
+    `mode` and `size`, scaled like an export rendition, optionally encoded to
+    `fmt` and decoded again.
+    """
+
+    __slots__ = ()
+
+
+class GoldenResult(namedtuple('GoldenResult', ['case', 'status', 'psnr', 'max_diff', 'ms', 'baseline_ms'])):
+    """Outcome of one case: status is 'ok', 'fail', 'new' (no golden yet) or 'updated'."""
+
+    __slots__ = ()
+
+    @property
+    def slowdown(self):
+        return self.ms / self.baseline_ms if self.baseline_ms else None
+
+
+def _case(name, mode='RGB', size=(640, 427), scale=1.0, fmt=None, **settings):
+    base = {'text': LATIN_TEXT, 'font_size': 28, 'color': [255, 255, 255], 'opacity': 60,
+            'position_mode': 'bottom-right', 'offset_x': 0, 'offset_y': 0}
+    base.update(settings)
+    return GoldenCase(name, base, mode, size, scale, fmt)
+
+
+def golden_cases(logo_path=None):
+    """The corpus: every position mode, offsets, opacities, colors, scripts, effects, input modes and encoders."""
+    cases = [_case(f"anchor-{anchor}", position_mode=anchor) for anchor in ANCHORS]
+    cases += [
+        _case("anchor-offset", offset_x=-15, offset_y=-10),
+        _case("manual", position_mode='manual', offset_x=37, offset_y=51),
+        _case("manual-clipped", position_mode='manual', offset_x=560, offset_y=400),
+    ]
+    for x, y in ((0.0, 0.0), (0.5, 0.5), (1.0, 1.0), (0.25, 0.8)):
+        cases.append(_case(f"relative-{x:g}-{y:g}", position_mode='relative', offset_x=x, offset_y=y))
+    cases += [
+        _case("tiled", position_mode='tiled'),
+        _case("tiled-flat", position_mode='tiled', tile_angle=0, tile_spacing_x=40, tile_spacing_y=30, tile_stagger=0),
+        _case("tiled-origin", position_mode='tiled', offset_x=25, offset_y=-12),
+    ]
+    cases += [_case(f"opacity-{opacity}", opacity=opacity) for opacity in (0, 25, 100)]
+    cases += [
+        _case("color-red", color=[255, 0, 0], opacity=100),
+        _case("color-black", color=[0, 0, 0], opacity=80),
+        _case("color-teal", color=[12, 200, 180], opacity=50),
+        _case("text-cjk", text=CJK_TEXT, position_mode='mid-center'),
+        _case("text-mixed", text="Photo 水印 123", position_mode='top-left', font_size=36),
+        _case("font-auto", font_size_auto=True),
+        _case("rotation", rotation=45, position_mode='mid-center'),
+        _case("stroke", stroke_width=2, stroke_color=[0, 0, 0], opacity=100),
+        _case("shadow", shadow=True, shadow_blur=3, shadow_offset_x=4, shadow_offset_y=4),
+        _case("portrait", size=(427, 640), position_mode='bottom-center'),
+        _case("scaled-half", scale=0.5),
+        _case("scaled-tiled", scale=0.5, position_mode='tiled'),
+    ]
+    cases += [_case(f"mode-{mode}", mode=mode) for mode in ('RGBA', 'L', 'LA', 'P', 'CMYK')]
+    if logo_path:
+        cases += [
+            _case("logo", watermark_type='image', image_path=logo_path, image_scale=0.25),
+            _case("logo-tiled", watermark_type='image', image_path=logo_path, image_scale=0.1, position_mode='tiled'),
+        ]
+    cases += [_case(f"encode-{fmt.lower()}", fmt=fmt) for fmt in OUTPUT_FORMATS]
+    return cases
+
+
+def source_image(mode='RGB', size=(640, 427)):
+    """A deterministic photo-like source (gradients plus hard edges) in the given mode."""
+    width, height = size
+    horizontal = Image.linear_gradient('L').rotate(90).resize(size)
+    vertical = Image.linear_gradient('L').resize(size)
+    radial = Image.radial_gradient('L').resize(size)
+    img = Image.merge('RGB', (horizontal, vertical, radial))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, width, 64):
+        draw.rectangle((i, height // 3, i + 31, height // 3 + 40), fill=(240, 240, 240))
+        draw.rectangle((i + 32, height // 3, i + 63, height // 3 + 40), fill=(16, 16, 16))
+    if mode == 'RGBA' or mode == 'LA':
+        img = img.convert(mode)
+        img.putalpha(radial.point(lambda v: 255 - v // 2))
+        return img
+    if mode == 'P':
+        return img.quantize(64)
+    return img.convert(mode)
+
+
+def logo_image(size=(200, 120)):
+    """A deterministic RGBA logo with transparent surroundings."""
+    logo = Image.new('RGBA', size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(logo)
+    draw.ellipse((4, 4, size[1] - 4, size[1] - 4), fill=(220, 40, 40, 255))
+    draw.rectangle((size[1], 20, size[0] - 4, size[1] - 20), fill=(40, 90, 220, 200))
+    return logo
+
+
+def psnr(actual, expected):
+    """Returns (PSNR in dB, largest per-channel difference); PSNR is inf for identical images."""
+    if actual.size != expected.size:
+        return 0.0, 255
+    mode = 'RGBA' if 'A' in actual.getbands() + expected.getbands() else 'RGB'
+    diff = ImageChops.difference(actual.convert(mode), expected.convert(mode))
+    stat = ImageStat.Stat(diff)
+    max_diff = max(high for _low, high in diff.getextrema())
+    mse = sum(stat.sum2) / (stat.count[0] * len(stat.count))
+    if mse == 0:
+        return float('inf'), 0
+    return 10 * math.log10(255.0 ** 2 / mse), max_diff
+
+
+class GoldenHarness:
+    """
+    Renders the golden corpus and compares each output with the image stored
+    for it in `golden_dir`, together with its render time.
+
+    Goldens depend on the fonts found on the machine, so a baseline is made
+    with update=True on the code before a change; running again afterwards
+    checks correctness (PSNR against `tolerance`, plus no pixel differing by
+    more than `max_pixel_diff`) and speed (time relative to
+    the baseline) of the changed code in one pass. Timings are the best of
+    `repeat` warm runs: apply_watermark plus encode/decode for encoder cases.
+    """
+
+    def __init__(self, golden_dir, tolerance=DEFAULT_TOLERANCE, max_pixel_diff=DEFAULT_MAX_PIXEL_DIFF,
+                 repeat=3, image_processor=None):
+        self.golden_dir = golden_dir
+        self.tolerance = tolerance
+        self.max_pixel_diff = max_pixel_diff
+        self.repeat = max(1, int(repeat))
+        self.image_processor = image_processor or ImageProcessor()
+
+    def prepare(self, case):
+        """Returns the (source image, watermark) of a case, built outside the timed part."""
+        img = source_image(case.mode, case.size)
+        watermark = Watermark.from_settings(case.settings, img.size)
+        if case.scale != 1.0:
+            img = img.resize((max(1, round(img.width * case.scale)), max(1, round(img.height * case.scale))),
+                             Image.LANCZOS)
+            watermark = watermark.scaled(case.scale)
+        return img, watermark
+
+    def render(self, case, img, watermark):
+        """Renders one case; returns the output image (decoded again for encoder cases)."""
+        output = self.image_processor.apply_watermark(img, watermark)
+        if case.fmt:
+            data = self.image_processor.encode_to_bytes(output, case.fmt, 90)
+            output = Image.open(io.BytesIO(data))
+            output.load()
+        return output
+
+    def time_case(self, case, img, watermark):
+        best = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            self.render(case, img, watermark)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000.0
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.golden_dir, GOLDEN_MANIFEST), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def run(self, update=False, name_filter=None, diff_dir=None):
+        """Runs the corpus (cases whose name contains `name_filter`); returns (results, manifest)."""
+        os.makedirs(self.golden_dir, exist_ok=True)
+        manifest = self.load_manifest()
+        font = self.image_processor.get_font(28)
+        font_path = getattr(font, 'path', None)
+        if not isinstance(font_path, str):
+            font_path = None  # PIL's built-in default font
+        if manifest and manifest.get('font') != font_path and not update:
+            print(f"Warning: goldens were made with font {manifest.get('font')}, now using {font_path}")
+        timings = manifest.get('cases', {})
+        logo_dir = tempfile.mkdtemp(prefix='pw-golden-')
+        results = []
+        try:
+            logo_path = os.path.join(logo_dir, 'logo.png')
+            logo_image().save(logo_path)
+            for case in golden_cases(logo_path):
+                if name_filter and name_filter not in case.name:
+                    continue
+                results.append(self.run_case(case, update, timings, diff_dir))
+        finally:
+            shutil.rmtree(logo_dir, ignore_errors=True)
+        if update:
+            manifest = {'font': font_path, 'pillow': PIL.__version__, 'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                        'cases': timings}
+            with open(os.path.join(self.golden_dir, GOLDEN_MANIFEST), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+        return results, manifest
+
+    def run_case(self, case, update, timings, diff_dir=None):
+        golden_path = os.path.join(self.golden_dir, case.name + '.png')
+        img, watermark = self.prepare(case)
+        output = self.render(case, img, watermark)
+        ms = self.time_case(case, img, watermark)
+        baseline = timings.get(case.name, {}).get('ms')
+        if update:
+            output.save(golden_path)
+            timings[case.name] = {'ms': round(ms, 3), 'size': list(output.size)}
+            return GoldenResult(case, 'updated', None, None, ms, baseline)
+        try:
+            with Image.open(golden_path) as golden:
+                golden.load()
+        except FileNotFoundError:
+            return GoldenResult(case, 'new', None, None, ms, baseline)
+        value, max_diff = psnr(output, golden)
+        status = 'ok' if value >= self.tolerance and max_diff <= self.max_pixel_diff else 'fail'
+        if status == 'fail' and diff_dir:
+            os.makedirs(diff_dir, exist_ok=True)
+            output.save(os.path.join(diff_dir, case.name + '.png'))
+            diff = ImageChops.difference(output.convert('RGB'), golden.convert('RGB')) if output.size == golden.size else None
+            if diff is not None:
+                # Amplified so that off-by-a-few differences are visible
+                diff.point(lambda v: min(255, v * 8)).save(os.path.join(diff_dir, case.name + '.diff.png'))
+        return GoldenResult(case, status, value, max_diff, ms, baseline)
+
+    @staticmethod
+    def format_report(results, max_slowdown=None):
+        """Returns the results as a text table; slower than `max_slowdown` times the baseline is flagged."""
+        if not results:
+            return "No golden cases matched."
+        width = max(len(r.case.name) for r in results)
+        lines = [f"{'Case':<{width}}  {'status':>7}  {'PSNR':>7}  {'maxdiff':>7}  {'ms':>8}  {'base ms':>8}  {'time':>6}"]
+        for r in results:
+            value = '' if r.psnr is None else ('inf' if math.isinf(r.psnr) else f"{r.psnr:.1f}")
+            max_diff = '' if r.max_diff is None else str(r.max_diff)
+            base = '' if r.baseline_ms is None else f"{r.baseline_ms:.2f}"
+            ratio = '' if r.slowdown is None else f"{r.slowdown:.2f}x"
+            flag = ' slow' if max_slowdown and r.slowdown and r.slowdown > max_slowdown else ''
+            lines.append(f"{r.case.name:<{width}}  {r.status:>7}  {value:>7}  {max_diff:>7}  {r.ms:>8.2f}  {base:>8}  {ratio:>6}{flag}")
+        timed = [r for r in results if r.baseline_ms]
+        if timed:
+            total = sum(r.ms for r in timed) / sum(r.baseline_ms for r in timed)
+            lines.append(f"Total time vs baseline: {total:.2f}x over {len(timed)} case(s)")
+        return "\n".join(lines)
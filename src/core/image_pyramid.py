@@ -0,0 +1,103 @@
+import threading
+
+from PIL import Image
+
+
+class ImagePyramid:
+    """
+    Successive half-resolution levels of an image for zoomable previews.
+
+    Level 0 is the full-resolution image; smaller levels are built lazily on a
+    background thread. Rendering always uses the smallest level that still has
+    enough resolution for the requested scale, falling back to larger levels
+    while the smaller ones are being built.
+
+    The base region of the last rendered viewport is kept, so re-rendering
+    the same view with a different watermark (e.g. while a slider moves)
+    only composites the watermark again.
+    """
+
+    def __init__(self, image, min_size=256, background=True):
+        if image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA')
+        image.load()
+        self.size = image.size
+        self.min_size = min_size
+        self._levels = [image]
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._view = None  # (view key, resample or None for a draft, base region) of the last render
+        if background:
+            self._thread = threading.Thread(target=self._build_levels, daemon=True)
+            self._thread.start()
+        else:
+            self._thread = None
+            self._build_levels()
+
+    def _build_levels(self):
+        level = self._levels[0]
+        while not self._cancelled and min(level.size) // 2 >= self.min_size:
+            level = level.reduce(2)
+            with self._lock:
+                self._levels.append(level)
+
+    def cancel(self):
+        """Stops building further levels (e.g. when another image is selected)."""
+        self._cancelled = True
+
+    @property
+    def levels(self):
+        with self._lock:
+            return list(self._levels)
+
+    def level_for_scale(self, scale):
+        """Returns (level_image, level_scale) of the smallest built level with level_scale >= scale."""
+        full_w = self.size[0]
+        best = self._levels[0]
+        for level in self.levels:
+            if level.width / full_w >= scale:
+                best = level
+            else:
+                break
+        return best, best.width / full_w
+
+    def render_viewport(self, box, scale, image_processor=None, watermark=None,
+                        resample=Image.Resampling.LANCZOS, draft=False):
+        """
+        Renders the part of the image inside `box` (full-resolution coordinates) at
+        `scale` output pixels per source pixel, with the watermark composited into
+        just that region.
+
+        A draft render samples a level of half the needed resolution with nearest
+        neighbour, for immediate feedback while the user interacts; it reuses a
+        full-quality base of the same view when one is cached.
+        """
+        left, top, right, bottom = box
+        out_size = (max(1, int(round((right - left) * scale))), max(1, int(round((bottom - top) * scale))))
+        key = (tuple(box), scale, out_size)
+        region = self._cached_view(key, None if draft else resample)
+        if region is None:
+            if draft:
+                level, level_scale = self.level_for_scale(scale / 2)
+                resample = Image.Resampling.NEAREST
+            else:
+                level, level_scale = self.level_for_scale(scale)
+            level_box = (left * level_scale, top * level_scale, right * level_scale, bottom * level_scale)
+            region = level.resize(out_size, resample, box=level_box)
+            if region.mode != 'RGBA':
+                region = region.convert('RGBA')
+            self._view = (key, None if draft else resample, region)
+        # Hand out a copy so the cached base stays clean
+        region = region.copy()
+        if image_processor is not None and watermark is not None:
+            region = image_processor.composite_watermark_region(
+                region, box, scale, watermark, self.size,
+                resample=Image.Resampling.NEAREST if draft else resample)
+        return region
+
+    def _cached_view(self, key, resample):
+        view = self._view
+        if view is None or view[0] != key:
+            return None
+        # Any base will do for a draft; a full-quality render needs one made with its filter
+        return view[2] if resample is None or view[1] == resample else None
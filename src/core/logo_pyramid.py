@@ -0,0 +1,57 @@
+from PIL import Image
+
+from core.cache import LRUCache
+
+
+class LogoPyramid:
+    """
+    Pre-scaled versions of a logo with its opacity already applied.
+
+    Levels are stored premultiplied ('RGBa') at successive halvings of the
+    original, so scaling the logo for a photo only resamples from the nearest
+    larger level instead of the full-size original.
+    """
+
+    MIN_LEVEL_SIZE = 16
+
+    def __init__(self, path, alpha=255):
+        with Image.open(path) as src:
+            logo = src.convert('RGBA')
+        if alpha < 255:
+            r, g, b, a = logo.split()
+            a = a.point(lambda v: v * alpha // 255)
+            logo = Image.merge('RGBA', (r, g, b, a))
+        level = logo.convert('RGBa')
+        self.levels = [level]
+        while min(level.size) >= self.MIN_LEVEL_SIZE * 2:
+            level = level.reduce(2)
+            self.levels.append(level)
+        self._scaled = LRUCache(max_entries=16)
+
+    @property
+    def size(self):
+        return self.levels[0].size
+
+    def scaled_size(self, width):
+        """Returns the (width, height) of the logo scaled to the given width."""
+        orig_w, orig_h = self.size
+        width = max(1, int(round(width)))
+        return (width, max(1, int(round(orig_h * width / orig_w))))
+
+    def get(self, width):
+        """Returns the logo as an RGBA sprite scaled to the given width."""
+        target = self.scaled_size(width)
+        sprite = self._scaled.get(target)
+        if sprite is None:
+            # Smallest level that is still at least as large as the target
+            source = self.levels[0]
+            for level in self.levels:
+                if level.width >= target[0] and level.height >= target[1]:
+                    source = level
+                else:
+                    break
+            if source.size != target:
+                source = source.resize(target, Image.Resampling.LANCZOS)
+            sprite = source.convert('RGBA')
+            self._scaled.put(target, sprite)
+        return sprite
@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import os
+
+from core.exporter import BatchExporter
+from core.image_processor import ImageProcessor
+from core.prefetch import Prefetcher
+from core.scheduler import SizeAwareScheduler
+from core.shared_frames import SlabPool, SlabView
+
+# Per-process state of a pipeline worker, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(slab_names, profiles, fsync):
+    processor = ImageProcessor()
+    _worker['exporter'] = BatchExporter(processor, profiles, fsync=fsync)
+    _worker['slabs'] = SlabView(slab_names)
+
+
+def _decode_task(path, slab):
+    """Decode stage: decodes every output size of `path` into `slab`; returns (frame refs, source_size)."""
+    images, source_size = _worker['exporter'].decode(path)
+    sizes = list(images)
+    refs = _worker['slabs'].write_frames(slab, [images[size] for size in sizes])
+    return refs, source_size
+
+
+def _render_task(path, settings, refs, source_size, output_dir):
+    """
+    Composite and encode stage: reads the decoded frames zero-copy from shared memory,
+    watermarks them into new images (the slab frames stay read-only) and writes the files.
+    """
+    exporter = _worker['exporter']
+    slabs = _worker['slabs']
+    images = {ref.size: slabs.read_frame(ref) for ref in refs}
+    rendered = exporter.apply_watermark(images, settings, source_size)
+    del images
+    return exporter.write(path, rendered, source_size, output_dir)
+
+
+def _export_task(path, settings, output_dir):
+    """Whole export in one worker, for images whose frames do not fit a slab."""
+    return _worker['exporter'].export_file(path, settings, output_dir)
+
+
+class ProcessExporter(BatchExporter):
+    """
+    Exports across worker processes in two stages: decode, then watermark
+    and encode.
+
+    Decoded frames are handed between the stages through a SlabPool of
+    shared-memory segments and wrapped zero-copy with Image.frombuffer on
+    the receiving side, so only small FrameRefs are pickled. A slab stays
+    with an image from decode until its files are written, which bounds the
+    number of images in flight (and the shared memory used) by slab_count.
+    Workers commit their files atomically themselves; with several processes
+    encoding, storage latency already overlaps with CPU work. Source reads
+    are prefetched into the OS file cache (Prefetcher in 'advise' mode),
+    since the decoding happens in the workers.
+
+    Images are started largest first by their estimated cost (see
+    SizeAwareScheduler), each as soon as a worker frees up, within
+    `memory_budget`. Images whose frames exceed `max_slab_bytes` skip the
+    slabs and are exported within a single worker.
+    """
+
+    def __init__(self, image_processor, options=None, workers=None, slab_count=None,
+                 max_slab_bytes=512 * 1024 * 1024, fsync=False, prefetch_bytes=0, memory_budget=None):
+        super().__init__(image_processor, options, fsync=fsync, prefetch_bytes=prefetch_bytes)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.slab_count = max(1, slab_count or self.workers + 1)
+        self.max_slab_bytes = max_slab_bytes
+        self.memory_budget = memory_budget
+
+    def export_all(self, paths, default_settings, output_dir, states=None, progress=None, on_result=None):
+        states = states or {}
+        written = []
+        failures = []
+        total = len(paths)
+        items = SizeAwareScheduler.estimate(paths, self.image_processor, self.profiles)
+        # Slabs are sized for the largest image that may use one
+        slab_size = min(self.max_slab_bytes, max((item.frame_bytes for item in items), default=0))
+        if not paths or not slab_size:
+            return super().export_all(paths, default_settings, output_dir, states, progress, on_result)
+
+        scheduler = SizeAwareScheduler(items, self.memory_budget)
+        done_count = 0
+        prefetcher = None
+        if self.prefetch_bytes:
+            order = [item.path for item in sorted(items, key=lambda item: -item.cost_ms)]
+            prefetcher = Prefetcher(order, self.prefetch_bytes, mode='advise')
+        try:
+            with SlabPool(self.slab_count, slab_size) as pool, \
+                    ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                        initargs=(pool.names, self.profiles, self.fsync)) as executor:
+                running = {}  # future -> (stage, work item, slab)
+                while len(scheduler) or running:
+                    # Every image in flight holds at most one slab, so a slab is free for each start
+                    while scheduler.in_flight < self.slab_count:
+                        item = scheduler.take()
+                        if item is None:
+                            break
+                        path = item.path
+                        if prefetcher is not None:
+                            prefetcher.take(path)
+                        if item.frame_bytes > slab_size:
+                            settings = states.get(path) or default_settings
+                            running[executor.submit(_export_task, path, settings, output_dir)] = ('export', item, None)
+                            continue
+                        slab = pool.acquire()
+                        running[executor.submit(_decode_task, path, slab)] = ('decode', item, slab)
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        stage, item, slab = running.pop(future)
+                        path = item.path
+                        settings = states.get(path) or default_settings
+                        error = None
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            print(f"Error exporting {path}: {e}")
+                            failures.append((path, str(e) or e.__class__.__name__))
+                            result, error = None, e
+                        if stage == 'decode' and result is not None:
+                            refs, source_size = result
+                            if refs is not None:
+                                future = executor.submit(_render_task, path, settings, refs, source_size, output_dir)
+                                running[future] = ('render', item, slab)
+                                continue
+                            # Larger than its header suggested: export it within a single worker instead
+                            running[executor.submit(_export_task, path, settings, output_dir)] = ('export', item, None)
+                        elif result is not None:
+                            written.extend(result)
+                        if slab is not None:
+                            pool.release(slab)
+                        if stage != 'decode' or result is None:
+                            scheduler.done(item)
+                            done_count += 1
+                            if on_result is not None:
+                                on_result(path, result or [], error)
+                            if progress is not None:
+                                progress(done_count, total, path)
+        finally:
+            if prefetcher is not None:
+                prefetcher.stop()
+        return written, failures
\ No newline at end of file
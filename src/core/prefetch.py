@@ -0,0 +1,114 @@
+import os
+import threading
+
+PREFETCH_MODES = ('read', 'advise')
+_READ_CHUNK = 1024 * 1024
+
+
+class Prefetcher:
+    """
+    Reads the source files of a batch ahead of the consumer on background
+    threads, so decoding finds its input ready instead of waiting for slow
+    (e.g. network) storage.
+
+    Files are fetched in batch order while fewer than `max_bytes` are
+    buffered (always at least one file ahead). take(path) hands a file over
+    and frees its share of the budget.
+
+    mode='read' keeps the bytes in memory and take() returns them.
+    mode='advise' only asks the kernel to read the files into its page cache
+    (posix_fadvise WILLNEED, or reading and discarding where that is not
+    available) and take() returns None; this suits consumers in other
+    processes, which then open the files from cache.
+    """
+
+    def __init__(self, paths, max_bytes=128 * 1024 * 1024, threads=2, mode='read'):
+        if mode not in PREFETCH_MODES:
+            raise ValueError(f"Unknown prefetch mode: {mode}")
+        self.paths = list(paths)
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._cond = threading.Condition()
+        self._next = 0           # index of the next path to fetch
+        self._used = 0           # bytes fetched but not taken yet
+        self._fetching = set()
+        self._ready = {}         # path -> (bytes or None, size)
+        self._taken = set()      # paths the consumer got to before the prefetcher
+        self._stopped = False
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(max(1, threads))]
+        for thread in self._threads:
+            thread.start()
+
+    def take(self, path):
+        """
+        Returns the prefetched bytes of `path` (mode 'read'), waiting if it is
+        being read right now; returns None if it was not prefetched, failed,
+        or the mode is 'advise'. The caller then opens the file itself.
+        """
+        with self._cond:
+            while path in self._fetching:
+                self._cond.wait()
+            entry = self._ready.pop(path, None)
+            if entry is None:
+                self._taken.add(path)
+                return None
+            data, size = entry
+            self._used -= size
+            self._cond.notify_all()
+            return data
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._ready.clear()
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and self._next < len(self.paths) and \
+                        self._used and self._used >= self.max_bytes:
+                    self._cond.wait()
+                if self._stopped or self._next >= len(self.paths):
+                    return
+                path = self.paths[self._next]
+                self._next += 1
+                if path in self._taken or path in self._ready or path in self._fetching:
+                    continue
+                self._fetching.add(path)
+            data, size = self._fetch(path)
+            with self._cond:
+                self._fetching.discard(path)
+                if size and not self._stopped and path not in self._taken:
+                    self._ready[path] = (data, size)
+                    self._used += size
+                self._cond.notify_all()
+
+    def _fetch(self, path):
+        """Returns (bytes or None, bytes counted against the budget); failures are left to the consumer."""
+        try:
+            if self.mode == 'read':
+                with open(path, 'rb') as f:
+                    data = f.read()
+                return data, len(data)
+            size = os.path.getsize(path)
+            if hasattr(os, 'posix_fadvise'):
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            else:
+                # No readahead hint on this platform: a plain read fills the OS file cache
+                with open(path, 'rb') as f:
+                    while f.read(_READ_CHUNK):
+                        pass
+            return None, size
+        except OSError:
+            return None, 0
\ No newline at end of file
@@ -0,0 +1,302 @@
+import io
+import os
+import struct
+import time
+
+from PIL import Image
+
+from core.exporter import ExportOptions
+from core.watermark import Watermark
+
+# Calibrated per-megapixel costs. Decode costs depend on the source format,
+# encode costs and output sizes on the export format.
+DEFAULT_COST_MODEL = {
+    'decode_ms_per_mp': {'JPEG': 12.0, 'PNG': 30.0, 'BMP': 3.0, 'TIFF': 8.0, 'default': 20.0},
+    'watermark_ms_per_mp': 10.0,
+    'encode_ms_per_mp': {'JPEG': 14.0, 'PNG': 35.0, 'WEBP': 45.0, 'default': 40.0},
+    # JPEG output bytes per megapixel, keyed by quality (interpolated in between)
+    'jpeg_bytes_per_mp': {50: 120000, 75: 200000, 85: 280000, 90: 360000, 95: 520000, 100: 1200000},
+    # Lossy WebP output bytes per megapixel, keyed by quality
+    'webp_bytes_per_mp': {50: 80000, 75: 130000, 85: 180000, 90: 230000, 95: 330000, 100: 700000},
+    # Lossless output (PNG, lossless WebP) does not depend on quality
+    'png_bytes_per_mp': 2400000,
+    'webp_lossless_bytes_per_mp': 1800000,
+}
+
+# JPEG start-of-frame markers (SOF0-SOF15 minus DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_JPEG_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+
+def _read_jpeg_header(f):
+    """Scans JPEG markers up to the frame header; returns (size, mode) or None."""
+    if f.read(2) != b'\xff\xd8':
+        return None
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) != 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in _JPEG_SOF_MARKERS:
+            frame = f.read(6)
+            if len(frame) != 6:
+                return None
+            _precision, height, width, components = struct.unpack('>BHHB', frame)
+            mode = _JPEG_MODES.get(components)
+            if mode is None or not width or not height:
+                return None
+            return (width, height), mode
+        if marker == 0xD9 or marker == 0xDA:
+            return None
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+class PreflightItem:
+    """The planned export of a single source image."""
+
+    __slots__ = ('path', 'size', 'mode', 'format', 'output_size', 'font_size', 'position',
+                 'layout_size', 'clipped', 'output_name', 'error')
+
+    def __init__(self, path):
+        self.path = path
+        self.size = None
+        self.mode = None
+        self.format = None
+        self.output_size = None
+        self.font_size = None
+        self.position = None
+        self.layout_size = None
+        self.clipped = False  # watermark extends past the output edges
+        self.output_name = None
+        self.error = None
+
+    @property
+    def megapixels(self):
+        if not self.size:
+            return 0.0
+        return self.size[0] * self.size[1] / 1000000.0
+
+
+class PreflightReport:
+    """Aggregated result of a pre-flight run."""
+
+    def __init__(self, items, collisions, cpu_seconds, peak_memory_bytes, output_bytes, elapsed):
+        self.items = items
+        self.collisions = collisions  # output name -> [source paths]
+        self.cpu_seconds = cpu_seconds
+        self.peak_memory_bytes = peak_memory_bytes
+        self.output_bytes = output_bytes
+        self.elapsed = elapsed
+
+    @property
+    def failures(self):
+        return [item for item in self.items if item.error]
+
+    @property
+    def clipped(self):
+        return [item for item in self.items if item.clipped]
+
+    @property
+    def has_problems(self):
+        return bool(self.collisions or self.failures)
+
+    def summary(self):
+        """Returns a human readable summary of the plan."""
+        ok_count = len(self.items) - len(self.failures)
+        lines = [
+            f"Images: {ok_count} readable, {len(self.failures)} unreadable",
+            f"Estimated CPU time: {self.cpu_seconds:.1f} s",
+            f"Estimated peak memory: {self.peak_memory_bytes / (1024 * 1024):.0f} MB",
+            f"Estimated output size: {self.output_bytes / (1024 * 1024):.1f} MB",
+        ]
+        if self.collisions:
+            lines.append(f"Output name collisions: {len(self.collisions)}")
+            for name, paths in list(self.collisions.items())[:5]:
+                lines.append(f"  {name} <- " + ", ".join(paths))
+            if len(self.collisions) > 5:
+                lines.append(f"  ... and {len(self.collisions) - 5} more")
+        clipped = self.clipped
+        if clipped:
+            lines.append(f"Watermark clipped at the image edge: {len(clipped)}")
+            for item in clipped[:5]:
+                lines.append(f"  {item.path}")
+            if len(clipped) > 5:
+                lines.append(f"  ... and {len(clipped) - 5} more")
+        for item in self.failures[:5]:
+            lines.append(f"Unreadable: {item.path} ({item.error})")
+        if len(self.failures) > 5:
+            lines.append(f"  ... and {len(self.failures) - 5} more")
+        return "\n".join(lines)
+
+
+class PreflightPlanner:
+    """
+    Plans a batch export from image headers only.
+
+    Each file is opened lazily so only its header (dimensions, mode, format) is
+    read; pixel data is never decoded.
+    """
+
+    def __init__(self, image_processor, cost_model=None):
+        self.image_processor = image_processor
+        self.cost_model = dict(DEFAULT_COST_MODEL)
+        if cost_model:
+            self.cost_model.update(cost_model)
+
+    def read_header(self, path):
+        """Returns (size, mode, format) of an image without decoding it."""
+        if path.lower().endswith(('.jpg', '.jpeg')):
+            # Fast path: only walk the JPEG marker segments up to the frame header
+            with open(path, 'rb') as f:
+                header = _read_jpeg_header(f)
+            if header is not None:
+                return header[0], header[1], 'JPEG'
+        with Image.open(path) as img:
+            return img.size, img.mode, img.format
+
+    def plan(self, paths, default_settings, states=None, naming_rule='original',
+             prefix='', suffix='', fmt='JPEG', quality=95, resize_mode='none', resize_value=None,
+             profiles=None):
+        """
+        Resolves the watermark layout and output name of every path and
+        estimates the cost of exporting them.
+        `states` maps paths to per-image settings; other paths use `default_settings`.
+        `profiles` is a list of ExportOptions renditions; without it a single
+        rendition is built from the naming/format/size arguments. Layouts and
+        output costs are computed at the resized export size of the first rendition.
+        """
+        start = time.perf_counter()
+        states = states or {}
+        if not profiles:
+            profiles = [ExportOptions(fmt, quality, naming_rule, prefix, suffix, resize_mode, resize_value)]
+        items = []
+        outputs = {}
+        cpu_ms = 0.0
+        peak_memory = 0
+        output_bytes = 0.0
+        for path in paths:
+            item = PreflightItem(path)
+            items.append(item)
+            for profile in profiles:
+                output_name = profile.output_name(path)
+                outputs.setdefault(os.path.normcase(output_name), []).append(path)
+            item.output_name = profiles[0].output_name(path)
+            try:
+                item.size, item.mode, item.format = self.read_header(path)
+            except Exception as e:
+                item.error = str(e) or e.__class__.__name__
+                continue
+
+            output_sizes = [self.image_processor.compute_output_size(item.size, p.resize_mode, p.resize_value)
+                            for p in profiles]
+            item.output_size = output_sizes[0]
+            settings = states.get(path, default_settings)
+            watermark = Watermark.from_settings(settings, item.size)
+            watermark = watermark.scaled(item.output_size[0] / float(item.size[0]))
+            item.font_size = watermark.font_size
+            # Same layout as the export: stroke, font, rotation and logo size all count
+            item.layout_size = self.image_processor.get_layout_size(watermark, item.output_size)
+            item.position = self.image_processor.calculate_position(item.output_size, item.layout_size,
+                                                                    watermark.position)
+            if watermark.position[0] != "tiled":
+                # Tiled watermarks repeat across the edges by design
+                x, y = item.position
+                item.clipped = (x < 0 or y < 0 or x + item.layout_size[0] > item.output_size[0]
+                                or y + item.layout_size[1] > item.output_size[1])
+
+            item_ms, item_memory = self.estimate(item.size, item.mode, item.format, profiles)
+            cpu_ms += item_ms
+            for profile, size in zip(profiles, output_sizes):
+                out_mp = size[0] * size[1] / 1000000.0
+                output_bytes += out_mp * self._output_bytes_per_mp(profile.fmt, profile.quality,
+                                                                   profile.encoder.get(profile.fmt))
+            peak_memory = max(peak_memory, item_memory)
+
+        collisions = {name: sources for name, sources in outputs.items() if len(sources) > 1}
+        return PreflightReport(items, collisions, cpu_ms / 1000.0, peak_memory, int(output_bytes),
+                               time.perf_counter() - start)
+
+    def estimate(self, size, mode, src_format, profiles):
+        """Returns (CPU ms, peak memory bytes) of exporting one image, given its header, to `profiles`."""
+        output_sizes = [self.image_processor.compute_output_size(size, p.resize_mode, p.resize_value)
+                        for p in profiles]
+        # One decode per source, one watermark per distinct output size, one encode per rendition
+        cpu_ms = size[0] * size[1] / 1000000.0 * self._decode_cost(src_format)
+        for out_size in set(output_sizes):
+            cpu_ms += out_size[0] * out_size[1] / 1000000.0 * self.cost_model['watermark_ms_per_mp']
+        for profile, out_size in zip(profiles, output_sizes):
+            cpu_ms += out_size[0] * out_size[1] / 1000000.0 * self._encode_cost(profile.fmt)
+        return cpu_ms, self._peak_memory(size, mode, profiles[0].fmt)
+
+    def calibrate(self, size=(1600, 1200)):
+        """Measures per-megapixel costs on a synthetic image and updates the model."""
+        mp = size[0] * size[1] / 1000000.0
+        img = Image.merge('RGB', [Image.effect_noise(size, 40) for _ in range(3)])
+        buf = io.BytesIO()
+        img.save(buf, format='JPEG', quality=95)
+        jpeg_bytes = buf.getvalue()
+
+        t0 = time.perf_counter()
+        with Image.open(io.BytesIO(jpeg_bytes)) as decoded:
+            decoded.load()
+            source = decoded.copy()
+        t1 = time.perf_counter()
+        watermark = Watermark("Calibration", font_size=max(14, int(min(size) * 0.05)),
+                              position=("bottom-right", {"x": 0, "y": 0}))
+        watermarked = self.image_processor.apply_watermark(source, watermark)
+        t2 = time.perf_counter()
+        out = io.BytesIO()
+        watermarked.convert('RGB').save(out, format='JPEG', quality=95)
+        t3 = time.perf_counter()
+
+        decode_costs = dict(self.cost_model['decode_ms_per_mp'])
+        decode_costs['JPEG'] = (t1 - t0) * 1000.0 / mp
+        encode_costs = dict(self.cost_model['encode_ms_per_mp'])
+        encode_costs['JPEG'] = (t3 - t2) * 1000.0 / mp
+        self.cost_model['decode_ms_per_mp'] = decode_costs
+        self.cost_model['encode_ms_per_mp'] = encode_costs
+        self.cost_model['watermark_ms_per_mp'] = (t2 - t1) * 1000.0 / mp
+        return self.cost_model
+
+    def _decode_cost(self, src_format):
+        costs = self.cost_model['decode_ms_per_mp']
+        return costs.get(src_format, costs['default'])
+
+    def _encode_cost(self, fmt):
+        costs = self.cost_model['encode_ms_per_mp']
+        return costs.get(fmt, costs['default'])
+
+    def _output_bytes_per_mp(self, fmt, quality, encoder_settings=None):
+        if fmt == 'WEBP':
+            if (encoder_settings or {}).get('lossless'):
+                return self.cost_model['webp_lossless_bytes_per_mp']
+            table = sorted(self.cost_model['webp_bytes_per_mp'].items())
+        elif fmt == 'JPEG':
+            table = sorted(self.cost_model['jpeg_bytes_per_mp'].items())
+        else:
+            return self.cost_model['png_bytes_per_mp']
+        quality = max(table[0][0], min(table[-1][0], int(quality)))
+        for (q0, b0), (q1, b1) in zip(table, table[1:]):
+            if q0 <= quality <= q1:
+                return b0 + (b1 - b0) * (quality - q0) / float(q1 - q0)
+        return table[-1][1]
+
+    def _peak_memory(self, size, mode, fmt):
+        """Bytes held while exporting one image: decoded frame, RGBA copy, text layer and encode buffer."""
+        pixels = size[0] * size[1]
+        try:
+            source_bands = Image.getmodebands(mode)
+        except Exception:
+            source_bands = 3
+        encode_bands = 3 if fmt == 'JPEG' else 4
+        return pixels * (source_bands + 4 + 4 + encode_bands)
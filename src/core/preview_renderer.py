@@ -0,0 +1,88 @@
+import threading
+
+from core.profiling import MemoryProfiler
+
+
+class PreviewRenderer:
+    """
+    Renders workspace previews on a background thread, so compositing and
+    resizing never block Tk event handling.
+
+    Every submit() gets a new generation number and supersedes all earlier
+    requests: a request still waiting when a newer one arrives is dropped
+    before it runs, and a render that finishes after a newer request was
+    submitted is dropped instead of delivered. The UI thread collects the
+    newest current frame with poll() (only it may create Tk images).
+    Requests must carry a snapshot of the settings (an immutable Watermark),
+    never live UI state. Renders are measured as the "preview" stage of
+    `profiler`.
+    """
+
+    def __init__(self, image_processor, profiler=None):
+        self.image_processor = image_processor
+        self.profiler = profiler or MemoryProfiler(enabled=False)
+        self._cond = threading.Condition()
+        self._request = None   # newest request not started yet
+        self._result = None    # (generation, image) of the newest finished render
+        self._generation = 0
+        self._delivered = 0    # generation of the last result handed out by poll()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, pyramid, box, scale, watermark=None, draft=False):
+        """Queues a render of `box` at `scale` (see ImagePyramid.render_viewport); returns its generation."""
+        with self._cond:
+            self._generation += 1
+            self._request = (self._generation, pyramid, box, scale, watermark, draft)
+            self._cond.notify()
+            return self._generation
+
+    def cancel(self):
+        """Drops the pending request and any render in progress (e.g. when the image is closed)."""
+        with self._cond:
+            self._generation += 1
+            self._delivered = self._generation
+            self._request = None
+            self._result = None
+
+    @property
+    def busy(self):
+        """True while the newest request has not been handed out by poll() yet."""
+        with self._cond:
+            return self._delivered < self._generation
+
+    def poll(self):
+        """Returns the newest finished frame if no newer request was submitted since, else None."""
+        with self._cond:
+            result, self._result = self._result, None
+            if result is None or result[0] != self._generation:
+                return None
+            self._delivered = result[0]
+            return result[1]  # None if the render failed
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._request = None
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._request is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                request, self._request = self._request, None
+            generation, pyramid, box, scale, watermark, draft = request
+            try:
+                with self.profiler.stage("preview"):
+                    image = pyramid.render_viewport(box, scale, self.image_processor, watermark, draft=draft)
+            except Exception as e:
+                print(f"Error rendering preview: {e}")
+                image = None
+            with self._cond:
+                # Superseded while rendering: a newer request is queued or already done
+                if generation == self._generation:
+                    self._result = (generation, image)
@@ -0,0 +1,288 @@
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+_MB = 1024.0 * 1024.0
+
+# Images kept for the per-image RSS table; beyond it only the heaviest are kept
+_MAX_IMAGES = 1000
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes, or None where it cannot be read."""
+    if sys.platform.startswith('linux'):
+        try:
+            with open('/proc/self/statm', 'r') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return None
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        try:
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        except (AttributeError, OSError):
+            pass
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Elsewhere only the peak is available (bytes on macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class StartupTimeline:
+    """
+    Records the steps of application startup (imports, window and panel
+    construction) and prints them as a timeline. A disabled timeline records
+    nothing, so startup code can use it unconditionally.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.events = []  # (label, start ms, duration ms or None, modules imported)
+
+    @contextmanager
+    def span(self, label):
+        """Times the enclosed block."""
+        if not self.enabled:
+            yield
+            return
+        modules = len(sys.modules)
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.events.append((label, (begin - self.start) * 1000, (end - begin) * 1000,
+                                len(sys.modules) - modules))
+
+    def mark(self, label):
+        """Records a point in time (e.g. "window shown")."""
+        if self.enabled:
+            self.events.append((label, (time.perf_counter() - self.start) * 1000, None, 0))
+
+    def report(self, file=None):
+        if not self.enabled:
+            return
+        file = file or sys.stdout
+        print("Startup timeline:", file=file)
+        print(f"{'at ms':>9} {'took ms':>9} {'modules':>8}  step", file=file)
+        for label, at, took, modules in self.events:
+            took_text = f"{took:9.1f}" if took is not None else f"{'':9}"
+            modules_text = f"{modules:8d}" if modules else f"{'':8}"
+            print(f"{at:9.1f} {took_text} {modules_text}  {label}", file=file)
+
+
+class _StageStats:
+    __slots__ = ('count', 'overlapped', 'seconds', 'peak', 'traced_growth', 'rss_growth', 'max_rss', 'sites')
+
+    def __init__(self):
+        self.count = 0
+        self.overlapped = 0      # runs that overlapped a stage on another thread (no peak recorded)
+        self.seconds = 0.0
+        self.peak = 0            # largest traced allocation peak above the stage's starting point
+        self.traced_growth = 0   # traced memory still held after the stage, summed over runs
+        self.rss_growth = 0
+        self.max_rss = 0
+        self.sites = {}          # "file:line" -> bytes still held after the stage, summed over runs
+
+
+class MemoryProfiler:
+    """
+    Opt-in memory instrumentation of export stages and UI actions.
+
+    Every stage (e.g. "decode", "preview") records the resident set size
+    before and after, the tracemalloc peak reached inside it and, by
+    comparing snapshots, which allocation sites still hold memory when it
+    ends. Stages that keep growing across runs point at leaks; a high peak
+    points at memory-heavy work. Pixel buffers are allocated by Pillow
+    outside the Python allocator, so they show up in RSS rather than in
+    tracemalloc. `gauges` are named callables (e.g. the number of cached
+    thumbnails) sampled with each stage, to tie growth to the objects held.
+    Stages run with a `path` (the image being exported) are also summed up
+    per image, to find the photos that need the most memory.
+
+    Stages may run on several threads (e.g. the preview renderer next to the
+    UI); nesting is tracked per thread. The tracemalloc peak is process-wide
+    and resetting it for one stage would hide the peak of another, so it is
+    only reset when no other stage is running, and runs that overlapped a
+    stage on another thread record no peak (their held memory and RSS
+    growth may include the other stage's). Gauges are only sampled on the
+    thread that registered them; other threads report the last value.
+    Only aggregates are kept, so a long session does not grow the profiler.
+
+    A disabled profiler records nothing, so code can use it unconditionally.
+    """
+
+    def __init__(self, enabled=True, frames=1, top=10, verbose=False):
+        self.enabled = enabled
+        self.frames = frames
+        self.top = top
+        self.verbose = verbose
+        self.gauges = {}   # name -> (callable, thread ident it may be sampled on)
+        self.stages = {}
+        self.images = {}   # path -> [max RSS, RSS growth summed over its stages]
+        self._local = threading.local()  # per-thread stage nesting depth
+        self._lock = threading.Lock()
+        self._running = []  # [overlapped] flag of every stage in progress, on any thread
+        self._samples = 0
+        self._last_rss = None
+        self._max_rss = 0
+        self._first_gauges = None
+        self._gauge_values = {}
+        self._start_rss = None
+        if enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._start_rss = current_rss()
+
+    def watch(self, name, gauge):
+        """Samples `gauge()` (a count or size) after every stage run on the calling thread."""
+        self.gauges[name] = (gauge, threading.get_ident())
+
+    @contextmanager
+    def stage(self, label, path=None):
+        """
+        Measures the enclosed block, attributed to the image at `path` if given;
+        nested stages (on the same thread) are only counted by the outermost one.
+        """
+        if not self.enabled or getattr(self._local, 'depth', 0):
+            yield
+            return
+        self._local.depth = 1
+        before = tracemalloc.take_snapshot()
+        rss_before = current_rss()
+        overlapped = [False]
+        with self._lock:
+            if self._running:
+                overlapped[0] = True
+                for other in self._running:
+                    other[0] = True
+            else:
+                tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+            self._running.append(overlapped)
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            self._record(label, path, before, rss_before, traced_before, time.perf_counter() - begin, overlapped)
+
+    def _record(self, label, path, before, rss_before, traced_before, seconds, overlapped):
+        with self._lock:
+            traced, peak = tracemalloc.get_traced_memory()
+            self._running.remove(overlapped)
+        rss = current_rss()
+        after = tracemalloc.take_snapshot()
+        gauges = self._sample_gauges()
+        with self._lock:
+            self._update(label, path, before, after, rss_before, rss, traced_before, traced,
+                         None if overlapped[0] else peak, seconds, gauges)
+
+    def _sample_gauges(self):
+        thread = threading.get_ident()
+        values = {}
+        for name, (gauge, owner) in list(self.gauges.items()):
+            if owner != thread:
+                continue
+            try:
+                values[name] = gauge()
+            except Exception:
+                values[name] = None
+        return values
+
+    def _update(self, label, path, before, after, rss_before, rss, traced_before, traced, peak, seconds, gauges):
+        stats = self.stages.setdefault(label, _StageStats())
+        stats.count += 1
+        stats.seconds += seconds
+        if peak is None:
+            stats.overlapped += 1
+        else:
+            stats.peak = max(stats.peak, peak - traced_before)
+        stats.traced_growth += traced - traced_before
+        if rss is not None and rss_before is not None:
+            stats.rss_growth += rss - rss_before
+            stats.max_rss = max(stats.max_rss, rss)
+            if path is not None:
+                image = self.images.setdefault(path, [0, 0])
+                image[0] = max(image[0], rss)
+                image[1] += rss - rss_before
+                if len(self.images) > _MAX_IMAGES:
+                    heaviest = sorted(self.images.items(), key=lambda item: -item[1][0])[:_MAX_IMAGES // 2]
+                    self.images = dict(heaviest)
+        own_file = __file__
+        for diff in after.compare_to(before, 'lineno'):
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            if frame.filename == own_file or frame.filename == tracemalloc.__file__:
+                continue
+            site = f"{frame.filename}:{frame.lineno}"
+            stats.sites[site] = stats.sites.get(site, 0) + diff.size_diff
+        self._gauge_values.update(gauges)
+        if self._first_gauges is None and gauges:
+            self._first_gauges = dict(self._gauge_values)
+        self._samples += 1
+        if rss is not None:
+            self._last_rss = rss
+            self._max_rss = max(self._max_rss, rss)
+        if self.verbose:
+            rss_text = f"rss {rss / _MB:.1f} MB ({(rss - rss_before) / _MB:+.1f})" if rss and rss_before else "rss n/a"
+            peak_text = f"peak +{(peak - traced_before) / _MB:.1f} MB" if peak is not None else "peak n/a (overlapped)"
+            gauge_text = ''.join(f", {name} {value}" for name, value in self._gauge_values.items())
+            path_text = f" {os.path.basename(path)}" if path is not None else ""
+            print(f"[memory] {label}{path_text}: {rss_text}, traced {traced / _MB:.1f} MB, {peak_text}{gauge_text}")
+
+    def report(self, file=None):
+        """Prints peak and growth per stage, the allocation sites holding the most memory, and the RSS trend."""
+        if not self.enabled:
+            return
+        file = file or sys.stdout
+        print("Memory by stage:", file=file)
+        print(f"{'runs':>6} {'ms/run':>8} {'peak MB':>8} {'held MB':>8} {'RSS +MB':>8} {'max RSS':>8}  stage", file=file)
+        overlapped = 0
+        for label, stats in sorted(self.stages.items(), key=lambda item: -item[1].peak):
+            max_rss = f"{stats.max_rss / _MB:8.1f}" if stats.max_rss else f"{'':8}"
+            peak = f"{stats.peak / _MB:8.1f}" if stats.overlapped < stats.count else f"{'n/a':>8}"
+            overlapped += stats.overlapped
+            print(f"{stats.count:6d} {stats.seconds * 1000 / stats.count:8.1f} {peak} "
+                  f"{stats.traced_growth / _MB:8.2f} {stats.rss_growth / _MB:8.1f} {max_rss}  {label}", file=file)
+        if overlapped:
+            print(f"Peaks leave out {overlapped} run(s) that overlapped a stage on another thread.", file=file)
+        for label, stats in self.stages.items():
+            sites = sorted(stats.sites.items(), key=lambda item: -item[1])[:self.top]
+            if not sites:
+                continue
+            print(f"Top allocation sites still held after '{label}':", file=file)
+            for site, size in sites:
+                print(f"{size / 1024.0:10.1f} KB  {site}", file=file)
+        if self.images:
+            print("Images by max RSS during their export:", file=file)
+            images = sorted(self.images.items(), key=lambda item: -item[1][0])[:self.top]
+            for path, (max_rss, growth) in images:
+                print(f"{max_rss / _MB:10.1f} MB ({growth / _MB:+.1f})  {path}", file=file)
+        if self._last_rss and self._start_rss:
+            print(f"RSS: start {self._start_rss / _MB:.1f} MB, end {self._last_rss / _MB:.1f} MB, "
+                  f"max {self._max_rss / _MB:.1f} MB over {self._samples} stage(s)", file=file)
+        if self._first_gauges is not None:
+            first, last = self._first_gauges, self._gauge_values
+            print("Gauges (first -> last): " + ", ".join(
+                f"{name} {first.get(name)} -> {last.get(name)}" for name in self.gauges), file=file)
@@ -0,0 +1,119 @@
+from collections import namedtuple
+import os
+import sys
+
+from core.preflight import PreflightPlanner
+from core.shared_frames import frame_bytes
+
+
+class WorkItem(namedtuple('WorkItem', ['path', 'cost_ms', 'memory_bytes', 'frame_bytes'])):
+    """
+    Estimated export cost of one image: CPU time, peak memory, and the
+    shared-memory bytes its decoded output frames take (0 if the header
+    could not be read).
+    """
+
+    __slots__ = ()
+
+
+def physical_memory():
+    """Returns the installed RAM in bytes, or None where it cannot be read."""
+    if sys.platform == 'win32':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(status)
+        try:
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullTotalPhys
+        except (AttributeError, OSError):
+            pass
+        return None
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_memory_budget():
+    """Half of the installed RAM (4 GB if unknown) for images being exported at once."""
+    total = physical_memory()
+    return total // 2 if total else 4 * 1024 * 1024 * 1024
+
+
+class SizeAwareScheduler:
+    """
+    Hands out the images of a batch by estimated cost, largest first.
+
+    Costs come from image headers through the pre-flight cost model, so a few
+    huge panoramas start at the beginning of the batch instead of leaving
+    one worker busy after the rest are done (longest-processing-time
+    scheduling). Workers are given the next image only when they free up,
+    so small images fill the gaps around the big ones; the finishing time
+    approaches total work divided by the number of workers.
+
+    Images in flight are limited by `memory_budget`: take() skips to the
+    largest image that still fits the remaining budget, and only starts an
+    image larger than the budget when nothing else is running.
+    """
+
+    def __init__(self, items, memory_budget=None):
+        self.memory_budget = memory_budget or default_memory_budget()
+        # Ascending by cost; take() serves from the end
+        self._items = sorted(items, key=lambda item: (item.cost_ms, item.memory_bytes))
+        self.in_flight_bytes = 0
+        self.in_flight = 0
+
+    @classmethod
+    def estimate(cls, paths, image_processor, profiles, cost_model=None):
+        """Returns a WorkItem per path from header-only reads (unreadable files get zero cost)."""
+        planner = PreflightPlanner(image_processor, cost_model)
+        items = []
+        for path in paths:
+            try:
+                size, mode, src_format = planner.read_header(path)
+            except Exception:
+                items.append(WorkItem(path, 0.0, 0, 0))
+                continue
+            cost_ms, memory_bytes = planner.estimate(size, mode, src_format, profiles)
+            output_sizes = {image_processor.compute_output_size(size, p.resize_mode, p.resize_value)
+                            for p in profiles}
+            frames = sum(frame_bytes(output_size) for output_size in output_sizes)
+            items.append(WorkItem(path, cost_ms, memory_bytes, frames))
+        return items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def total_cost_ms(self):
+        return sum(item.cost_ms for item in self._items)
+
+    def take(self):
+        """Returns the next WorkItem to start and reserves its memory, or None if none may start now."""
+        if not self._items:
+            return None
+        available = self.memory_budget - self.in_flight_bytes
+        index = len(self._items) - 1
+        # Largest-first, skipping images that do not fit next to the ones already running
+        while index >= 0 and self._items[index].memory_bytes > available:
+            index -= 1
+        if index < 0:
+            if self.in_flight:
+                return None
+            index = len(self._items) - 1  # too large for any budget: run it alone
+        item = self._items.pop(index)
+        self.in_flight_bytes += item.memory_bytes
+        self.in_flight += 1
+        return item
+
+    def done(self, item):
+        """Releases the memory reserved for a finished (or failed) item."""
+        self.in_flight_bytes -= item.memory_bytes
+        self.in_flight -= 1
@@ -0,0 +1,167 @@
+from collections import namedtuple
+import json
+import os
+import struct
+import zlib
+
+# Session file layout (all integers little-endian):
+#   MAGIC
+#   chunk blocks   zlib(JSON {"dirs": [...], "states": [...], "rows": [[dir, name, size, mtime_ns, state], ...]})
+#   index block    zlib(JSON {"version", "count", "settings", "current", "chunks": [[offset, length, rows], ...]})
+#   footer         index offset (u64), index length (u32), MAGIC
+# The index sits at the end so chunks can be streamed out while saving; a reader
+# only needs the footer and index to know the whole layout and can then decode
+# chunks one at a time. Directories and identical per-image states are stored
+# once per chunk, which keeps large sessions small.
+SESSION_MAGIC = b'PWSESS01'
+SESSION_VERSION = 1
+SESSION_EXTENSION = '.pwsession'
+_FOOTER = struct.Struct('<QI8s')
+
+
+def file_fingerprint(path):
+    """Returns (size, mtime_ns) of a file, or None if it cannot be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+class SessionEntry(namedtuple('SessionEntry', ['path', 'size', 'mtime_ns', 'state'])):
+    """One image of a saved session: its path, file fingerprint and per-image state (or None)."""
+
+    __slots__ = ()
+
+    @property
+    def fingerprint(self):
+        return (self.size, self.mtime_ns) if self.size >= 0 else None
+
+    def check(self):
+        """Returns 'ok', 'missing' or 'changed' by comparing the file with the saved fingerprint."""
+        current = file_fingerprint(self.path)
+        if current is None:
+            return 'missing'
+        if self.fingerprint is not None and current != self.fingerprint:
+            return 'changed'
+        return 'ok'
+
+
+def save_session(session_path, filepaths, states=None, settings=None, current=None, chunk_size=2048):
+    """
+    Writes a session file holding the ordered image list, each image's state
+    and file fingerprint, the current watermark settings and the selected image.
+    The file is written to a temporary name and moved into place.
+    """
+    states = states or {}
+    chunks = []
+    tmp_path = session_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SESSION_MAGIC)
+        for start in range(0, len(filepaths), chunk_size):
+            block = _encode_chunk(filepaths[start:start + chunk_size], states)
+            chunks.append([f.tell(), len(block), min(chunk_size, len(filepaths) - start)])
+            f.write(block)
+        index = {
+            'version': SESSION_VERSION,
+            'count': len(filepaths),
+            'settings': settings,
+            'current': current,
+            'chunks': chunks,
+        }
+        index_block = zlib.compress(json.dumps(index, separators=(',', ':')).encode('utf-8'))
+        index_offset = f.tell()
+        f.write(index_block)
+        f.write(_FOOTER.pack(index_offset, len(index_block), SESSION_MAGIC))
+    os.replace(tmp_path, session_path)
+
+
+def _encode_chunk(paths, states):
+    dirs = {}
+    state_ids = {}
+    state_list = []
+    rows = []
+    for path in paths:
+        directory, name = os.path.split(path)
+        dir_id = dirs.setdefault(directory, len(dirs))
+        state = states.get(path)
+        state_id = -1
+        if state is not None:
+            key = json.dumps(state, sort_keys=True, separators=(',', ':'))
+            state_id = state_ids.get(key)
+            if state_id is None:
+                state_id = state_ids[key] = len(state_list)
+                state_list.append(state)
+        fingerprint = file_fingerprint(path) or (-1, -1)
+        rows.append([dir_id, name, fingerprint[0], fingerprint[1], state_id])
+    chunk = {'dirs': list(dirs), 'states': state_list, 'rows': rows}
+    return zlib.compress(json.dumps(chunk, separators=(',', ':')).encode('utf-8'))
+
+
+class SessionReader:
+    """
+    Reads a session file incrementally.
+
+    Opening only reads the footer and index (count, settings, chunk layout);
+    entries are decoded chunk by chunk on demand, so a caller can show the
+    first rows of a very large session immediately and load the rest later.
+    """
+
+    def __init__(self, session_path):
+        self.path = session_path
+        self._file = open(session_path, 'rb')
+        try:
+            self._read_index()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _read_index(self):
+        f = self._file
+        if f.read(len(SESSION_MAGIC)) != SESSION_MAGIC:
+            raise ValueError("Not a session file")
+        f.seek(0, os.SEEK_END)
+        if f.tell() < len(SESSION_MAGIC) + _FOOTER.size:
+            raise ValueError("Session file is truncated")
+        f.seek(-_FOOTER.size, os.SEEK_END)
+        index_offset, index_length, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+        if magic != SESSION_MAGIC:
+            raise ValueError("Session file is truncated")
+        f.seek(index_offset)
+        index = json.loads(zlib.decompress(f.read(index_length)).decode('utf-8'))
+        if index.get('version', 0) > SESSION_VERSION:
+            raise ValueError("Session file was written by a newer version")
+        self.count = index.get('count', 0)
+        self.settings = index.get('settings')
+        self.current = index.get('current')
+        self._chunks = index.get('chunks', [])
+
+    @property
+    def chunk_count(self):
+        return len(self._chunks)
+
+    def read_chunk(self, i):
+        """Returns the SessionEntry list of chunk i."""
+        offset, length, _rows = self._chunks[i]
+        self._file.seek(offset)
+        chunk = json.loads(zlib.decompress(self._file.read(length)).decode('utf-8'))
+        dirs = chunk['dirs']
+        states = chunk['states']
+        return [SessionEntry(os.path.join(dirs[dir_id], name), size, mtime_ns,
+                             states[state_id] if state_id >= 0 else None)
+                for dir_id, name, size, mtime_ns, state_id in chunk['rows']]
+
+    def entries(self):
+        """Yields every SessionEntry in order, decoding one chunk at a time."""
+        for i in range(self.chunk_count):
+            for entry in self.read_chunk(i):
+                yield entry
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,137 @@
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+# Frames are stored as RGBA: Image.frombuffer can only wrap 4-byte-per-pixel
+# (and single-band) modes without copying, and watermarking needs RGBA anyway.
+FRAME_MODE = 'RGBA'
+FRAME_BANDS = 4
+
+
+class FrameRef(namedtuple('FrameRef', ['slab', 'offset', 'size'])):
+    """Location of one RGBA frame inside a shared-memory slab; cheap to pickle."""
+
+    __slots__ = ()
+
+    @property
+    def nbytes(self):
+        return frame_bytes(self.size)
+
+
+def frame_bytes(size):
+    """Bytes an RGBA frame of the given size occupies in a slab."""
+    return size[0] * size[1] * FRAME_BANDS
+
+
+class SlabPool:
+    """
+    A fixed set of reusable shared-memory slabs for handing decoded frames
+    between worker processes.
+
+    The pool is created (and finally unlinked) by the coordinating process,
+    which also tracks which slabs are free. Workers attach to the slabs by
+    name through a SlabView; only slab indexes and FrameRefs cross process
+    boundaries, never pixel data.
+    """
+
+    def __init__(self, count, slab_size):
+        self.slab_size = max(1, int(slab_size))
+        self.segments = []
+        try:
+            for _ in range(count):
+                self.segments.append(shared_memory.SharedMemory(create=True, size=self.slab_size))
+        except Exception:
+            self.close()
+            raise
+        self._free = list(range(len(self.segments)))
+
+    @property
+    def names(self):
+        return [segment.name for segment in self.segments]
+
+    @property
+    def free_count(self):
+        return len(self._free)
+
+    def acquire(self):
+        """Returns the index of a free slab, or None if all are in use."""
+        return self._free.pop() if self._free else None
+
+    def release(self, index):
+        self._free.append(index)
+
+    def close(self):
+        """Closes and removes all slabs."""
+        for segment in self.segments:
+            try:
+                segment.close()
+                segment.unlink()
+            except Exception as e:
+                print(f"Error releasing shared memory {segment.name}: {e}")
+        self.segments = []
+        self._free = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SlabView:
+    """Worker-side access to the slabs of a SlabPool, attached lazily by name."""
+
+    def __init__(self, names):
+        self._names = list(names)
+        self._segments = {}
+
+    def _segment(self, index):
+        segment = self._segments.get(index)
+        if segment is None:
+            # Workers share the coordinator's resource tracker, which unlinks the
+            # segments if the coordinator dies without closing the pool.
+            segment = shared_memory.SharedMemory(name=self._names[index])
+            self._segments[index] = segment
+        return segment
+
+    def write_frames(self, index, images):
+        """
+        Copies images into slab `index` back to back as RGBA.
+        Returns a FrameRef per image (in order), or None if they do not fit.
+        """
+        segment = self._segment(index)
+        total = sum(frame_bytes(img.size) for img in images)
+        if total > segment.size:
+            return None
+        refs = []
+        offset = 0
+        for img in images:
+            ref = FrameRef(index, offset, img.size)
+            # Map the slab as an image and paste into it: a single pass that also
+            # converts to RGBA, with no intermediate bytes copy of the frame
+            target = self.read_frame(ref)
+            target.readonly = 0
+            target.paste(img)
+            del target
+            refs.append(ref)
+            offset += ref.nbytes
+        return refs
+
+    def read_frame(self, ref):
+        """
+        Wraps a frame in place as a read-only RGBA image (no copy).
+        The image must be dropped before the slab is reused.
+        """
+        segment = self._segment(ref.slab)
+        buffer = segment.buf[ref.offset:ref.offset + ref.nbytes]
+        return Image.frombuffer(FRAME_MODE, ref.size, buffer, 'raw', FRAME_MODE, 0, 1)
+
+    def close(self):
+        for segment in self._segments.values():
+            try:
+                segment.close()
+            except Exception:
+                # Frames still wrapping the buffer keep it exported; the OS reclaims it on exit
+                pass
+        self._segments = {}
\ No newline at end of file
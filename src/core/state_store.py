@@ -0,0 +1,162 @@
+from collections.abc import Mapping
+
+# Fields that commonly differ between images (drag positions, opacity tweaks);
+# they live on each record so all other settings can be shared.
+SLOT_FIELDS = ('offset_x', 'offset_y', 'opacity')
+
+
+def _freeze(value):
+    """Returns a hashable version of a settings value (lists become tuples)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class ImageState:
+    """
+    The watermark state of one image: a shared settings dict plus the
+    fields that usually differ per image. None means "not set".
+    """
+
+    __slots__ = ('base', 'offset_x', 'offset_y', 'opacity')
+
+    def __init__(self, base, offset_x=None, offset_y=None, opacity=None):
+        self.base = base
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.opacity = opacity
+
+    def to_settings(self):
+        settings = dict(self.base)
+        for field in SLOT_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                settings[field] = value
+        return settings
+
+
+class StateStore(Mapping):
+    """
+    Compact per-image watermark states keyed by path.
+
+    Settings other than offsets and opacity are interned: images with the
+    same text, font, color, effects, template and so on point to one shared
+    (copy-on-write) dict, and editing an image swaps its pointer rather than
+    modifying shared data. Reading a path returns a fresh settings dict, so
+    the store can be used wherever a {path: settings} dict is expected.
+    Bulk operations over a selection only touch the per-image records.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._bases = {}
+        self._prune_at = 64
+
+    # Mapping interface ----------------------------------------------------
+    def __getitem__(self, path):
+        return self._records[path].to_settings()
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, path):
+        return path in self._records
+
+    def record(self, path):
+        """Returns the ImageState of path, or None."""
+        return self._records.get(path)
+
+    # Single-image updates ------------------------------------------------
+    def set(self, path, settings):
+        """Stores the settings of one image (sharing everything but its offsets and opacity)."""
+        record = self._records.get(path)
+        base = self._intern(settings)
+        values = [settings.get(field) for field in SLOT_FIELDS]
+        if record is None:
+            self._records[path] = ImageState(base, *values)
+        else:
+            record.base = base
+            record.offset_x, record.offset_y, record.opacity = values
+        self._maybe_prune()
+
+    def discard(self, path):
+        self._records.pop(path, None)
+
+    def clear(self):
+        self._records.clear()
+        self._bases.clear()
+        self._prune_at = 64
+
+    # Bulk operations -----------------------------------------------------
+    def apply_template(self, paths, template):
+        """Points every path at one shared copy of `template`, dropping per-image changes."""
+        base = self._intern(template)
+        values = [template.get(field) for field in SLOT_FIELDS]
+        records = self._records
+        for path in paths:
+            record = records.get(path)
+            if record is None:
+                records[path] = ImageState(base, *values)
+            else:
+                record.base = base
+                record.offset_x, record.offset_y, record.opacity = values
+        self._maybe_prune()
+        return len(paths)
+
+    def set_opacity(self, paths, opacity, default=None):
+        """Sets the opacity (0-100) of every path; paths without a state start from `default` if given."""
+        count = 0
+        for record in self._records_for(paths, default):
+            record.opacity = opacity
+            count += 1
+        return count
+
+    def shift_offsets(self, paths, dx, dy, default=None):
+        """
+        Moves the watermark of every path by (dx, dy) pixels. Relative positions
+        (fractions of the image) are left unchanged.
+        """
+        count = 0
+        for record in self._records_for(paths, default):
+            if record.base.get('position_mode') == 'relative':
+                continue
+            record.offset_x = (record.offset_x or 0) + dx
+            record.offset_y = (record.offset_y or 0) + dy
+            count += 1
+        return count
+
+    def _records_for(self, paths, default):
+        records = self._records
+        for path in paths:
+            record = records.get(path)
+            if record is None:
+                if default is None:
+                    continue
+                self.set(path, default)
+                record = records[path]
+            yield record
+
+    # Interning -----------------------------------------------------------
+    def _intern(self, settings):
+        core = {k: v for k, v in settings.items() if k not in SLOT_FIELDS}
+        key = _freeze(core)
+        base = self._bases.get(key)
+        if base is None:
+            base = self._bases[key] = core
+        return base
+
+    def _maybe_prune(self):
+        # Only once records point at the newly interned base, or it would be dropped at once
+        if len(self._bases) > self._prune_at:
+            self._prune()
+
+    def _prune(self):
+        """Forgets interned settings no record points to any more (e.g. after typing a new text)."""
+        live = {id(record.base) for record in self._records.values()}
+        self._bases = {key: base for key, base in self._bases.items() if id(base) in live}
+        self._prune_at = max(64, 2 * len(self._bases))
\ No newline at end of file
@@ -0,0 +1,138 @@
+import bisect
+import json
+import os
+
+
+class TemplateStore:
+    """
+    Watermark templates kept in an append-only journal file.
+
+    Every change appends one JSON line ({"op": "put" | "delete" | "rename", ...}),
+    so saving a template costs one small write no matter how many templates
+    exist. Loading replays the journal; once superseded lines outnumber the
+    live templates the journal is compacted into one "put" per template
+    (written to a temporary file and moved into place). Template names are
+    kept in a sorted index, so listing never re-sorts.
+    """
+
+    COMPACT_MIN_RECORDS = 64
+
+    def __init__(self, path):
+        self.path = path
+        self._templates = {}
+        self._names = []   # sorted index of template names
+        self._records = 0  # lines in the journal file
+        self._load()
+
+    def _load(self):
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error loading template journal {self.path}: {e}")
+            return
+        damaged = False
+        with f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                self._records += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A partially written line (e.g. after a crash) only loses that change
+                    print(f"Skipping damaged entry in template journal {self.path}")
+                    damaged = True
+                    continue
+                self._replay(record)
+        self._names = sorted(self._templates)
+        if damaged:
+            # Rewrite the journal so later appends do not land after the damaged line
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Error compacting template journal {self.path}: {e}")
+        else:
+            self._maybe_compact()
+
+    def _replay(self, record):
+        op = record.get('op')
+        if op == 'put':
+            self._templates[record['name']] = record['settings']
+        elif op == 'delete':
+            self._templates.pop(record['name'], None)
+        elif op == 'rename' and record['old'] in self._templates:
+            self._templates[record['new']] = self._templates.pop(record['old'])
+
+    def names(self):
+        """Returns the template names, sorted."""
+        return list(self._names)
+
+    def get(self, name):
+        return self._templates.get(name)
+
+    def __contains__(self, name):
+        return name in self._templates
+
+    def __len__(self):
+        return len(self._templates)
+
+    def put(self, name, settings):
+        """Adds or replaces a template."""
+        self.put_many({name: settings})
+
+    def put_many(self, templates):
+        """Adds or replaces several templates with a single append."""
+        templates = {name: dict(settings) for name, settings in templates.items()}
+        self._append([{'op': 'put', 'name': name, 'settings': settings}
+                      for name, settings in templates.items()])
+        for name, settings in templates.items():
+            if name not in self._templates:
+                bisect.insort(self._names, name)
+            self._templates[name] = settings
+        self._maybe_compact()
+
+    def delete(self, name):
+        if name not in self._templates:
+            return
+        self._append([{'op': 'delete', 'name': name}])
+        del self._templates[name]
+        self._names.pop(bisect.bisect_left(self._names, name))
+        self._maybe_compact()
+
+    def rename(self, old, new):
+        if old not in self._templates or old == new:
+            return
+        self._append([{'op': 'rename', 'old': old, 'new': new}])
+        self._names.pop(bisect.bisect_left(self._names, old))
+        if new not in self._templates:
+            bisect.insort(self._names, new)
+        self._templates[new] = self._templates.pop(old)
+        self._maybe_compact()
+
+    def compact(self):
+        """Rewrites the journal with one entry per live template."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for name in self._names:
+                f.write(self._encode({'op': 'put', 'name': name, 'settings': self._templates[name]}))
+        os.replace(tmp_path, self.path)
+        self._records = len(self._names)
+
+    def _maybe_compact(self):
+        if self._records > max(self.COMPACT_MIN_RECORDS, 2 * len(self._templates)):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Error compacting template journal {self.path}: {e}")
+
+    def _append(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(self._encode(record) for record in records))
+        self._records += len(records)
+
+    @staticmethod
+    def _encode(record):
+        return json.dumps(record, separators=(',', ':')) + '\n'
\ No newline at end of file
@@ -0,0 +1,65 @@
+from collections import namedtuple
+import threading
+
+from PIL import Image, ImageDraw
+
+from core.cache import LRUCache
+
+
+class TextMeasurement(namedtuple('TextMeasurement', ['bbox', 'ascent', 'descent'])):
+    """The bounding box and vertical font metrics of a measured string."""
+
+    __slots__ = ()
+
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def height(self):
+        return self.bbox[3] - self.bbox[1]
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+
+class TextMetrics:
+    """
+    Shared text measurement service.
+
+    Measurements are cached by (text, font, size) and taken on a tiny reusable
+    surface, so callers never need to allocate an image just to call textbbox.
+    """
+
+    def __init__(self, font_getter, max_entries=1024):
+        # font_getter(font_size, font_path) -> ImageFont instance
+        self._font_getter = font_getter
+        self._cache = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self._draw = ImageDraw.Draw(Image.new('RGBA', (1, 1), (255, 255, 255, 0)))
+
+    def measure(self, text, font_size, font_path=None, stroke_width=0):
+        """Returns the TextMeasurement of text at the given font size (and outline width)."""
+        key = (text, font_path, font_size, stroke_width)
+        measurement = self._cache.get(key)
+        if measurement is None:
+            font = self._font_getter(font_size, font_path)
+            with self._lock:
+                bbox = self._draw.textbbox((0, 0), text, font=font, stroke_width=stroke_width)
+            try:
+                ascent, descent = font.getmetrics()
+            except AttributeError:
+                # Bitmap fonts do not expose metrics; approximate from the bbox
+                ascent, descent = bbox[3], 0
+            measurement = TextMeasurement(tuple(bbox), ascent, descent)
+            self._cache.put(key, measurement)
+        return measurement
+
+    def text_size(self, text, font_size, font_path=None, stroke_width=0):
+        """Returns the (width, height) of text at the given font size."""
+        return self.measure(text, font_size, font_path, stroke_width).size
+
+    def clear(self):
+        """Drops all cached measurements (e.g. after fonts change)."""
+        self._cache.clear()
@@ -0,0 +1,183 @@
+from collections import OrderedDict
+import io
+import os
+import queue
+import threading
+
+from PIL import ExifTags, Image
+
+from core.session import file_fingerprint
+
+# EXIF/TIFF tags
+_JPEG_IF_OFFSET = 0x0201    # IFD1: offset of the embedded JPEG thumbnail
+_JPEG_IF_LENGTH = 0x0202
+_NEW_SUBFILE_TYPE = 0x00FE  # TIFF: bit 0 marks a reduced-resolution page
+
+
+def _crop_to_aspect(thumb, size):
+    """Crops the black bars cameras add when the preview's aspect ratio differs from the photo's."""
+    width, height = thumb.size
+    target = size[0] / float(size[1])
+    if abs(width / float(height) - target) <= 0.02 * target:
+        return thumb
+    if width / float(height) < target:
+        new_height = max(1, round(width / target))
+        top = (height - new_height) // 2
+        return thumb.crop((0, top, width, top + new_height))
+    new_width = max(1, round(height * target))
+    left = (width - new_width) // 2
+    return thumb.crop((left, 0, left + new_width, height))
+
+
+def embedded_thumbnail(img, min_size):
+    """
+    Returns the preview stored in an opened image file, without decoding the
+    main image: the EXIF IFD1 JPEG thumbnail of JPEGs, or a reduced-resolution
+    page of multi-page TIFFs. Returns None if there is none whose long edge is
+    at least `min_size`. Like the main image, the preview is not turned per
+    EXIF orientation, so it matches what the workspace preview and export show.
+    """
+    if img.format == 'JPEG':
+        raw = img.info.get('exif')
+        if not raw:
+            return None
+        ifd1 = img.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset, length = ifd1.get(_JPEG_IF_OFFSET), ifd1.get(_JPEG_IF_LENGTH)
+        if not offset or not length:
+            return None
+        # Offsets count from the TIFF header, which follows the "Exif\0\0" prefix
+        start = offset + (6 if raw.startswith(b'Exif\x00\x00') else 0)
+        data = raw[start:start + length]
+        if len(data) != length:
+            return None
+        thumb = Image.open(io.BytesIO(data))
+        thumb.load()
+    elif img.format == 'TIFF' and getattr(img, 'n_frames', 1) > 1:
+        size = img.size
+        best = None
+        try:
+            for index in range(1, img.n_frames):
+                img.seek(index)
+                if img.tag_v2.get(_NEW_SUBFILE_TYPE, 0) & 1 and max(img.size) >= min_size:
+                    if best is None or img.size[0] < best[1][0]:
+                        best = (index, img.size)
+            if best is None:
+                return None
+            img.seek(best[0])
+            thumb = img.copy()
+        finally:
+            img.seek(0)
+        return _crop_to_aspect(thumb, size)
+    else:
+        return None
+    if max(thumb.size) < min_size:
+        return None
+    return _crop_to_aspect(thumb, img.size)
+
+
+class ThumbnailLoader:
+    """
+    Decodes list thumbnails (and validates files) on background threads.
+
+    Requests are served most-recent first, so rows that just scrolled into
+    view load before ones requested earlier; requests for rows that left
+    the view can be dropped with retain(). Rows just outside the view can be
+    queued with read_ahead(); they load only while no visible row is
+    waiting, which keeps slow storage busy ahead of scrolling. Results are
+    collected with poll() on the UI thread, which is the only thread allowed
+    to create Tk images.
+
+    Thumbnails come from the preview embedded in the file (EXIF or TIFF)
+    when it is large enough, so camera photos are never decoded; other files
+    are decoded at a reduced scale. Neither is turned per EXIF orientation,
+    as the preview and export use the stored pixels too.
+    """
+
+    def __init__(self, size=(100, 100), workers=2):
+        self.size = size
+        self._pending = OrderedDict()  # path -> expected fingerprint (or None)
+        self._ahead = OrderedDict()    # low-priority read-ahead, served in order
+        self._cond = threading.Condition()
+        self._results = queue.Queue()
+        self._stopped = False
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+
+    def request(self, path, fingerprint=None):
+        """Queues a thumbnail; `fingerprint` is the (size, mtime_ns) the file is expected to have."""
+        with self._cond:
+            self._pending.pop(path, None)
+            self._pending[path] = fingerprint
+            self._cond.notify()
+
+    def read_ahead(self, paths, fingerprints=None):
+        """Replaces the read-ahead queue with `paths` (e.g. the next page of rows)."""
+        fingerprints = fingerprints or {}
+        with self._cond:
+            self._ahead = OrderedDict((p, fingerprints.get(p)) for p in paths if p not in self._pending)
+            if self._ahead:
+                self._cond.notify()
+
+    def retain(self, paths):
+        """Drops pending requests for paths not in `paths` (e.g. rows scrolled out of view)."""
+        keep = set(paths)
+        with self._cond:
+            for path in [p for p in self._pending if p not in keep]:
+                del self._pending[path]
+
+    def poll(self):
+        """Returns finished (path, thumbnail or None, status) tuples; status is 'ok', 'missing', 'changed' or 'error'."""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._ahead.clear()
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._ahead and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                if self._pending:
+                    path, fingerprint = self._pending.popitem(last=True)
+                else:
+                    path, fingerprint = self._ahead.popitem(last=False)
+            self._results.put(self._load(path, fingerprint))
+
+    def _load(self, path, fingerprint):
+        current = file_fingerprint(path)
+        if current is None:
+            return (path, None, 'missing')
+        status = 'changed' if fingerprint is not None and tuple(fingerprint) != current else 'ok'
+        try:
+            with Image.open(path) as img:
+                thumbnail = None
+                try:
+                    thumbnail = embedded_thumbnail(img, max(self.size))
+                except Exception:
+                    pass  # damaged preview: decode the image instead
+                if thumbnail is None:
+                    # thumbnail() decodes JPEGs at a reduced DCT scale close to the target size
+                    img.thumbnail(self.size)
+                    thumbnail = img
+                else:
+                    # Previews are barely larger than the list; bilinear is plenty and twice as fast
+                    thumbnail.thumbnail(self.size, Image.Resampling.BILINEAR)
+                if thumbnail.mode not in ('RGB', 'RGBA', 'L'):
+                    thumbnail = thumbnail.convert('RGBA')
+                thumbnail = thumbnail.copy()
+        except Exception as e:
+            print(f"Error processing {os.path.basename(path)}: {e}")
+            return (path, None, 'error')
+        return (path, thumbnail, status)
\ No newline at end of file
@@ -1,8 +1,144 @@
+import copy
+
+
+def auto_font_size(image_size):
+    """Estimates a legible font size (~5% of the shorter edge) for an image."""
+    img_w, img_h = image_size
+    return max(14, int(min(img_w, img_h) * 0.05))
+
+
+def opacity_to_alpha(opacity_val):
+    """Converts a stored opacity (0-100 percent, or legacy 0-255) to an alpha value."""
+    if isinstance(opacity_val, (int, float)) and opacity_val > 100:
+        return int(max(0, min(255, int(opacity_val))))
+    try:
+        return int(max(0, min(100, int(opacity_val))) * 255 / 100)
+    except (TypeError, ValueError):
+        return int(50 * 255 / 100)
+
+
+# Defaults for the tiled (repeating) position mode
+DEFAULT_TILE_SETTINGS = {
+    "tile_spacing_x": 80,   # horizontal gap between repeats, in pixels
+    "tile_spacing_y": 60,   # vertical gap between rows, in pixels
+    "tile_angle": 30,       # rotation of each repeat, in degrees
+    "tile_stagger": 0.5,    # fraction of a cell every other row is shifted by
+}
+
+
+# Defaults for the outline (stroke) and drop-shadow text effects
+DEFAULT_EFFECT_SETTINGS = {
+    "stroke_width": 0,            # outline width in pixels (0 = no outline)
+    "stroke_color": [0, 0, 0],
+    "shadow": False,
+    "shadow_color": [0, 0, 0],
+    "shadow_opacity": 60,         # 0-100 percent, relative to the watermark opacity
+    "shadow_offset_x": 3,
+    "shadow_offset_y": 3,
+    "shadow_blur": 3,             # Gaussian blur radius in pixels
+}
+
+
 class Watermark:
     """Represents a watermark with its properties."""
 
-    def __init__(self, text, font_size=40, color=(255, 255, 255, 128), position="bottom-right"):
+    def __init__(self, text, font_size=40, color=(255, 255, 255, 128), position="bottom-right",
+                 tile_spacing=(80, 60), tile_angle=30, tile_stagger=0.5,
+                 watermark_type="text", image_path=None, image_scale=0.2, rotation=0,
+                 stroke_width=0, stroke_color=(0, 0, 0), shadow_color=None, shadow_offset=(3, 3),
+                 shadow_blur=3):
         self.text = text
         self.font_size = font_size
-        self.color = color  # RGBA tuple
-        self.position = position
\ No newline at end of file
+        self.color = color  # RGBA tuple; for image watermarks only the alpha (opacity) is used
+        self.position = position
+        # Image (logo) watermarks: logo width as a fraction of the photo width
+        self.watermark_type = watermark_type
+        self.image_path = image_path
+        self.image_scale = image_scale
+        self.rotation = rotation  # degrees, counter-clockwise
+        # Text effects; shadow_color is an RGBA tuple, or None for no shadow
+        self.stroke_width = stroke_width
+        self.stroke_color = stroke_color
+        self.shadow_color = shadow_color
+        self.shadow_offset = shadow_offset
+        self.shadow_blur = shadow_blur
+        # Only used by the "tiled" position mode
+        self.tile_spacing = tile_spacing  # (x, y) gaps in pixels
+        self.tile_angle = tile_angle
+        self.tile_stagger = tile_stagger
+
+    @property
+    def is_image(self):
+        return self.watermark_type == "image" and bool(self.image_path)
+
+    def scaled(self, factor):
+        """
+        Returns a copy sized for an image scaled by `factor` (e.g. a resized export).
+        Pixel-based settings scale with the image; relative ones are unchanged.
+        """
+        if factor == 1:
+            return self
+        wm = copy.copy(self)
+        wm.font_size = max(1, int(round(self.font_size * factor)))
+        mode, offset = self.position if isinstance(self.position, tuple) else (self.position, {"x": 0, "y": 0})
+        if mode != "relative":
+            offset = {"x": offset.get("x", 0) * factor, "y": offset.get("y", 0) * factor}
+        wm.position = (mode, offset)
+        wm.tile_spacing = tuple(int(round(v * factor)) for v in self.tile_spacing)
+        wm.stroke_width = int(round(self.stroke_width * factor))
+        wm.shadow_offset = tuple(int(round(v * factor)) for v in self.shadow_offset)
+        wm.shadow_blur = self.shadow_blur * factor
+        return wm
+
+    @property
+    def effects_key(self):
+        """Hashable summary of the text effects, used to cache rendered sprites."""
+        return (int(self.stroke_width), tuple(self.stroke_color[:3]),
+                tuple(self.shadow_color) if self.shadow_color else None,
+                tuple(self.shadow_offset), self.shadow_blur)
+
+    @classmethod
+    def from_settings(cls, settings, image_size=None):
+        """
+        Builds a watermark from a template or per-image state dict.
+        When the settings ask for auto font sizing and the image size is known,
+        the font size is derived from the image dimensions.
+        """
+        if settings.get("font_size_auto") and image_size is not None:
+            font_size = auto_font_size(image_size)
+        else:
+            font_size = int(settings.get("font_size", 40))
+        color_rgb = tuple(settings.get("color", (255, 255, 255)))[:3]
+        alpha = opacity_to_alpha(settings.get("opacity", 50))
+        position_mode = settings.get("position_mode", "bottom-right")
+        if position_mode == "relative":
+            default_offset = 0.5
+        else:
+            default_offset = 0
+        offset = {"x": settings.get("offset_x", default_offset), "y": settings.get("offset_y", default_offset)}
+        effects = dict(DEFAULT_EFFECT_SETTINGS)
+        effects.update({k: settings[k] for k in DEFAULT_EFFECT_SETTINGS if settings.get(k) is not None})
+        shadow_color = None
+        if effects["shadow"]:
+            shadow_alpha = int(alpha * max(0, min(100, int(effects["shadow_opacity"]))) / 100)
+            shadow_color = tuple(effects["shadow_color"])[:3] + (shadow_alpha,)
+        tile = dict(DEFAULT_TILE_SETTINGS)
+        tile.update({k: settings[k] for k in DEFAULT_TILE_SETTINGS if settings.get(k) is not None})
+        return cls(
+            text=settings.get("text", "Your Watermark"),
+            font_size=font_size,
+            color=color_rgb + (alpha,),
+            position=(position_mode, offset),
+            tile_spacing=(int(tile["tile_spacing_x"]), int(tile["tile_spacing_y"])),
+            tile_angle=float(tile["tile_angle"]),
+            tile_stagger=float(tile["tile_stagger"]),
+            watermark_type=settings.get("watermark_type", "text"),
+            image_path=settings.get("image_path"),
+            image_scale=float(settings.get("image_scale", 0.2)),
+            rotation=float(settings.get("rotation", 0) or 0),
+            stroke_width=max(0, int(effects["stroke_width"])),
+            stroke_color=tuple(effects["stroke_color"])[:3],
+            shadow_color=shadow_color,
+            shadow_offset=(int(effects["shadow_offset_x"]), int(effects["shadow_offset_y"])),
+            shadow_blur=max(0.0, float(effects["shadow_blur"]))
+        )
@@ -1,14 +1,34 @@
-import tkinter as tk
-from tkinterdnd2 import TkinterDnD
-from ui.main_window import MainWindow
+import os
+import sys
+
+from core.profiling import MemoryProfiler, StartupTimeline
+
+# --profile-startup (or PW_PROFILE_STARTUP=1) prints an import/initialization timeline
+timeline = StartupTimeline(enabled='--profile-startup' in sys.argv or bool(os.environ.get('PW_PROFILE_STARTUP')))
+# --profile-memory (or PW_PROFILE_MEMORY=1) traces memory from here on; see MemoryProfiler
+memory = MemoryProfiler(enabled='--profile-memory' in sys.argv or bool(os.environ.get('PW_PROFILE_MEMORY')),
+                        verbose=True)
+
+with timeline.span("import tkinterdnd2"):
+    from tkinterdnd2 import TkinterDnD
+with timeline.span("import ui.main_window"):
+    from ui.main_window import MainWindow
 
 def main():
     """Main function to run the application."""
-    root = TkinterDnD.Tk()
-    main_window = MainWindow(root)
+    with timeline.span("create Tk root"):
+        root = TkinterDnD.Tk()
+    with timeline.span("MainWindow()"):
+        main_window = MainWindow(root, timeline=timeline, memory=memory)
     # Start in fullscreen (maximized) on Windows
     root.state('zoomed')
+
+    def window_shown():
+        timeline.mark("window shown")
+        timeline.report()
+    root.after_idle(window_shown)
     main_window.run()
+    memory.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,62 +1,111 @@
 import tkinter as tk
-from tkinter import filedialog, ttk, colorchooser, messagebox
+from tkinter import filedialog, ttk, messagebox
 from tkinterdnd2 import DND_FILES
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import ImageTk
 import os
 import json
 
-from core.image_processor import ImageProcessor
+from core.image_processor import ImageProcessor, OUTPUT_FORMATS, DEFAULT_ENCODER_SETTINGS
 from core.config_manager import ConfigManager
-from core.watermark import Watermark
+from core.watermark import Watermark, auto_font_size, DEFAULT_TILE_SETTINGS, DEFAULT_EFFECT_SETTINGS
+from core.exporter import ExportOptions, BatchExporter
+from core.image_pyramid import ImagePyramid
+from core.preview_renderer import PreviewRenderer
+from core.profiling import MemoryProfiler, StartupTimeline
+from core.state_store import StateStore
+from core.thumbnails import ThumbnailLoader
+from ui.thumbnail_list import ThumbnailList
 
 class MainWindow:
     """The main window of the application."""
 
-    def __init__(self, root):
+    # Export resize choices shown in the UI -> ImageProcessor resize modes
+    RESIZE_LABELS = {
+        "None": "none",
+        "Long edge": "long_edge",
+        "Width": "width",
+        "Height": "height",
+        "Percent": "percent",
+    }
+    # State given to images without one when a bulk edit touches them (matches the untouched defaults)
+    DEFAULT_IMAGE_STATE = {"text": "Your Watermark", "font_size_auto": True}
+    # Idle time after the last input before the draft preview is refined to full quality
+    REFINE_DELAY_MS = 150
+    # How often finished preview frames are collected while a render is in progress
+    RENDER_POLL_MS = 15
+
+    def __init__(self, root, timeline=None, memory=None):
         self.root = root
+        self.timeline = timeline or StartupTimeline(enabled=False)
+        # Opt-in memory instrumentation of UI actions and exports (see MemoryProfiler)
+        self.memory = memory or MemoryProfiler(enabled=False)
         self.root.title("Photo Watermark 2.0")
         self.root.geometry("1700x900")
         self.root.configure(bg='#f0f0f0')
         
         # Configure modern styling
-        self.setup_styles()
+        with self.timeline.span("setup styles"):
+            self.setup_styles()
 
         self.image_processor = ImageProcessor()
-        self.config_manager = ConfigManager()
-        # Ensure default template exists and force selection to Default on startup
-        try:
-            self.config_manager.ensure_default_template()
-            self.config_manager.set_selected_template('Default')
-        except Exception as e:
-            print(f"Error initializing templates: {e}")
+        # Probe the fallback font off the UI thread; the first preview then finds it cached
+        self.image_processor.warm_up_fonts()
+        # Previews render on a background thread; frames are collected by _poll_preview
+        self.preview_renderer = PreviewRenderer(self.image_processor, profiler=self.memory)
+        self.render_poll_job = None
+        with self.timeline.span("load config"):
+            self.config_manager = ConfigManager()
+            # Ensure default template exists and force selection to Default on startup
+            try:
+                self.config_manager.ensure_default_template()
+                self.config_manager.set_selected_template('Default')
+            except Exception as e:
+                print(f"Error initializing templates: {e}")
         self.filepaths = []
         self.filepath_set = set()
-        self.tk_thumbnails = []
         self.current_image_path = None
         self.original_image = None
         self.preview_job = None
+        self.draft_job = None
         self.watermark_position_mode = "bottom-right"
         self.watermark_offset = {"x": 0, "y": 0}
+        self.tile_settings = dict(DEFAULT_TILE_SETTINGS)
+        self.effect_settings = dict(DEFAULT_EFFECT_SETTINGS)
         self.is_dragging = False
         self.drag_start_pos = {"x": 0, "y": 0}
         self.display_to_original_ratio = 1.0
-        self.image_states = {}
+        # Zoomable preview: zoom is output pixels per source pixel (None = fit to window)
+        self.image_pyramid = None
+        self.zoom = None
+        self.view_center = None
+        self.pan_start = None
+        # Per-image watermark states (shared settings plus per-image offsets/opacity)
+        self.image_states = StateStore()
 
         # Export settings defaults (used by export actions)
         self.export_prefix = tk.StringVar(value="wm_")
         self.export_format = tk.StringVar(value="JPEG")
         self.export_quality = tk.IntVar(value=95)
+        # Per-format encoder overrides (see DEFAULT_ENCODER_SETTINGS)
+        self.encoder_settings = {}
 
-        self.create_widgets()
+        with self.timeline.span("create widgets"):
+            self.create_widgets()
         # Apply the selected (Default) template at startup
-        try:
-            self.apply_template_by_name(self.config_manager.get_selected_template_name())
-        except Exception as e:
-            print(f"Error applying default template: {e}")
+        with self.timeline.span("apply default template"):
+            try:
+                self.apply_template_by_name(self.config_manager.get_selected_template_name())
+            except Exception as e:
+                print(f"Error applying default template: {e}")
 
         self.root.drop_target_register(DND_FILES)
         self.root.dnd_bind('<<Drop>>', self.on_drop)
 
+        if self.memory.enabled:
+            self.memory.watch("thumbnails", lambda: self.thumbnail_list.cached_photos)
+            self.memory.watch("states", lambda: len(self.image_states))
+            self.memory.watch("pyramid levels", lambda: len(self.image_pyramid.levels) if self.image_pyramid else 0)
+
     def setup_styles(self):
         """Configure modern styling for the application."""
         # Configure ttk styles
@@ -166,6 +215,15 @@ class MainWindow:
         self.export_single_button = ttk.Button(toolbar, text="🖼️ Export Single", command=self.export_single_image, style='Secondary.TButton')
         self.export_single_button.pack(side=tk.LEFT, padx=5, pady=10)
 
+        self.preflight_button = ttk.Button(toolbar, text="📋 Pre-flight", command=self.show_preflight, style='Secondary.TButton')
+        self.preflight_button.pack(side=tk.LEFT, padx=5, pady=10)
+
+        self.open_session_button = ttk.Button(toolbar, text="📂 Open Session", command=self.open_session, style='Secondary.TButton')
+        self.open_session_button.pack(side=tk.LEFT, padx=(20, 5), pady=10)
+
+        self.save_session_button = ttk.Button(toolbar, text="💾 Save Session", command=self.save_session, style='Secondary.TButton')
+        self.save_session_button.pack(side=tk.LEFT, padx=5, pady=10)
+
         # Left panel for thumbnails (balanced width; filenames will wrap)
         left_panel = ttk.Frame(main_frame, style='Card.TFrame', width=300)
         left_panel.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
@@ -174,19 +232,11 @@ class MainWindow:
         import_frame = ttk.Frame(left_panel)
         import_frame.pack(fill=tk.X, padx=15, pady=15)
 
-        # Thumbnails scrollable area
+        # Thumbnails scrollable area (only visible rows are built; thumbnails load in the background)
         thumbnails_frame = ttk.Frame(left_panel)
         thumbnails_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))
-        
-        canvas = tk.Canvas(thumbnails_frame, bg='white', highlightthickness=0)
-        scrollbar = ttk.Scrollbar(thumbnails_frame, orient="vertical", command=canvas.yview)
-        self.scrollable_frame = ttk.Frame(canvas)
-        self.scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.bind_all("<MouseWheel>", lambda e: canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.thumbnail_list = ThumbnailList(thumbnails_frame, ThumbnailLoader((100, 100)),
+                                            self.on_image_select, self.show_context_menu)
 
         # Center panel for the main image view
         self.center_panel = ttk.Frame(main_frame, style='Card.TFrame')
@@ -212,6 +262,21 @@ class MainWindow:
         self.image_label.bind("<Button-1>", self.on_drag_start)
         self.image_label.bind("<B1-Motion>", self.on_drag_motion)
         self.image_label.bind("<ButtonRelease-1>", self.on_drag_end)
+        # Ctrl + mouse wheel zooms around the cursor; right/middle button drag pans
+        self.image_label.bind("<Control-MouseWheel>", self.on_zoom_wheel)
+        for button in (2, 3):
+            self.image_label.bind(f"<ButtonPress-{button}>", self.on_pan_start)
+            self.image_label.bind(f"<B{button}-Motion>", self.on_pan_motion)
+
+        # Zoom controls below the preview area
+        zoom_bar = ttk.Frame(self.center_panel)
+        zoom_bar.place(relx=0.5, rely=1.0, anchor='s', y=-8)
+        ttk.Button(zoom_bar, text="−", width=3, command=lambda: self.zoom_by(1 / 1.25), style='Secondary.TButton', takefocus=False).pack(side=tk.LEFT, padx=2)
+        ttk.Button(zoom_bar, text="Fit", width=5, command=self.zoom_to_fit, style='Secondary.TButton', takefocus=False).pack(side=tk.LEFT, padx=2)
+        ttk.Button(zoom_bar, text="100%", width=5, command=lambda: self.set_zoom(1.0), style='Secondary.TButton', takefocus=False).pack(side=tk.LEFT, padx=2)
+        ttk.Button(zoom_bar, text="+", width=3, command=lambda: self.zoom_by(1.25), style='Secondary.TButton', takefocus=False).pack(side=tk.LEFT, padx=2)
+        self.zoom_label_var = tk.StringVar(value="Fit")
+        ttk.Label(zoom_bar, textvariable=self.zoom_label_var, width=6, anchor='center').pack(side=tk.LEFT, padx=(6, 0))
 
         # Right panel for controls
         self.control_panel = ttk.Frame(main_frame, style='Card.TFrame', width=370)
@@ -220,7 +285,12 @@ class MainWindow:
 
         self.create_template_controls()
         self.create_watermark_controls()
-        self.create_export_controls()
+        # Export settings are not needed to show the window; build them once it is up
+        self.root.after_idle(self._create_deferred_controls)
+
+    def _create_deferred_controls(self):
+        with self.timeline.span("create export controls (deferred)"):
+            self.create_export_controls()
 
     def create_template_controls(self):
         """Creates the widgets for template selection and management."""
@@ -269,6 +339,15 @@ class MainWindow:
         size_spinbox = ttk.Spinbox(size_frame, from_=1, to=500, textvariable=self.font_size, font=('Segoe UI', 10))
         size_spinbox.pack(fill=tk.X, pady=(5, 0))
 
+        # Rotation (degrees, counter-clockwise)
+        rotation_frame = ttk.Frame(watermark_frame)
+        rotation_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        ttk.Label(rotation_frame, text="🔄 Rotation (°):", font=('Segoe UI', 9, 'bold')).pack(side=tk.LEFT)
+        self.rotation = tk.IntVar(value=0)
+        self.rotation.trace_add("write", self.schedule_preview)
+        ttk.Spinbox(rotation_frame, from_=-180, to=180, textvariable=self.rotation, width=6, font=('Segoe UI', 10)).pack(side=tk.RIGHT)
+
         # Opacity (percent 0-100)
         opacity_frame = ttk.Frame(watermark_frame)
         opacity_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -299,9 +378,26 @@ class MainWindow:
         color_frame.pack(fill=tk.X, padx=10, pady=10)
         
         self.color_button = ttk.Button(color_frame, text="🎨 Choose Color", command=self.choose_color_and_preview, style='Secondary.TButton')
-        self.color_button.pack(fill=tk.X)
+        self.color_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        self.effects_button = ttk.Button(color_frame, text="✨ Effects...", command=self.edit_effects, style='Secondary.TButton')
+        self.effects_button.pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(5, 0))
         self.watermark_color = (255, 255, 255)
 
+        # Watermark type: text or image (logo)
+        logo_frame = ttk.Frame(watermark_frame)
+        logo_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+
+        self.watermark_type = tk.StringVar(value="text")
+        self.watermark_type.trace_add("write", self.schedule_preview)
+        ttk.Radiobutton(logo_frame, text="Text", value="text", variable=self.watermark_type).pack(side=tk.LEFT)
+        ttk.Radiobutton(logo_frame, text="Image", value="image", variable=self.watermark_type).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(logo_frame, text="🖼️ Logo...", command=self.choose_logo_and_preview, style='Secondary.TButton').pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Label(logo_frame, text="Scale %:").pack(side=tk.LEFT, padx=(8, 0))
+        self.logo_path = None
+        self.logo_scale = tk.IntVar(value=20)  # logo width as percent of photo width
+        self.logo_scale.trace_add("write", self.schedule_preview)
+        ttk.Spinbox(logo_frame, from_=1, to=100, textvariable=self.logo_scale, width=4).pack(side=tk.LEFT, padx=(3, 0))
+
         # Position controls
         position_frame = ttk.Frame(watermark_frame)
         position_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -329,6 +425,14 @@ class MainWindow:
         pos_grid_frame.grid_rowconfigure(0, weight=1)
         pos_grid_frame.grid_rowconfigure(1, weight=1)
         pos_grid_frame.grid_rowconfigure(2, weight=1)
+
+        # Tiled mode repeats the watermark across the whole image
+        tiled_btn = ttk.Button(pos_grid_frame, text="🔁 Tiled",
+                               command=lambda: self.set_watermark_position("tiled"),
+                               style='Secondary.TButton',
+                               takefocus=False)
+        tiled_btn.grid(row=3, column=0, columnspan=3, sticky="nsew", padx=2, pady=2)
+        self.position_buttons["tiled"] = tiled_btn
         
         # Initialize grid selection visual state
         self.update_position_grid_selection(getattr(self, 'watermark_position_mode', 'bottom-right'))
@@ -372,12 +476,34 @@ class MainWindow:
         fmt_row.pack(fill=tk.X, pady=(10,0))
         ttk.Label(fmt_row, text="Format:").pack(side=tk.LEFT)
         self.export_format = tk.StringVar(value=self.export_format.get() if isinstance(self.export_format, tk.Variable) else "JPEG")
-        fmt_box = ttk.Combobox(fmt_row, textvariable=self.export_format, values=["JPEG", "PNG"], state="readonly", width=6)
+        fmt_box = ttk.Combobox(fmt_row, textvariable=self.export_format, values=list(OUTPUT_FORMATS), state="readonly", width=6)
         fmt_box.pack(side=tk.LEFT, padx=(5, 15))
 
-        ttk.Label(fmt_row, text="JPEG Quality:").pack(side=tk.LEFT)
+        ttk.Label(fmt_row, text="Quality:").pack(side=tk.LEFT)
         self.export_quality = tk.IntVar(value=self.export_quality.get() if isinstance(self.export_quality, tk.Variable) else 95)
         ttk.Spinbox(fmt_row, from_=1, to=100, textvariable=self.export_quality, width=6).pack(side=tk.LEFT, padx=(5,0))
+        ttk.Button(fmt_row, text="⚙️ Encoder...", command=self.edit_encoder_settings,
+                   style='Secondary.TButton').pack(side=tk.LEFT, padx=(10,0))
+
+        # Output size (never enlarges the original)
+        size_row = ttk.Frame(inner)
+        size_row.pack(fill=tk.X, pady=(10,0))
+        ttk.Label(size_row, text="Resize:").pack(side=tk.LEFT)
+        self.resize_mode = tk.StringVar(value="None")
+        ttk.Combobox(size_row, textvariable=self.resize_mode, values=list(self.RESIZE_LABELS),
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(size_row, text="Value:").pack(side=tk.LEFT)
+        self.resize_value = tk.IntVar(value=2048)
+        ttk.Spinbox(size_row, from_=1, to=20000, textvariable=self.resize_value, width=7).pack(side=tk.LEFT, padx=(5,0))
+
+        # Export profiles: when any are selected, exports write one rendition per profile
+        profile_row = ttk.Frame(inner)
+        profile_row.pack(fill=tk.X, pady=(10,0))
+        ttk.Button(profile_row, text="🗂️ Profiles...", command=self.manage_export_profiles,
+                   style='Secondary.TButton').pack(side=tk.LEFT)
+        self.profiles_label_var = tk.StringVar()
+        ttk.Label(profile_row, textvariable=self.profiles_label_var, wraplength=220).pack(side=tk.LEFT, padx=(10,0))
+        self._update_profiles_label()
 
 
     def on_template_selected(self, event=None):
@@ -399,10 +525,7 @@ class MainWindow:
             # Handle auto font size
             auto = bool(settings.get("font_size_auto", False))
             if auto and self.original_image is not None:
-                img_w, img_h = self.original_image.size
-                base = min(img_w, img_h)
-                estimated = max(14, int(base * 0.05))
-                self.font_size.set(estimated)
+                self.font_size.set(auto_font_size(self.original_image.size))
             else:
                 self.font_size.set(int(settings.get("font_size", 40)))
             # Opacity (percent)
@@ -431,6 +554,12 @@ class MainWindow:
                 self.watermark_position_mode = pos_mode
                 self.watermark_offset["x"] = settings.get("offset_x", 0)
                 self.watermark_offset["y"] = settings.get("offset_y", 0)
+            # Tiled pattern settings
+            self.tile_settings = {k: settings.get(k, v) for k, v in DEFAULT_TILE_SETTINGS.items()}
+            # Logo settings
+            self._set_logo_settings(settings)
+            self.rotation.set(int(round(float(settings.get("rotation", 0) or 0))))
+            self.effect_settings = {k: settings.get(k, v) for k, v in DEFAULT_EFFECT_SETTINGS.items()}
             # Sync grid selection and preview
             self.update_position_grid_selection(self.watermark_position_mode)
             self.clear_position_grid_focus()
@@ -445,7 +574,7 @@ class MainWindow:
         dlg.transient(self.root)
         dlg.grab_set()
         # Center the dialog
-        self.center_window(dlg, width=420, height=400)
+        self.center_window(dlg, width=420, height=460)
 
         container = ttk.Frame(dlg, padding=15)
         container.pack(fill=tk.BOTH, expand=True)
@@ -484,7 +613,7 @@ class MainWindow:
         color_preview = tk.Label(color_row, text=" ", bg=self.rgb_to_hex(self.watermark_color), width=2, relief='solid')
         color_preview.pack(side=tk.LEFT, padx=(5, 8))
         def pick_color():
-            code = colorchooser.askcolor(title="Choose color")
+            code = self.ask_color(title="Choose color")
             if code and code[0]:
                 rgb = tuple(int(c) for c in code[0])
                 color_preview.configure(bg=self.rgb_to_hex(rgb))
@@ -500,7 +629,7 @@ class MainWindow:
             "top-left", "top-center", "top-right",
             "mid-left", "mid-center", "mid-right",
             "bottom-left", "bottom-center", "bottom-right",
-            "manual"
+            "manual", "tiled"
         ]
         # Default to saving as relative positioning
         pos_var = tk.StringVar(value="relative")
@@ -517,6 +646,8 @@ class MainWindow:
         offy_var = tk.DoubleVar(value=_ry)
         ttk.Entry(offset_row, textvariable=offy_var, width=8).pack(side=tk.LEFT, padx=(5, 10))
 
+        tile_row, tile_vars = self._create_tile_settings_row(container, self.tile_settings)
+
         btns = ttk.Frame(container)
         btns.pack(fill=tk.X, pady=(15, 0))
         def _toggle_offset_visibility_save(*args):
@@ -527,6 +658,10 @@ class MainWindow:
                     offset_row.pack(fill=tk.X, pady=(10, 0))
             else:
                 offset_row.pack_forget()
+            if pos_var.get() == "tiled":
+                tile_row.pack(before=btns, fill=tk.X, pady=(10, 0))
+            else:
+                tile_row.pack_forget()
         pos_var.trace_add('write', _toggle_offset_visibility_save)
         _toggle_offset_visibility_save()
         def do_save():
@@ -552,6 +687,15 @@ class MainWindow:
                 "offset_x": float(offx_var.get()),
                 "offset_y": float(offy_var.get()),
             }
+            try:
+                tmpl.update(self._read_tile_settings(tile_vars))
+            except (tk.TclError, ValueError):
+                messagebox.showerror("Save Template", "Tile spacing, angle and stagger must be numbers.", parent=dlg)
+                return
+            # Logo, rotation and effect settings are saved with the template as currently configured
+            tmpl.update(self._logo_settings())
+            tmpl["rotation"] = self._get_rotation()
+            tmpl.update(self.effect_settings)
             try:
                 self.config_manager.add_template(name, tmpl)
                 # Refresh dropdown
@@ -625,7 +769,7 @@ class MainWindow:
         color_preview.pack(side=tk.LEFT, padx=(5, 8))
         color_selected_var = tk.StringVar(value=json.dumps([255,255,255]))
         def pick_color_manage():
-            code = colorchooser.askcolor(title="Choose color")
+            code = self.ask_color(title="Choose color")
             if code and code[0]:
                 rgb = tuple(int(c) for c in code[0])
                 color_preview.configure(bg=self.rgb_to_hex(rgb))
@@ -640,7 +784,7 @@ class MainWindow:
             "top-left", "top-center", "top-right",
             "mid-left", "mid-center", "mid-right",
             "bottom-left", "bottom-center", "bottom-right",
-            "manual"
+            "manual", "tiled"
         ]
         pos_var = tk.StringVar()
         ttk.Combobox(pos_row, textvariable=pos_var, values=positions, state='readonly', width=15).pack(side=tk.LEFT, padx=(5, 10))
@@ -654,6 +798,8 @@ class MainWindow:
         offy_var = tk.DoubleVar()
         ttk.Entry(offset_row, textvariable=offy_var, width=8).pack(side=tk.LEFT, padx=(5, 10))
 
+        tile_row, tile_vars = self._create_tile_settings_row(right, DEFAULT_TILE_SETTINGS)
+
         # Buttons
         current_selected_name = {'val': None}
         btns = ttk.Frame(right)
@@ -670,7 +816,9 @@ class MainWindow:
                 color_rgb = tuple(json.loads(color_selected_var.get()))
             except Exception:
                 color_rgb = (255,255,255)
-            tmpl = {
+            # Start from the stored template so settings without a field here (e.g. logos) are kept
+            tmpl = dict(self.config_manager.get_template(current_selected_name['val']) or {})
+            tmpl.update({
                 "text": text_var.get(),
                 "font_size": int(size_var.get()),
                 "font_size_auto": bool(auto_var.get()),
@@ -679,22 +827,21 @@ class MainWindow:
                 "position_mode": pos_var.get(),
                 "offset_x": float(offx_var.get()),
                 "offset_y": float(offy_var.get()),
-            }
+            })
+            try:
+                tmpl.update(self._read_tile_settings(tile_vars))
+            except (tk.TclError, ValueError):
+                messagebox.showerror("Manage Templates", "Tile spacing, angle and stagger must be numbers.", parent=dlg)
+                return
             try:
                 # Handle rename if name changed
                 old_name = current_selected_name['val']
                 if name != old_name:
-                    # create new key, delete old
-                    templates = self.config_manager.config.setdefault('templates', {})
-                    if name in templates:
+                    if self.config_manager.get_template(name) is not None:
                         messagebox.showerror("Manage Templates", "A template with the new name already exists.", parent=dlg)
                         return
-                    templates[name] = tmpl
-                    del templates[old_name]
-                    # update selected template if needed
-                    if self.config_manager.get_selected_template_name() == old_name:
-                        self.config_manager.set_selected_template(name)
-                    self.config_manager.save_config()
+                    # Also moves the template selection to the new name
+                    self.config_manager.rename_template(old_name, name, tmpl)
                 else:
                     self.config_manager.update_template(name, tmpl)
                 messagebox.showinfo("Manage Templates", "Template updated successfully.", parent=dlg)
@@ -735,6 +882,10 @@ class MainWindow:
                     offset_row.pack(fill=tk.X, pady=(10, 0))
             else:
                 offset_row.pack_forget()
+            if pos_var.get() == "tiled":
+                tile_row.pack(before=btns, fill=tk.X, pady=(10, 0))
+            else:
+                tile_row.pack_forget()
         pos_var.trace_add('write', _toggle_offset_visibility_manage)
         _toggle_offset_visibility_manage()
 
@@ -750,6 +901,8 @@ class MainWindow:
             pos_var.set("bottom-right")
             offx_var.set(0)
             offy_var.set(0)
+            for key, var in tile_vars.items():
+                var.set(DEFAULT_TILE_SETTINGS[key])
             _toggle_offset_visibility_manage()
 
         def load_selected(evt=None):
@@ -776,6 +929,8 @@ class MainWindow:
             pos_var.set(tmpl.get('position_mode', 'bottom-right'))
             offx_var.set(float(tmpl.get('offset_x', 0)))
             offy_var.set(float(tmpl.get('offset_y', 0)))
+            for key, var in tile_vars.items():
+                var.set(tmpl.get(key, DEFAULT_TILE_SETTINGS[key]))
             # Protect Default in UI by disabling entries
             readonly = (name == 'Default')
             name_entry.configure(state='readonly' if readonly else 'normal')
@@ -798,6 +953,178 @@ class MainWindow:
             load_selected()
 
 
+    def manage_export_profiles(self):
+        """Open a dialog to create, edit, delete and select named export profiles."""
+        dlg = tk.Toplevel(self.root)
+        dlg.title("Export Profiles")
+        dlg.transient(self.root)
+        dlg.grab_set()
+        self.center_window(dlg, width=520, height=440)
+
+        container = ttk.Frame(dlg, padding=15)
+        container.pack(fill=tk.BOTH, expand=True)
+
+        left = ttk.Frame(container)
+        left.pack(side=tk.LEFT, fill=tk.Y)
+        ttk.Label(left, text="Profiles:", font=('Segoe UI', 9, 'bold')).pack(anchor='w')
+        listbox = tk.Listbox(left, height=16, exportselection=False)
+        listbox.pack(fill=tk.Y, expand=True, pady=(5,0))
+
+        right = ttk.Frame(container)
+        right.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(15,0))
+        ttk.Label(right, text="Details:", font=('Segoe UI', 9, 'bold')).pack(anchor='w')
+
+        name_var = tk.StringVar()
+        ttk.Label(right, text="Name:").pack(anchor='w')
+        ttk.Entry(right, textvariable=name_var).pack(fill=tk.X, pady=(5, 8))
+
+        subfolder_var = tk.StringVar()
+        ttk.Label(right, text="Subfolder (optional):").pack(anchor='w')
+        ttk.Entry(right, textvariable=subfolder_var).pack(fill=tk.X, pady=(5, 8))
+
+        fmt_row = ttk.Frame(right)
+        fmt_row.pack(fill=tk.X)
+        ttk.Label(fmt_row, text="Format:").pack(side=tk.LEFT)
+        fmt_var = tk.StringVar(value="JPEG")
+        ttk.Combobox(fmt_row, textvariable=fmt_var, values=list(OUTPUT_FORMATS), state="readonly", width=6).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(fmt_row, text="Quality:").pack(side=tk.LEFT)
+        quality_var = tk.IntVar(value=95)
+        ttk.Spinbox(fmt_row, from_=1, to=100, textvariable=quality_var, width=6).pack(side=tk.LEFT, padx=(5, 0))
+
+        size_row = ttk.Frame(right)
+        size_row.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(size_row, text="Resize:").pack(side=tk.LEFT)
+        resize_mode_var = tk.StringVar(value="None")
+        ttk.Combobox(size_row, textvariable=resize_mode_var, values=list(self.RESIZE_LABELS),
+                     state="readonly", width=10).pack(side=tk.LEFT, padx=(5, 15))
+        resize_value_var = tk.IntVar(value=2048)
+        ttk.Spinbox(size_row, from_=1, to=20000, textvariable=resize_value_var, width=7).pack(side=tk.LEFT)
+
+        naming_row = ttk.Frame(right)
+        naming_row.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(naming_row, text="Filename:").pack(side=tk.LEFT)
+        naming_var = tk.StringVar(value="original")
+        ttk.Combobox(naming_row, textvariable=naming_var, values=["original", "prefix", "suffix"],
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=(5, 10))
+        prefix_var = tk.StringVar(value="wm_")
+        ttk.Entry(naming_row, textvariable=prefix_var, width=8).pack(side=tk.LEFT, padx=(0, 5))
+        suffix_var = tk.StringVar(value="_watermarked")
+        ttk.Entry(naming_row, textvariable=suffix_var, width=12).pack(side=tk.LEFT)
+
+        use_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(right, text="Use for exports", variable=use_var).pack(anchor='w', pady=(10, 0))
+
+        mode_labels = {mode: label for label, mode in self.RESIZE_LABELS.items()}
+        # Encoder overrides are not edited here; they come from the loaded profile or the export panel
+        encoder_holder = {'val': {}}
+
+        def fill_fields(options, in_use):
+            encoder_holder['val'] = dict(options.encoder)
+            subfolder_var.set(options.subfolder)
+            fmt_var.set(options.fmt)
+            quality_var.set(options.quality)
+            resize_mode_var.set(mode_labels.get(options.resize_mode, "None"))
+            resize_value_var.set(int(options.resize_value or 2048))
+            naming_var.set(options.naming_rule)
+            prefix_var.set(options.prefix)
+            suffix_var.set(options.suffix)
+            use_var.set(in_use)
+
+        def read_fields():
+            try:
+                resize_value = int(resize_value_var.get())
+            except Exception:
+                resize_value = None
+            return ExportOptions(
+                fmt=fmt_var.get(),
+                quality=quality_var.get(),
+                naming_rule=naming_var.get(),
+                prefix=prefix_var.get(),
+                suffix=suffix_var.get(),
+                resize_mode=self.RESIZE_LABELS.get(resize_mode_var.get(), 'none'),
+                resize_value=resize_value,
+                subfolder=subfolder_var.get().strip(),
+                encoder=encoder_holder['val']
+            ).to_dict()
+
+        def refresh_profiles(select=None):
+            listbox.delete(0, tk.END)
+            selected = set(self.config_manager.get_selected_export_profiles())
+            for n in self.config_manager.list_export_profiles():
+                listbox.insert(tk.END, f"✔ {n}" if n in selected else n)
+            names = self.config_manager.list_export_profiles()
+            if select in names:
+                listbox.select_set(names.index(select))
+            self._update_profiles_label()
+
+        def load_selected(evt=None):
+            sel = listbox.curselection()
+            if not sel:
+                return
+            name = self.config_manager.list_export_profiles()[sel[0]]
+            profile = self.config_manager.get_export_profile(name)
+            if profile is None:
+                return
+            name_var.set(name)
+            fill_fields(ExportOptions.from_dict(profile), name in self.config_manager.get_selected_export_profiles())
+
+        def from_panel():
+            fill_fields(self._export_options(), use_var.get())
+
+        def set_in_use(name, in_use):
+            selected = [n for n in self.config_manager.get_selected_export_profiles() if n != name]
+            if in_use:
+                selected.append(name)
+            self.config_manager.set_selected_export_profiles(selected)
+
+        def do_save():
+            name = name_var.get().strip()
+            if not name:
+                messagebox.showerror("Export Profiles", "Profile name cannot be empty.", parent=dlg)
+                return
+            try:
+                if self.config_manager.get_export_profile(name) is None:
+                    self.config_manager.add_export_profile(name, read_fields())
+                else:
+                    self.config_manager.update_export_profile(name, read_fields())
+                set_in_use(name, use_var.get())
+                refresh_profiles(select=name)
+            except Exception as e:
+                messagebox.showerror("Export Profiles", f"Failed to save profile: {e}", parent=dlg)
+
+        def do_delete():
+            name = name_var.get().strip()
+            try:
+                self.config_manager.delete_export_profile(name)
+                name_var.set("")
+                refresh_profiles()
+            except Exception as e:
+                messagebox.showerror("Export Profiles", f"Failed to delete profile: {e}", parent=dlg)
+
+        ttk.Button(right, text="Copy Export Settings", command=from_panel,
+                   style='Secondary.TButton').pack(fill=tk.X, pady=(10, 0))
+        btns = ttk.Frame(right)
+        btns.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(btns, text="Save", command=do_save, style='Secondary.TButton').pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        ttk.Button(btns, text="Delete", command=do_delete, style='Secondary.TButton').pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(5, 0))
+
+        listbox.bind('<<ListboxSelect>>', load_selected)
+        refresh_profiles()
+        if listbox.size() > 0:
+            listbox.select_set(0)
+            load_selected()
+        else:
+            from_panel()
+
+    # Rarely used dialogs are imported on first use to keep startup lean
+    def ask_color(self, **kwargs):
+        from tkinter import colorchooser
+        return colorchooser.askcolor(**kwargs)
+
+    def ask_integer(self, title, prompt, **kwargs):
+        from tkinter import simpledialog
+        return simpledialog.askinteger(title, prompt, **kwargs)
+
     def center_window(self, win, width=400, height=300):
         try:
             win.update_idletasks()
@@ -809,27 +1136,60 @@ class MainWindow:
         except Exception:
             pass
 
+    # ------------------------------
+    # Tiled mode helpers
+    # ------------------------------
+    def _create_tile_settings_row(self, parent, values):
+        """Creates the (initially hidden) spacing/angle/stagger inputs used by tiled templates."""
+        tile_row = ttk.Frame(parent)
+        tile_vars = {}
+        fields = [
+            ("tile_spacing_x", "Spacing X:", 6),
+            ("tile_spacing_y", "Y:", 6),
+            ("tile_angle", "Angle:", 6),
+            ("tile_stagger", "Stagger (0-1):", 5),
+        ]
+        for key, label, width in fields:
+            ttk.Label(tile_row, text=label).pack(side=tk.LEFT)
+            var = tk.DoubleVar(value=values.get(key, DEFAULT_TILE_SETTINGS[key]))
+            ttk.Entry(tile_row, textvariable=var, width=width).pack(side=tk.LEFT, padx=(3, 6))
+            tile_vars[key] = var
+        return tile_row, tile_vars
+
+    def _read_tile_settings(self, tile_vars):
+        """Reads tile inputs into template values; raises on invalid numbers."""
+        return {
+            "tile_spacing_x": max(0, int(tile_vars["tile_spacing_x"].get())),
+            "tile_spacing_y": max(0, int(tile_vars["tile_spacing_y"].get())),
+            "tile_angle": float(tile_vars["tile_angle"].get()),
+            "tile_stagger": max(0.0, min(1.0, float(tile_vars["tile_stagger"].get()))),
+        }
+
     # ------------------------------
     # Relative position helpers
     # ------------------------------
     def _get_text_size(self, text, font_size):
         try:
-            tmp_wm = Watermark(text=text, font_size=font_size, color=(255,255,255,255))
-            font = self.image_processor._load_font_with_fallbacks(tmp_wm)
-            base_img_size = self.original_image.size if getattr(self, 'original_image', None) else (100, 100)
-            tmp_img = Image.new('RGBA', base_img_size, (255, 255, 255, 0))
-            draw = ImageDraw.Draw(tmp_img)
-            bbox = draw.textbbox((0, 0), text, font=font)
-            return (bbox[2] - bbox[0], bbox[3] - bbox[1])
+            return self.image_processor.text_metrics.text_size(text, font_size)
         except Exception:
             return (100, 40)
 
+    def _get_watermark_size(self):
+        """Returns the layout size of the current watermark (text or logo) on the current image."""
+        if self.original_image:
+            try:
+                watermark = Watermark.from_settings(self._current_settings())
+                return self.image_processor.get_layout_size(watermark, self.original_image.size)
+            except Exception:
+                pass
+        return self._get_text_size(self.watermark_text.get(), self.font_size.get())
+
     def _compute_relative_from_current(self):
         try:
             if not getattr(self, 'original_image', None):
                 return (0.5, 0.5)
             img_w, img_h = self.original_image.size
-            txt_w, txt_h = self._get_text_size(self.watermark_text.get(), self.font_size.get())
+            txt_w, txt_h = self._get_watermark_size()
             pos = self.image_processor.calculate_position(
                 (img_w, img_h), (txt_w, txt_h), (self.watermark_position_mode, self.watermark_offset)
             )
@@ -846,6 +1206,81 @@ class MainWindow:
         except Exception:
             return (0.5, 0.5)
 
+    def _export_options(self):
+        """Returns the current export controls (naming, format, quality and size) as ExportOptions."""
+        try:
+            resize_value = int(self.resize_value.get())
+        except Exception:
+            resize_value = None
+        return ExportOptions(
+            fmt=self.export_format.get() or 'JPEG',
+            quality=self.export_quality.get(),
+            naming_rule=self.naming_rule.get() if hasattr(self, 'naming_rule') else 'original',
+            prefix=self.export_prefix.get() if hasattr(self, 'export_prefix') else '',
+            suffix=self.export_suffix.get() if hasattr(self, 'export_suffix') else '',
+            resize_mode=self.RESIZE_LABELS.get(self.resize_mode.get(), 'none') if hasattr(self, 'resize_mode') else 'none',
+            resize_value=resize_value,
+            encoder=self.encoder_settings
+        )
+
+    def _export_renditions(self):
+        """Returns the ExportOptions of the selected export profiles, or of the export settings panel if none."""
+        renditions = []
+        for name in self.config_manager.get_selected_export_profiles():
+            profile = self.config_manager.get_export_profile(name)
+            if profile is not None:
+                renditions.append(ExportOptions.from_dict(profile, name=name))
+        return renditions or [self._export_options()]
+
+    def _update_profiles_label(self):
+        names = self.config_manager.get_selected_export_profiles()
+        self.profiles_label_var.set("Profiles: " + ", ".join(names) if names else "Profiles: none (export settings above)")
+
+    def _current_settings(self):
+        """Returns the current watermark controls as a template-style settings dict."""
+        return {
+            "text": self.watermark_text.get(),
+            "font_size": self.font_size.get(),
+            "opacity": self.opacity.get(),
+            "color": self.watermark_color,
+            "position_mode": self.watermark_position_mode,
+            "offset_x": self.watermark_offset.get("x", 0),
+            "offset_y": self.watermark_offset.get("y", 0),
+            "rotation": self._get_rotation(),
+            **self.tile_settings,
+            **self.effect_settings,
+            **self._logo_settings(),
+        }
+
+    def run_preflight(self):
+        """Plans the export of all imported images from their headers only."""
+        if not self.filepaths:
+            return None
+        from core.preflight import PreflightPlanner
+        planner = PreflightPlanner(self.image_processor)
+        try:
+            return planner.plan(
+                self.filepaths,
+                self._current_settings(),
+                states=self.image_states,
+                profiles=self._export_renditions()
+            )
+        except Exception as e:
+            print(f"Error running pre-flight: {e}")
+            return None
+
+    def show_preflight(self):
+        """Shows the pre-flight estimate for exporting all imported images."""
+        if not self.filepaths:
+            messagebox.showwarning("Pre-flight", "No images to export.")
+            return
+        self.save_current_image_state()
+        report = self.run_preflight()
+        if report is None:
+            messagebox.showerror("Pre-flight", "Pre-flight check failed. Please check errors and try again.")
+            return
+        messagebox.showinfo("Pre-flight", report.summary())
+
     def rgb_to_hex(self, rgb):
         r, g, b = rgb
         return f"#{r:02x}{g:02x}{b:02x}"
@@ -871,75 +1306,58 @@ class MainWindow:
                 messagebox.showerror("Invalid Output Folder", "To prevent overwriting originals, exporting to the source folder is not allowed. Please choose a different folder.")
                 continue
             break
-        success_count = 0
-        failure_count = 0
-        for path in self.filepaths:
-            try:
-                original_image = self.image_processor.load_image(path)
-                if original_image is None: continue
-
-                # Build watermark from per-image state if available; otherwise use current settings
-                state = self.image_states.get(path) if hasattr(self, 'image_states') else None
-                if state:
-                    text = state.get("text", self.watermark_text.get())
-                    font_size = state.get("font_size", self.font_size.get())
-                    opacity_val = state.get("opacity", self.opacity.get())
-                    if isinstance(opacity_val, (int, float)) and opacity_val > 100:
-                        alpha = int(max(0, min(255, int(opacity_val))))
-                    else:
-                        alpha = int(max(0, min(100, int(opacity_val))) * 255 / 100)
-                    color_rgb = tuple(state.get("color", self.watermark_color))
-                    position_mode = state.get("position_mode", self.watermark_position_mode)
-                    offset = {"x": state.get("offset_x", self.watermark_offset.get("x", 0)), "y": state.get("offset_y", self.watermark_offset.get("y", 0))}
-                else:
-                    text = self.watermark_text.get()
-                    font_size = self.font_size.get()
-                    alpha = int(max(0, min(100, self.opacity.get())) * 255 / 100)
-                    color_rgb = self.watermark_color
-                    position_mode = self.watermark_position_mode
-                    offset = self.watermark_offset
-
-                watermark = Watermark(
-                    text=text,
-                    font_size=font_size,
-                    color=color_rgb + (alpha,),
-                    position=(position_mode, offset)
-                )
-
-                watermarked_image = self.image_processor.apply_watermark(original_image, watermark)
-
-                base_filename = os.path.basename(path)
-                name, ext = os.path.splitext(base_filename)
-                rule = self.naming_rule.get() if hasattr(self, 'naming_rule') else 'original'
-                prefix = self.export_prefix.get() if hasattr(self, 'export_prefix') else ''
-                suffix = self.export_suffix.get() if hasattr(self, 'export_suffix') else ''
-                fmt = (self.export_format.get() if hasattr(self, 'export_format') else 'JPEG').upper()
-                output_ext = '.jpg' if fmt == 'JPEG' else '.png'
-                if rule == 'prefix':
-                    new_name = f"{prefix}{name}{output_ext}"
-                elif rule == 'suffix':
-                    new_name = f"{name}{suffix}{output_ext}"
-                else:
-                    new_name = f"{name}{output_ext}"
-                new_filename = new_name
-                output_path = os.path.join(output_dir, new_filename)
-
-                self.image_processor.save_image(
-                    watermarked_image, 
-                    output_path, 
-                    self.export_format.get(), 
-                    self.export_quality.get()
-                )
-                print(f"Successfully exported {output_path}")
-                success_count += 1
-            except Exception as e:
-                print(f"Error exporting {path}: {e}")
-                failure_count += 1
+        # Pre-flight: warn about unreadable files and output name collisions before writing anything
+        self.save_current_image_state()
+        report = self.run_preflight()
+        if report is not None and report.has_problems:
+            proceed = messagebox.askyesno(
+                "Pre-flight Check",
+                report.summary() + "\n\nColliding outputs will overwrite each other. Export anyway?")
+            if not proceed:
+                return
+        # Loaded on first export: export_job pulls in multiprocessing (~20 ms at startup)
+        from core.export_job import ExportJob
+        from core.file_writer import WriteBehindWriter
+        # Encoded files are committed by background I/O threads while the next photo renders
+        writer = WriteBehindWriter()
+        exporter = BatchExporter(self.image_processor, self._export_renditions(), writer=writer,
+                                 prefetch_bytes=128 * 1024 * 1024, profiler=self.memory)
+        # Progress is checkpointed in the output folder, so an interrupted export can be resumed
+        job = ExportJob(exporter, output_dir)
+        default_settings = self._current_settings()
+        resume = False
+        done = job.resumable(self.filepaths, default_settings, states=self.image_states)
+        if done:
+            resume = messagebox.askyesno(
+                "Resume Export",
+                f"An earlier export of these photos to this folder stopped after {done} of {len(self.filepaths)} photo(s).\n\n"
+                "Resume it (finished photos are skipped)? Choose No to export everything again.")
+        try:
+            written, failures, skipped, report_path = job.run(
+                self.filepaths, default_settings, states=self.image_states, resume=resume)
+        except Exception as e:
+            # E.g. an output folder that cannot be written, or worker processes that died
+            print(f"Error exporting to {output_dir}: {e}")
+            msg = f"The export stopped: {e}"
+            if job.report_path:
+                msg += f"\n\nSee {job.report_path} for the photos that were not exported."
+            messagebox.showerror("Export Failed", msg)
+            return
+        finally:
+            writer.close()
+        for output_path in written:
+            print(f"Successfully exported {output_path}")
+        success_count = len(self.filepaths) - len(failures)
+        failure_count = len(failures)
         # Show summary dialog
         if success_count > 0:
             msg = f"Successfully exported {success_count} photo(s)."
+            if skipped:
+                msg += f"\n{skipped} of them were already exported by the earlier run."
             if failure_count > 0:
                 msg += f"\n{failure_count} photo(s) failed."
+                if report_path:
+                    msg += f"\nSee {report_path} for details."
             messagebox.showinfo("Export Complete", msg)
         else:
             messagebox.showerror("Export Failed", "No photos were exported. Please check errors and try again.")
@@ -965,39 +1383,12 @@ class MainWindow:
                 messagebox.showerror("Invalid Output Folder", "To prevent overwriting originals, exporting to the source folder is not allowed. Please choose a different folder.")
                 continue
             break
-        # Determine output filename based on naming rule and enforce extension by selected format
-        base_filename = os.path.basename(self.current_image_path)
-        name = os.path.splitext(base_filename)[0]
-        rule = self.naming_rule.get() if hasattr(self, 'naming_rule') else 'original'
-        prefix = self.export_prefix.get() if hasattr(self, 'export_prefix') else ''
-        suffix = self.export_suffix.get() if hasattr(self, 'export_suffix') else ''
-        fmt = (self.export_format.get() or 'JPEG').upper()
-        output_ext = '.jpg' if fmt == 'JPEG' else '.png'
-        if rule == 'prefix':
-            new_name = f"{prefix}{name}{output_ext}"
-        elif rule == 'suffix':
-            new_name = f"{name}{suffix}{output_ext}"
-        else:
-            new_name = f"{name}{output_ext}"
-        output_path = os.path.join(output_dir, new_name)
-
-        alpha = int(max(0, min(100, self.opacity.get())) * 255 / 100)
-        watermark = Watermark(
-            text=self.watermark_text.get(),
-            font_size=self.font_size.get(),
-            color=self.watermark_color + (alpha,),
-            position=(self.watermark_position_mode, self.watermark_offset)
-        )
+        # Output name, format and size follow the export settings
+        exporter = BatchExporter(self.image_processor, self._export_renditions())
 
         try:
-            watermarked_image = self.image_processor.apply_watermark(self.original_image.copy(), watermark)
-            self.image_processor.save_image(
-                watermarked_image,
-                output_path,
-                fmt,
-                self.export_quality.get()
-            )
-            print(f"Successfully exported {output_path}")
+            for output_path in exporter.export_file(self.current_image_path, self._current_settings(), output_dir):
+                print(f"Successfully exported {output_path}")
             messagebox.showinfo("Export Complete", "Successfully exported 1 photo.")
         except Exception as e:
             print(f"Error exporting single image: {e}")
@@ -1010,6 +1401,10 @@ class MainWindow:
         self.is_dragging = True
         self.drag_start_pos["x"] = event.x
         self.drag_start_pos["y"] = event.y
+
+        # In tiled mode dragging shifts the pattern origin instead of switching to manual
+        if self.watermark_position_mode == "tiled":
+            return
         
         # Calculate current watermark position in image coordinates
         if self.original_image and self.watermark_text.get():
@@ -1017,22 +1412,8 @@ class MainWindow:
             current_mode = self.watermark_position_mode
             current_offset = self.watermark_offset.copy()
             
-            # Calculate the actual position of the watermark
-            from core.watermark import Watermark
-            temp_watermark = Watermark(
-                text=self.watermark_text.get(),
-                font_size=self.font_size.get(),
-                color=(255, 255, 255, 255),
-                position=(current_mode, current_offset)
-            )
-            
-            # Get the actual position from the image processor
-            from PIL import ImageDraw, ImageFont
-            font = self.image_processor._load_font_with_fallbacks(temp_watermark)
-            draw = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
-            text_bbox = draw.textbbox((0, 0), temp_watermark.text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
+            # Get the actual position from the image processor (cached text metrics)
+            text_width, text_height = self._get_watermark_size()
             
             actual_pos = self.image_processor.calculate_position(
                 self.original_image.size,
@@ -1057,7 +1438,7 @@ class MainWindow:
             self.watermark_offset["y"] += dy
             self.drag_start_pos["x"] = event.x
             self.drag_start_pos["y"] = event.y
-            self.preview_watermark()
+            self.schedule_preview()
 
     def on_drag_end(self, event):
         """Ends the dragging process."""
@@ -1075,16 +1456,208 @@ class MainWindow:
 
     def choose_color_and_preview(self):
         """Opens a color chooser and triggers a preview."""
-        color_code = colorchooser.askcolor(title="Choose watermark color")
+        color_code = self.ask_color(title="Choose watermark color")
         if color_code and color_code[0]:
             self.watermark_color = tuple(int(c) for c in color_code[0])
             self.preview_watermark()
 
+    def edit_effects(self):
+        """Open a dialog to edit the outline (stroke) and drop-shadow effects."""
+        dlg = tk.Toplevel(self.root)
+        dlg.title("Text Effects")
+        dlg.transient(self.root)
+        dlg.grab_set()
+        self.center_window(dlg, width=360, height=330)
+
+        container = ttk.Frame(dlg, padding=15)
+        container.pack(fill=tk.BOTH, expand=True)
+        fx = self.effect_settings
+        colors = {"stroke_color": tuple(fx["stroke_color"]), "shadow_color": tuple(fx["shadow_color"])}
+
+        def color_row(parent, key, label):
+            row = ttk.Frame(parent)
+            row.pack(fill=tk.X, pady=(8, 0))
+            ttk.Label(row, text=label).pack(side=tk.LEFT)
+            preview = tk.Label(row, text=" ", bg=self.rgb_to_hex(colors[key]), width=2, relief='solid')
+            preview.pack(side=tk.LEFT, padx=(5, 8))
+            def pick():
+                code = self.ask_color(title=label, parent=dlg)
+                if code and code[0]:
+                    colors[key] = tuple(int(c) for c in code[0])
+                    preview.configure(bg=self.rgb_to_hex(colors[key]))
+            ttk.Button(row, text="Choose...", command=pick, style='Secondary.TButton').pack(side=tk.LEFT)
+
+        def spin_row(parent, label, var, from_, to):
+            row = ttk.Frame(parent)
+            row.pack(fill=tk.X, pady=(8, 0))
+            ttk.Label(row, text=label).pack(side=tk.LEFT)
+            ttk.Spinbox(row, from_=from_, to=to, textvariable=var, width=6).pack(side=tk.RIGHT)
+
+        ttk.Label(container, text="Outline:", font=('Segoe UI', 9, 'bold')).pack(anchor='w')
+        stroke_var = tk.IntVar(value=int(fx["stroke_width"]))
+        spin_row(container, "Width (px, 0 = off):", stroke_var, 0, 50)
+        color_row(container, "stroke_color", "Outline color:")
+
+        shadow_var = tk.BooleanVar(value=bool(fx["shadow"]))
+        ttk.Checkbutton(container, text="Drop shadow", variable=shadow_var).pack(anchor='w', pady=(12, 0))
+        color_row(container, "shadow_color", "Shadow color:")
+        shadow_opacity_var = tk.IntVar(value=int(fx["shadow_opacity"]))
+        spin_row(container, "Shadow opacity (0-100):", shadow_opacity_var, 0, 100)
+        offset_row = ttk.Frame(container)
+        offset_row.pack(fill=tk.X, pady=(8, 0))
+        ttk.Label(offset_row, text="Offset X/Y, blur:").pack(side=tk.LEFT)
+        shadow_blur_var = tk.IntVar(value=int(fx["shadow_blur"]))
+        ttk.Spinbox(offset_row, from_=0, to=50, textvariable=shadow_blur_var, width=4).pack(side=tk.RIGHT)
+        shadow_dy_var = tk.IntVar(value=int(fx["shadow_offset_y"]))
+        ttk.Spinbox(offset_row, from_=-100, to=100, textvariable=shadow_dy_var, width=4).pack(side=tk.RIGHT, padx=(0, 5))
+        shadow_dx_var = tk.IntVar(value=int(fx["shadow_offset_x"]))
+        ttk.Spinbox(offset_row, from_=-100, to=100, textvariable=shadow_dx_var, width=4).pack(side=tk.RIGHT, padx=(0, 5))
+
+        def do_apply():
+            try:
+                self.effect_settings = {
+                    "stroke_width": max(0, int(stroke_var.get())),
+                    "stroke_color": list(colors["stroke_color"]),
+                    "shadow": bool(shadow_var.get()),
+                    "shadow_color": list(colors["shadow_color"]),
+                    "shadow_opacity": max(0, min(100, int(shadow_opacity_var.get()))),
+                    "shadow_offset_x": int(shadow_dx_var.get()),
+                    "shadow_offset_y": int(shadow_dy_var.get()),
+                    "shadow_blur": max(0, int(shadow_blur_var.get())),
+                }
+            except (tk.TclError, ValueError):
+                messagebox.showerror("Text Effects", "Effect values must be whole numbers.", parent=dlg)
+                return
+            self.preview_watermark()
+            dlg.destroy()
+
+        btns = ttk.Frame(container)
+        btns.pack(fill=tk.X, pady=(15, 0))
+        ttk.Button(btns, text="Apply", command=do_apply, style='Secondary.TButton').pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        ttk.Button(btns, text="Cancel", command=dlg.destroy, style='Secondary.TButton').pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(5, 0))
+
+    def edit_encoder_settings(self):
+        """Open a dialog for the per-format encoder settings used by exports."""
+        dlg = tk.Toplevel(self.root)
+        dlg.title("Encoder Settings")
+        dlg.transient(self.root)
+        dlg.grab_set()
+        self.center_window(dlg, width=380, height=330)
+
+        container = ttk.Frame(dlg, padding=15)
+        container.pack(fill=tk.BOTH, expand=True)
+
+        def current(fmt, key):
+            return self.encoder_settings.get(fmt, {}).get(key, DEFAULT_ENCODER_SETTINGS[fmt][key])
+
+        ttk.Label(container, text="JPEG:", font=('Segoe UI', 9, 'bold')).pack(anchor='w')
+        jpeg_row = ttk.Frame(container)
+        jpeg_row.pack(fill=tk.X, pady=(5, 10))
+        optimize_var = tk.BooleanVar(value=current('JPEG', 'optimize'))
+        ttk.Checkbutton(jpeg_row, text="Optimize", variable=optimize_var).pack(side=tk.LEFT)
+        progressive_var = tk.BooleanVar(value=current('JPEG', 'progressive'))
+        ttk.Checkbutton(jpeg_row, text="Progressive", variable=progressive_var).pack(side=tk.LEFT, padx=(10, 0))
+        subsampling_var = tk.StringVar(value=current('JPEG', 'subsampling'))
+        ttk.Combobox(jpeg_row, textvariable=subsampling_var, values=["4:4:4", "4:2:2", "4:2:0"],
+                     state="readonly", width=6).pack(side=tk.LEFT, padx=(10, 0))
+
+        ttk.Label(container, text="PNG:", font=('Segoe UI', 9, 'bold')).pack(anchor='w')
+        png_row = ttk.Frame(container)
+        png_row.pack(fill=tk.X, pady=(5, 10))
+        ttk.Label(png_row, text="Compress level (0-9):").pack(side=tk.LEFT)
+        compress_var = tk.IntVar(value=current('PNG', 'compress_level'))
+        ttk.Spinbox(png_row, from_=0, to=9, textvariable=compress_var, width=4).pack(side=tk.LEFT, padx=(5, 0))
+
+        webp_vars = {}
+        if 'WEBP' in OUTPUT_FORMATS:
+            ttk.Label(container, text="WebP:", font=('Segoe UI', 9, 'bold')).pack(anchor='w')
+            webp_row = ttk.Frame(container)
+            webp_row.pack(fill=tk.X, pady=(5, 10))
+            ttk.Label(webp_row, text="Effort (0-6):").pack(side=tk.LEFT)
+            webp_vars['method'] = tk.IntVar(value=current('WEBP', 'method'))
+            ttk.Spinbox(webp_row, from_=0, to=6, textvariable=webp_vars['method'], width=4).pack(side=tk.LEFT, padx=(5, 10))
+            webp_vars['lossless'] = tk.BooleanVar(value=current('WEBP', 'lossless'))
+            ttk.Checkbutton(webp_row, text="Lossless", variable=webp_vars['lossless']).pack(side=tk.LEFT)
+
+        ttk.Label(container, text="Lower effort and compression levels export faster but write larger files.",
+                  wraplength=340, foreground='#6c757d').pack(anchor='w', pady=(0, 10))
+
+        def do_apply():
+            try:
+                settings = {
+                    'JPEG': {'optimize': optimize_var.get(), 'progressive': progressive_var.get(),
+                             'subsampling': subsampling_var.get()},
+                    'PNG': {'compress_level': max(0, min(9, int(compress_var.get())))},
+                }
+                if webp_vars:
+                    settings['WEBP'] = {'method': max(0, min(6, int(webp_vars['method'].get()))),
+                                        'lossless': webp_vars['lossless'].get()}
+            except Exception as e:
+                messagebox.showerror("Encoder Settings", f"Invalid value: {e}", parent=dlg)
+                return
+            self.encoder_settings = settings
+            dlg.destroy()
+
+        def do_reset():
+            self.encoder_settings = {}
+            dlg.destroy()
+
+        btns = ttk.Frame(container)
+        btns.pack(fill=tk.X)
+        ttk.Button(btns, text="Apply", command=do_apply, style='Secondary.TButton').pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        ttk.Button(btns, text="Defaults", command=do_reset, style='Secondary.TButton').pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5)
+        ttk.Button(btns, text="Cancel", command=dlg.destroy, style='Secondary.TButton').pack(side=tk.RIGHT, expand=True, fill=tk.X, padx=(5, 0))
+
+    def choose_logo_and_preview(self):
+        """Opens a file dialog to pick a logo image and switches to an image watermark."""
+        filetypes = (('Image files', '*.png *.jpg *.jpeg *.bmp *.tiff'), ('All files', '*.*'))
+        path = filedialog.askopenfilename(title='Select a logo image', filetypes=filetypes)
+        if path:
+            self.logo_path = path
+            self.watermark_type.set("image")
+            self.preview_watermark()
+
+    def _logo_settings(self):
+        """Returns the current logo watermark settings as template values."""
+        try:
+            scale = max(1, min(100, int(self.logo_scale.get())))
+        except (tk.TclError, ValueError):
+            scale = 20
+        return {
+            "watermark_type": self.watermark_type.get() if self.logo_path else "text",
+            "image_path": self.logo_path,
+            "image_scale": scale / 100.0,
+        }
+
+    def _get_rotation(self):
+        """Returns the current rotation in degrees (0 while the input is being edited)."""
+        try:
+            return int(self.rotation.get())
+        except (tk.TclError, ValueError):
+            return 0
+
+    def _set_logo_settings(self, settings):
+        """Restores logo watermark settings from a template or image state."""
+        self.logo_path = settings.get("image_path")
+        self.logo_scale.set(int(round(float(settings.get("image_scale", 0.2)) * 100)))
+        self.watermark_type.set(settings.get("watermark_type", "text") if self.logo_path else "text")
+
     def schedule_preview(self, *args):
-        """Schedules a watermark preview."""
+        """
+        Progressive preview for continuous input (sliders, dragging, panning): a
+        draft is shown as soon as Tk is idle, and the full-quality render follows
+        once input has stopped for REFINE_DELAY_MS.
+        """
+        if self.draft_job is None:
+            # One draft per burst of events handled together
+            self.draft_job = self.root.after_idle(self._draft_preview)
         if self.preview_job:
             self.root.after_cancel(self.preview_job)
-        self.preview_job = self.root.after(50, self.preview_watermark) # Short delay for responsiveness
+        self.preview_job = self.root.after(self.REFINE_DELAY_MS, self.preview_watermark)
+
+    def _draft_preview(self):
+        self.draft_job = None
+        self.preview_watermark(draft=True)
 
     def import_images(self, filepaths=None):
         """Opens a file dialog to import images or accepts a list of filepaths."""
@@ -1103,8 +1676,9 @@ class MainWindow:
                     new_paths.append(p)
                     self.filepath_set.add(norm)
             if new_paths:
-                self.filepaths.extend(new_paths)
-                self.update_thumbnail_list()
+                with self.memory.stage("import"):
+                    self.filepaths.extend(new_paths)
+                    self.thumbnail_list.append(new_paths)
 
     def import_folder(self):
         """Opens a dialog to select a folder and imports all valid images from it."""
@@ -1118,51 +1692,80 @@ class MainWindow:
 
     def update_thumbnail_list(self):
         """Updates the list of thumbnails."""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.tk_thumbnails.clear()
-        for i, path in enumerate(self.filepaths):
+        self.thumbnail_list.set_paths(self.filepaths)
+
+    def save_session(self):
+        """Saves the image list, per-image states and current settings to a session file."""
+        from core.session import save_session, SESSION_EXTENSION
+        if not self.filepaths:
+            messagebox.showwarning("Save Session", "No images to save.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save Session", defaultextension=SESSION_EXTENSION,
+            filetypes=(('Session files', '*' + SESSION_EXTENSION), ('All files', '*.*')))
+        if not path:
+            return
+        self.save_current_image_state()
+        try:
+            save_session(path, self.filepaths, self.image_states, self._current_settings(), self.current_image_path)
+            print(f"Saved session {path}")
+        except Exception as e:
+            print(f"Error saving session {path}: {e}")
+            messagebox.showerror("Save Session", f"Failed to save session: {e}")
+
+    def open_session(self):
+        """Opens a session file; the list fills in chunk by chunk while the UI stays responsive."""
+        from core.session import SessionReader, SESSION_EXTENSION
+        path = filedialog.askopenfilename(
+            title="Open Session", filetypes=(('Session files', '*' + SESSION_EXTENSION), ('All files', '*.*')))
+        if not path:
+            return
+        if self.filepaths and not messagebox.askyesno("Open Session", "Replace the current images with the session?"):
+            return
+        try:
+            reader = SessionReader(path)
+        except Exception as e:
+            print(f"Error opening session {path}: {e}")
+            messagebox.showerror("Open Session", f"Failed to open session: {e}")
+            return
+        self.clear_images()
+        if reader.settings:
+            self.apply_template_settings(reader.settings)
+        self._load_session_chunk(reader, 0)
+
+    def _load_session_chunk(self, reader, index):
+        with self.memory.stage("open session: chunk"):
+            self._read_session_chunk(reader, index)
+
+    def _read_session_chunk(self, reader, index):
+        try:
+            entries = reader.read_chunk(index)
+        except Exception as e:
+            print(f"Error reading session {reader.path}: {e}")
+            reader.close()
+            return
+        new_paths = []
+        for entry in entries:
             try:
-                img = self.image_processor.load_image(path)
-                if img is None: continue
-                thumbnail = self.image_processor.create_thumbnail(img.copy(), (100, 100))
-                tk_thumb = ImageTk.PhotoImage(thumbnail)
-                self.tk_thumbnails.append(tk_thumb)
-                thumb_frame = ttk.Frame(self.scrollable_frame, style='Card.TFrame')
-                thumb_frame.pack(fill=tk.X, pady=3, padx=5)
-                
-                # Fixed-size image container and label (uniform thumbnail area)
-                img_container = tk.Frame(thumb_frame, width=110, height=110, bg='white', relief='solid', borderwidth=1)
-                img_container.pack(side=tk.LEFT, padx=8, pady=8)
-                img_container.pack_propagate(False)
-
-                label = tk.Label(img_container, image=tk_thumb, bg='white')
-                label.pack(expand=True)
-                label.bind("<Button-1>", lambda e, p=path: self.on_image_select(p))
-                label.bind("<Button-3>", lambda e, p=path: self.show_context_menu(e, p))  # Right-click for context menu
-                img_container.bind("<Button-1>", lambda e, p=path: self.on_image_select(p))
-                img_container.bind("<Button-3>", lambda e, p=path: self.show_context_menu(e, p))  # Right-click for context menu
-
-                # Fixed-size text container; ensure wrap within available width
-                text_container = tk.Frame(thumb_frame, width=160, height=110, bg='white')
-                text_container.pack(side=tk.LEFT, padx=(0, 8), pady=8)
-                text_container.pack_propagate(False)
-
-                # Format filename: insert newline after every 15 characters for controlled wrapping
-                base_name = os.path.basename(path)
-                display_name = '\n'.join([base_name[i:i+15] for i in range(0, len(base_name), 15)])
-
-                filename_label = tk.Label(text_container, text=display_name, 
-                                        wraplength=150, font=('Segoe UI', 9), 
-                                        bg='white', fg='#212529', justify='center', anchor='center')
-                # Add extra right padding to visually shift content slightly left
-                filename_label.pack(fill=tk.BOTH, expand=True, padx=(0, 10))
-                filename_label.bind("<Button-1>", lambda e, p=path: self.on_image_select(p))
-                filename_label.bind("<Button-3>", lambda e, p=path: self.show_context_menu(e, p))  # Right-click for context menu
-                text_container.bind("<Button-1>", lambda e, p=path: self.on_image_select(p))
-                text_container.bind("<Button-3>", lambda e, p=path: self.show_context_menu(e, p))  # Right-click for context menu
-            except Exception as e:
-                print(f"Error processing {path}: {e}")
+                norm = os.path.normcase(os.path.abspath(entry.path))
+            except Exception:
+                norm = entry.path
+            if norm in self.filepath_set:
+                continue
+            self.filepath_set.add(norm)
+            new_paths.append(entry.path)
+            if entry.state is not None:
+                self.image_states.set(entry.path, entry.state)
+            if entry.fingerprint is not None:
+                self.thumbnail_list.fingerprints[entry.path] = entry.fingerprint
+        self.filepaths.extend(new_paths)
+        self.thumbnail_list.append(new_paths)
+        if reader.current in new_paths:
+            self.on_image_select(reader.current)
+        if index + 1 < reader.chunk_count:
+            self.root.after(1, self._load_session_chunk, reader, index + 1)
+        else:
+            reader.close()
 
     def on_image_select(self, path):
         """Handles image selection."""
@@ -1173,57 +1776,144 @@ class MainWindow:
         self.update_position_grid_selection(self.watermark_position_mode)
         # Clear any lingering focus ring from previous button
         self.clear_position_grid_focus()
+        with self.memory.stage("select image"):
+            self._show_image(path)
+
+    def _show_image(self, path):
         try:
             self.original_image = self.image_processor.load_image(path)
             if self.original_image is None: return
-            # If using defaults (no prior state), auto-derive an initial font size from image size
-            if path not in self.image_states:
-                img_w, img_h = self.original_image.size
-                # Use shorter side with a sensible ratio for legibility
-                base = min(img_w, img_h)
-                estimated = max(14, int(base * 0.05))  # ~5% of shorter edge
-                self.font_size.set(estimated)
+            # Half-resolution levels are built in the background for fast zooming
+            if self.image_pyramid is not None:
+                self.image_pyramid.cancel()
+            self.image_pyramid = ImagePyramid(self.original_image)
+            self.original_image = self.image_pyramid.levels[0]
+            self.zoom = None
+            self.view_center = None
+            # If using defaults (no prior state) or an auto-sized template, derive the font size from the image size
+            state = self.image_states.get(path)
+            if state is None or state.get("font_size_auto"):
+                # Use shorter side with a sensible ratio for legibility (~5% of shorter edge)
+                self.font_size.set(auto_font_size(self.original_image.size))
             self.preview_watermark()
         except Exception as e:
             print(f"Error displaying main image {path}: {e}")
 
-    def display_image_in_workspace(self, img):
-        """Displays an image in the main workspace."""
+    def _workspace_size(self):
         # Use fixed preview area's size to compute scaling, avoid layout growth
         width = self.image_display_frame.winfo_width()
         height = self.image_display_frame.winfo_height()
         if width <= 1 or height <= 1:
             width = getattr(self, 'preview_width', 900)
             height = getattr(self, 'preview_height', 600)
-        workspace_size = (width, height)
-
-        self.display_to_original_ratio = min(
-            workspace_size[0] / self.original_image.width,
-            workspace_size[1] / self.original_image.height
-        ) if self.original_image else 1.0
-        display_img = self.image_processor.resize_to_fit(img, workspace_size)
-        self.main_photo_image = ImageTk.PhotoImage(display_img)
-        self.image_label.config(image=self.main_photo_image, text="")
-
-    def preview_watermark(self):
-        """Applies the watermark for preview."""
-        if not self.original_image:
+        return (width, height)
+
+    def _fit_scale(self):
+        ws_w, ws_h = self._workspace_size()
+        img_w, img_h = self.original_image.size
+        # Never enlarge images smaller than the workspace when fitting
+        return min(1.0, ws_w / img_w, ws_h / img_h)
+
+    def _compute_viewport(self):
+        """Returns (box, scale): the visible source rectangle and output pixels per source pixel."""
+        ws_w, ws_h = self._workspace_size()
+        img_w, img_h = self.original_image.size
+        scale = self._fit_scale() if self.zoom is None else self.zoom
+        view_w = min(img_w, ws_w / scale)
+        view_h = min(img_h, ws_h / scale)
+        cx, cy = self.view_center or (img_w / 2, img_h / 2)
+        cx = max(view_w / 2, min(img_w - view_w / 2, cx))
+        cy = max(view_h / 2, min(img_h - view_h / 2, cy))
+        self.view_center = (cx, cy)
+        return (cx - view_w / 2, cy - view_h / 2, cx + view_w / 2, cy + view_h / 2), scale
+
+    def display_image_in_workspace(self, watermark=None, draft=False):
+        """
+        Renders only the visible part of the current image, with the watermark, into the
+        workspace. The render runs on the preview thread and supersedes any earlier one;
+        the frame is shown by _poll_preview once it is ready.
+        """
+        box, scale = self._compute_viewport()
+        self.display_to_original_ratio = scale
+        self.preview_renderer.submit(self.image_pyramid, box, scale, watermark, draft)
+        self.zoom_label_var.set("Fit" if self.zoom is None else f"{int(round(scale * 100))}%")
+        if self.render_poll_job is None:
+            self.render_poll_job = self.root.after(self.RENDER_POLL_MS, self._poll_preview)
+
+    def _poll_preview(self):
+        """Shows the newest finished preview frame; keeps polling while a render is outstanding."""
+        self.render_poll_job = None
+        frame = self.preview_renderer.poll()
+        if frame is not None:
+            self.main_photo_image = ImageTk.PhotoImage(frame)
+            self.image_label.config(image=self.main_photo_image, text="")
+        if self.preview_renderer.busy:
+            self.render_poll_job = self.root.after(self.RENDER_POLL_MS, self._poll_preview)
+
+    def preview_watermark(self, draft=False):
+        """Applies the watermark for preview (a quick, lower-quality render if `draft`)."""
+        if not draft:
+            # A full render supersedes any pending draft or refinement
+            for job in (self.draft_job, self.preview_job):
+                if job:
+                    self.root.after_cancel(job)
+            self.draft_job = self.preview_job = None
+        if not self.original_image or self.image_pyramid is None:
             return
 
         self.save_current_image_state()
 
-        position_tuple = (self.watermark_position_mode, self.watermark_offset)
+        # Snapshot the settings here: the render thread must not read Tk variables
+        # (it measures the render itself as the "preview" memory stage)
+        watermark = Watermark.from_settings(self._current_settings())
+        self.display_image_in_workspace(watermark, draft=draft)
 
-        alpha = int(max(0, min(100, self.opacity.get())) * 255 / 100)
-        watermark = Watermark(
-            text=self.watermark_text.get(),
-            font_size=self.font_size.get(),
-            color=self.watermark_color + (alpha,),
-            position=position_tuple
-        )
+    def set_zoom(self, zoom, anchor=None):
+        """Sets the preview zoom, keeping the source point under `anchor` (label coordinates) fixed."""
+        if not self.original_image:
+            return
+        box, old_scale = self._compute_viewport()
+        zoom = max(min(self._fit_scale(), 1.0), min(8.0, zoom))
+        if anchor is not None:
+            src_x = box[0] + anchor[0] / old_scale
+            src_y = box[1] + anchor[1] / old_scale
+            ws_w, ws_h = self._workspace_size()
+            view_w = min(self.original_image.width, ws_w / zoom)
+            view_h = min(self.original_image.height, ws_h / zoom)
+            self.view_center = (src_x - anchor[0] / zoom + view_w / 2, src_y - anchor[1] / zoom + view_h / 2)
+        self.zoom = zoom
+        self.schedule_preview()
+
+    def zoom_by(self, factor, anchor=None):
+        if not self.original_image:
+            return
+        current = self._fit_scale() if self.zoom is None else self.zoom
+        self.set_zoom(current * factor, anchor)
+
+    def zoom_to_fit(self):
+        self.zoom = None
+        self.view_center = None
+        self.preview_watermark()
 
-        watermarked_image = self.image_processor.apply_watermark(self.original_image.copy(), watermark)
-        self.display_image_in_workspace(watermarked_image)
+    def on_zoom_wheel(self, event):
+        """Zooms in or out around the cursor with Ctrl + mouse wheel."""
+        self.zoom_by(1.25 if event.delta > 0 else 1 / 1.25, anchor=(event.x, event.y))
+        # Keep the thumbnail list from scrolling as well
+        return "break"
+
+    def on_pan_start(self, event):
+        self.pan_start = (event.x, event.y)
+
+    def on_pan_motion(self, event):
+        """Pans the zoomed preview by dragging with the right or middle mouse button."""
+        if not self.original_image or self.pan_start is None or self.view_center is None:
+            return
+        scale = self.display_to_original_ratio
+        dx = (event.x - self.pan_start[0]) / scale
+        dy = (event.y - self.pan_start[1]) / scale
+        self.pan_start = (event.x, event.y)
+        self.view_center = (self.view_center[0] - dx, self.view_center[1] - dy)
+        self.schedule_preview()
 
     def run(self):
         """Runs the application loop."""
@@ -1232,22 +1922,17 @@ class MainWindow:
     def save_current_image_state(self):
         """Saves the watermark state for the current image."""
         if self.current_image_path:
-            self.image_states[self.current_image_path] = {
-                "text": self.watermark_text.get(),
-                "font_size": self.font_size.get(),
-                "opacity": self.opacity.get(),
-                "color": self.watermark_color,
-                "position_mode": self.watermark_position_mode,
-                "offset_x": self.watermark_offset["x"],
-                "offset_y": self.watermark_offset["y"],
-            }
+            self.image_states.set(self.current_image_path, self._current_settings())
 
     def load_image_state(self, image_path):
         """Loads the watermark state for the given image path."""
         state = self.image_states.get(image_path)
         if state:
             self.watermark_text.set(state.get("text", ""))
-            self.font_size.set(state.get("font_size", 40))
+            if state.get("font_size_auto") and self.original_image is not None:
+                self.font_size.set(auto_font_size(self.original_image.size))
+            else:
+                self.font_size.set(state.get("font_size", 40))
             # migrate opacity from 0-255 to 0-100 if needed
             opacity_val = state.get("opacity", 50)
             if isinstance(opacity_val, (int, float)):
@@ -1262,6 +1947,10 @@ class MainWindow:
             self.watermark_position_mode = state.get("position_mode", "bottom-right")
             self.watermark_offset["x"] = state.get("offset_x", 0)
             self.watermark_offset["y"] = state.get("offset_y", 0)
+            self.tile_settings = {k: state.get(k, v) for k, v in DEFAULT_TILE_SETTINGS.items()}
+            self._set_logo_settings(state)
+            self.rotation.set(int(round(float(state.get("rotation", 0) or 0))))
+            self.effect_settings = {k: state.get(k, v) for k, v in DEFAULT_EFFECT_SETTINGS.items()}
         else:
             # Reset to default if no state is found
             self.watermark_text.set("Your Watermark")
@@ -1270,6 +1959,10 @@ class MainWindow:
             self.watermark_color = (255, 255, 255)
             self.watermark_position_mode = "bottom-right"
             self.watermark_offset = {"x": 0, "y": 0}
+            self.tile_settings = dict(DEFAULT_TILE_SETTINGS)
+            self._set_logo_settings({})
+            self.rotation.set(0)
+            self.effect_settings = dict(DEFAULT_EFFECT_SETTINGS)
 
     def on_drop(self, event):
         """Handles files dropped onto the window."""
@@ -1287,6 +1980,15 @@ class MainWindow:
     def show_context_menu(self, event, image_path):
         """Shows the right-click context menu for an image."""
         context_menu = tk.Menu(self.root, tearoff=0)
+        targets = self._bulk_targets(image_path)
+        label = f"{len(targets)} Images" if len(targets) > 1 else "Image"
+        template_name = self.selected_template_var.get()
+        context_menu.add_command(label=f"📋 Apply Template '{template_name}' to {label}",
+                                 command=lambda: self.apply_template_to_images(targets))
+        context_menu.add_command(label=f"🌓 Set Opacity for {label}...", command=lambda: self.set_images_opacity(targets))
+        context_menu.add_command(label=f"↔️ Shift Position of {label}...", command=lambda: self.shift_images_position(targets))
+        context_menu.add_separator()
+        context_menu.add_command(label="☑️ Select All", command=self.thumbnail_list.select_all)
         context_menu.add_command(label="🗑️ Remove Image", command=lambda: self.remove_image(image_path))
         
         try:
@@ -1294,6 +1996,56 @@ class MainWindow:
         finally:
             context_menu.grab_release()
 
+    def _bulk_targets(self, image_path):
+        """The selected images if the clicked one is part of the selection, else just the clicked one."""
+        if image_path in self.thumbnail_list.selection:
+            return self.thumbnail_list.selected_paths()
+        return [image_path]
+
+    def apply_template_to_images(self, paths):
+        """Points the state of every image in `paths` at the selected template."""
+        template = self.config_manager.get_template(self.selected_template_var.get())
+        if not template:
+            return
+        self.save_current_image_state()
+        self.image_states.apply_template(paths, template)
+        self._reload_current_image_state(paths)
+        print(f"Applied template '{self.selected_template_var.get()}' to {len(paths)} image(s)")
+
+    def set_images_opacity(self, paths):
+        """Sets the watermark opacity of every image in `paths`."""
+        opacity = self.ask_integer("Set Opacity", f"Opacity (0-100) for {len(paths)} image(s):",
+                                          initialvalue=self.opacity.get(), minvalue=0, maxvalue=100, parent=self.root)
+        if opacity is None:
+            return
+        self.save_current_image_state()
+        self.image_states.set_opacity(paths, opacity, default=self.DEFAULT_IMAGE_STATE)
+        self._reload_current_image_state(paths)
+
+    def shift_images_position(self, paths):
+        """Moves the watermark of every image in `paths` by a pixel offset."""
+        dx = self.ask_integer("Shift Position", "Horizontal shift (pixels, negative = left):",
+                                     initialvalue=0, parent=self.root)
+        if dx is None:
+            return
+        dy = self.ask_integer("Shift Position", "Vertical shift (pixels, negative = up):",
+                                     initialvalue=0, parent=self.root)
+        if dy is None:
+            return
+        self.save_current_image_state()
+        count = self.image_states.shift_offsets(paths, dx, dy, default=self.DEFAULT_IMAGE_STATE)
+        self._reload_current_image_state(paths)
+        if count < len(paths):
+            print(f"Skipped {len(paths) - count} image(s) with relative positions")
+
+    def _reload_current_image_state(self, paths):
+        """Refreshes the controls and preview after a bulk edit touched the current image."""
+        if self.current_image_path is None or self.current_image_path not in set(paths):
+            return
+        self.load_image_state(self.current_image_path)
+        self.update_position_grid_selection(self.watermark_position_mode)
+        self.preview_watermark()
+
     def remove_image(self, image_path):
         """Removes an image from the list and updates the UI."""
         if image_path in self.filepaths:
@@ -1309,13 +2061,16 @@ class MainWindow:
                 self.filepath_set.discard(norm)
             
             # Remove from image states if it exists
-            if image_path in self.image_states:
-                del self.image_states[image_path]
+            self.image_states.discard(image_path)
             
             # If this was the currently selected image, clear the preview
             if self.current_image_path == image_path:
                 self.current_image_path = None
                 self.original_image = None
+                if self.image_pyramid is not None:
+                    self.image_pyramid.cancel()
+                self.image_pyramid = None
+                self.preview_renderer.cancel()
                 self.image_label.config(image="", text="🎨 Workspace\n\nDrag & drop images here or use the import buttons\n\nSelect an image from the list to start editing")
             
             # Update the thumbnail list
@@ -1323,13 +2078,32 @@ class MainWindow:
             print(f"Removed image: {os.path.basename(image_path)}")
 
 
+    def clear_images(self):
+        """Removes all images, their states and the preview."""
+        with self.memory.stage("clear images"):
+            self._clear_images()
+
+    def _clear_images(self):
+        self.filepaths = []
+        self.filepath_set = set()
+        self.image_states.clear()
+        self.current_image_path = None
+        self.original_image = None
+        if self.image_pyramid is not None:
+            self.image_pyramid.cancel()
+        self.image_pyramid = None
+        self.preview_renderer.cancel()
+        self.image_label.config(image="", text="🎨 Workspace\n\nDrag & drop images here or use the import buttons\n\nSelect an image from the list to start editing")
+        self.thumbnail_list.clear()
+
     def update_position_grid_selection(self, selected_pos):
         """Updates the visual selection state of the nine-grid position buttons.
         If selected_pos is one of the predefined positions, highlight that button;
         otherwise, clear all selections."""
         positions = {"top-left", "top-center", "top-right",
                      "mid-left", "mid-center", "mid-right",
-                     "bottom-left", "bottom-center", "bottom-right"}
+                     "bottom-left", "bottom-center", "bottom-right",
+                     "tiled"}
         for pos, btn in getattr(self, 'position_buttons', {}).items():
             if selected_pos in positions and pos == selected_pos:
                 btn.config(style='Selected.TButton')
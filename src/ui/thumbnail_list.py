@@ -0,0 +1,214 @@
+import tkinter as tk
+from tkinter import ttk
+import os
+
+from PIL import ImageTk
+
+from core.cache import LRUCache
+
+# Row captions for files that failed validation
+STATUS_LABELS = {
+    'missing': "⚠ File missing",
+    'changed': "⚠ File changed",
+    'error': "⚠ Cannot read",
+}
+
+
+class ThumbnailList:
+    """
+    Virtualized list of image thumbnails and file names.
+
+    Only the rows in view exist as widgets and are reused while scrolling,
+    so a list of tens of thousands of images costs the same to show as a
+    short one. Thumbnails (and file validation) come from a ThumbnailLoader
+    and are only requested for visible rows. Ctrl+Click and Shift+Click
+    build a multi-image selection for bulk edits.
+    """
+
+    ROW_HEIGHT = 132
+    POLL_MS = 50
+    SELECTED_BG = '#e3f2fd'
+
+    def __init__(self, parent, loader, on_select, on_context_menu):
+        self.loader = loader
+        self.on_select = on_select
+        self.on_context_menu = on_context_menu
+        self.paths = []
+        self.fingerprints = {}  # path -> expected (size, mtime_ns), e.g. from a session file
+        self.status = {}        # path -> 'missing' | 'changed' | 'error'
+        self.selection = set()
+        self._anchor = None
+        self._photos = LRUCache(max_entries=512)
+        self._rows = []
+
+        self.canvas = tk.Canvas(parent, bg='white', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.bind("<Configure>", lambda e: self.refresh())
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.canvas.after(self.POLL_MS, self._poll)
+
+    def set_paths(self, paths):
+        """Shows `paths`, keeping cached thumbnails and the scroll position."""
+        self.paths = list(paths)
+        if self.selection:
+            self.selection &= set(self.paths)
+        self.refresh()
+
+    @property
+    def cached_photos(self):
+        """Number of thumbnail images currently held for display."""
+        return len(self._photos)
+
+    def append(self, paths):
+        self.paths.extend(paths)
+        self.refresh()
+
+    def clear(self):
+        self.paths = []
+        self.fingerprints = {}
+        self.status = {}
+        self.selection = set()
+        self._anchor = None
+        self._photos.clear()
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def select_all(self):
+        self.selection = set(self.paths)
+        self._repaint()
+
+    def selected_paths(self):
+        """Returns the selected paths in list order."""
+        return [p for p in self.paths if p in self.selection]
+
+    def refresh(self):
+        """Repositions and rebinds the row widgets for the current scroll position."""
+        width = self.canvas.winfo_width()
+        height = max(1, self.canvas.winfo_height())
+        total = len(self.paths) * self.ROW_HEIGHT
+        self.canvas.configure(scrollregion=(0, 0, width, max(total, height)))
+        first = max(0, int(self.canvas.canvasy(0) // self.ROW_HEIGHT))
+        visible = height // self.ROW_HEIGHT + 2
+        while len(self._rows) < visible:
+            self._rows.append(self._create_row())
+        visible_paths = []
+        for i, row in enumerate(self._rows):
+            index = first + i
+            if i < visible and index < len(self.paths):
+                path = self.paths[index]
+                self.canvas.coords(row['window'], 5, index * self.ROW_HEIGHT + 3)
+                self.canvas.itemconfigure(row['window'], state='normal', width=max(1, width - 10))
+                if row['path'] != path:
+                    self._bind_row(row, path)
+                visible_paths.append(path)
+            else:
+                self.canvas.itemconfigure(row['window'], state='hidden')
+                row['path'] = None
+        # Rows that scrolled away no longer need their thumbnails
+        self.loader.retain(visible_paths)
+        # Read the next page ahead so scrolling down finds thumbnails ready
+        ahead_start = first + min(visible, len(self._rows))
+        ahead = [p for p in self.paths[ahead_start:ahead_start + visible]
+                 if p not in self._photos and self.status.get(p) not in ('missing', 'error')]
+        self.loader.read_ahead(ahead, self.fingerprints)
+
+    def _create_row(self):
+        frame = ttk.Frame(self.canvas, style='Card.TFrame')
+        # Fixed-size image container and label (uniform thumbnail area)
+        img_container = tk.Frame(frame, width=110, height=110, bg='white', relief='solid', borderwidth=1)
+        img_container.pack(side=tk.LEFT, padx=8, pady=8)
+        img_container.pack_propagate(False)
+        image_label = tk.Label(img_container, bg='white')
+        image_label.pack(expand=True)
+        # Fixed-size text container; ensure wrap within available width
+        text_container = tk.Frame(frame, width=160, height=110, bg='white')
+        text_container.pack(side=tk.LEFT, padx=(0, 8), pady=8)
+        text_container.pack_propagate(False)
+        name_label = tk.Label(text_container, wraplength=150, font=('Segoe UI', 9),
+                              bg='white', fg='#212529', justify='center', anchor='center')
+        # Add extra right padding to visually shift content slightly left
+        name_label.pack(fill=tk.BOTH, expand=True, padx=(0, 10))
+
+        row = {'path': None, 'image': image_label, 'name': name_label, 'text': text_container}
+        for widget in (image_label, img_container, name_label, text_container):
+            widget.bind("<Button-1>", lambda e, r=row: r['path'] and self._on_click(r['path']))
+            widget.bind("<Control-Button-1>", lambda e, r=row: r['path'] and self._on_toggle(r['path']))
+            widget.bind("<Shift-Button-1>", lambda e, r=row: r['path'] and self._on_range(r['path']))
+            # Right-click for context menu
+            widget.bind("<Button-3>", lambda e, r=row: r['path'] and self.on_context_menu(e, r['path']))
+        row['window'] = self.canvas.create_window(5, 0, window=frame, anchor='nw',
+                                                  height=self.ROW_HEIGHT - 6)
+        return row
+
+    def _bind_row(self, row, path):
+        row['path'] = path
+        # Format filename: insert newline after every 15 characters for controlled wrapping
+        base_name = os.path.basename(path)
+        display_name = '\n'.join([base_name[i:i+15] for i in range(0, len(base_name), 15)])
+        status = self.status.get(path)
+        if status in STATUS_LABELS:
+            row['name'].configure(text=display_name + "\n" + STATUS_LABELS[status], fg='#dc3545')
+        else:
+            row['name'].configure(text=display_name, fg='#212529')
+        self._paint(row)
+        photo = self._photos.get(path)
+        row['image'].configure(image=photo if photo is not None else '')
+        if photo is None and status not in ('missing', 'error'):
+            self.loader.request(path, self.fingerprints.get(path))
+
+    def _paint(self, row):
+        bg = self.SELECTED_BG if row['path'] in self.selection else 'white'
+        row['name'].configure(bg=bg)
+        row['text'].configure(bg=bg)
+
+    def _repaint(self):
+        for row in self._rows:
+            if row['path'] is not None:
+                self._paint(row)
+
+    def _on_click(self, path):
+        self.selection = {path}
+        self._anchor = path
+        self._repaint()
+        self.on_select(path)
+
+    def _on_toggle(self, path):
+        if path in self.selection:
+            self.selection.discard(path)
+        else:
+            self.selection.add(path)
+        self._anchor = path
+        self._repaint()
+
+    def _on_range(self, path):
+        if self._anchor not in self.selection:
+            self._on_click(path)
+            return
+        start, end = sorted((self.paths.index(self._anchor), self.paths.index(path)))
+        self.selection.update(self.paths[start:end + 1])
+        self._repaint()
+
+    def _poll(self):
+        results = self.loader.poll()
+        for path, thumbnail, status in results:
+            if thumbnail is not None:
+                self._photos.put(path, ImageTk.PhotoImage(thumbnail))
+            if status == 'ok':
+                self.status.pop(path, None)
+            else:
+                self.status[path] = status
+            for row in self._rows:
+                if row['path'] == path:
+                    self._bind_row(row, path)
+        self.canvas.after(self.POLL_MS, self._poll)
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+        self.refresh()
\ No newline at end of file